@@ -1,10 +1,12 @@
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-
+from agents.llm import get_llm
+from agents.schemas import invoke_structured
+from rag.context import pack_docs
 from rag.prompts import system_prompt, COMP_SYS_DEFAULT, config_text
 
 
 def competitor_chain(retriever, model: str = "gpt-4o-mini"):
+    from langchain_core.prompts import ChatPromptTemplate
+
     sys_msg = system_prompt("competitor_analysis", COMP_SYS_DEFAULT)
     cfg = config_text("competitor_analysis")
     msgs = [("system", sys_msg)] + ([("system", f"Config:\n{cfg}")] if cfg else []) + [
@@ -22,7 +24,7 @@ Context:
         ),
     ]
     prompt = ChatPromptTemplate.from_messages(msgs)
-    llm = ChatOpenAI(model=model, temperature=0)
+    llm = get_llm(model)
 
     def run(domain: str, candidates):
         # Normalize names from candidates list[dict|str]
@@ -41,28 +43,13 @@ Context:
             docs = retriever.invoke(query)
         except Exception:
             docs = retriever.get_relevant_documents(query)
-        ctx = "\n\n".join(d.page_content[:1200] for d in docs)
-        out = (prompt | llm).invoke({
+        ctx = pack_docs(docs, "comp", model=model)
+        out, parsed, _ = invoke_structured("comp", prompt, llm, {
             "domain": domain,
             "candidates": ", ".join(names) if names else "",
             "header": header,
             "ctx": ctx,
-        }).content
-        # Try parse JSON
-        parsed = None
-        try:
-            import json as _json
-
-            parsed = _json.loads(out)
-        except Exception:
-            try:
-                start, end = out.find("{"), out.rfind("}")
-                if start != -1 and end != -1:
-                    import json as _json
-
-                    parsed = _json.loads(out[start : end + 1])
-            except Exception:
-                parsed = None
+        })
         srcs = []
         snips = []
         for d in docs[:6]:
@@ -1,10 +1,9 @@
 import json
 import re
-from typing import Any, Dict
-
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
+from typing import Any, Dict, List, Sequence, Tuple
 
+from agents.llm import get_llm
+from agents.schemas import invoke_structured
 from rag.prompts import system_prompt, DECISION_SYS_DEFAULT, config_text
 
 
@@ -17,7 +16,13 @@ def _safe_json(s: str) -> Dict[str, Any]:
     return json.loads(s)
 
 
+def _norm_name(name: Any) -> str:
+    return " ".join(str(name or "").casefold().split())
+
+
 def decision_chain(model: str = "gpt-4o-mini"):
+    from langchain_core.prompts import ChatPromptTemplate
+
     sys_msg = system_prompt("decision", DECISION_SYS_DEFAULT)
     cfg = config_text("decision")
     msgs = [("system", sys_msg)] + ([("system", f"Config:\n{cfg}")] if cfg else []) + [
@@ -27,10 +32,48 @@ def decision_chain(model: str = "gpt-4o-mini"):
         ),
     ]
     prompt = ChatPromptTemplate.from_messages(msgs)
-    llm = ChatOpenAI(model=model, temperature=0)
+    batch_prompt = ChatPromptTemplate.from_messages(
+        msgs[:-1]
+        + [
+            (
+                "human",
+                "Competitors:\n{comp}\n\nCandidates:\n{candidates}\n\n"
+                "Score every candidate independently with the rubric above. Return JSON only: "
+                '{{"decisions": [{{"name": "<candidate name>", "score": int, "verdict": "recommend|hold|pass", '
+                '"rationale": "...", "missing": ["..."]}}]}} with one entry per candidate.',
+            )
+        ]
+    )
+    llm = get_llm(model)
 
     def run(tech: str, market: str, comp: str) -> Dict[str, Any]:
-        raw = (prompt | llm).invoke({"tech": tech, "market": market, "comp": comp}).content
-        return _safe_json(raw)
+        raw, parsed, _ = invoke_structured("decision", prompt, llm, {"tech": tech, "market": market, "comp": comp})
+        # Validated against schemas.Decision (one repair pass); _safe_json stays the last-resort fallback
+        return parsed if isinstance(parsed, dict) else _safe_json(raw)
+
+    def run_many(items: Sequence[Tuple[str, str, str]], comp: str) -> Dict[str, Dict[str, Any]]:
+        """Decide (name, tech, market) candidates sharing one competitor analysis in a single call.
+
+        Returns decisions by candidate name; candidates the answer does not cover are
+        left out, so the caller can fall back to run() for them.
+        """
+        if not items:
+            return {}
+        candidates = "\n\n".join(f"### {name}\nTech:\n{tech}\n\nMarket:\n{market}" for name, tech, market in items)
+        _, parsed, result = invoke_structured(
+            "decision", batch_prompt, llm, {"comp": comp, "candidates": candidates}, kind="decision_batch"
+        )
+        if result is None:
+            return {}
+        entries: List[Dict[str, Any]] = parsed["decisions"]
+        # Match on names only: an entry the model renamed must not be given to another candidate
+        by_name = {_norm_name(e.get("name")): e for e in entries}
+        out: Dict[str, Dict[str, Any]] = {}
+        for name, _tech, _market in items:
+            entry = by_name.get(_norm_name(name))
+            if entry is not None:
+                out[name] = {k: v for k, v in entry.items() if k != "name"}
+        return out
 
+    run.run_many = run_many
     return run
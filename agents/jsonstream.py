@@ -0,0 +1,502 @@
+import json
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from agents.llm import invoke_chat
+
+
+class MalformedJSON(ValueError):
+    """Streamed output can no longer become valid JSON."""
+
+
+class SchemaViolation(MalformedJSON):
+    """Streamed output is JSON but does not match the agent's schema."""
+
+
+class Schema:
+    """Shallow contract for an agent's JSON output, checked while tokens arrive.
+
+    `fields` maps top-level keys to allowed JSON types ("object", "array", "string",
+    "number", "boolean"); null is always accepted. A type mismatch is detected at the
+    first character of the value, an `enums` mismatch as soon as the value is complete,
+    missing `required` keys when the root closes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        roots: Sequence[str] = ("object",),
+        fields: Optional[Dict[str, Sequence[str]]] = None,
+        required: Sequence[str] = (),
+        enums: Optional[Dict[str, Sequence[str]]] = None,
+        require_json: bool = False,
+        list_keys: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.roots = tuple(roots)
+        self.fields = {k: tuple(v) for k, v in (fields or {}).items()}
+        self.required = tuple(required)
+        self.enums = {k: {str(x).lower() for x in v} for k, v in (enums or {}).items()}
+        # Without require_json, output that never starts a JSON value is plain text, not an error
+        self.require_json = require_json
+        # Keys under which a list-shaped answer may be wrapped in an object
+        self.list_keys = tuple(list_keys)
+
+
+# Mirrors the schemas in prompts/*.system.md and DECISION_SYS_DEFAULT
+SCHEMAS: Dict[str, Schema] = {
+    "market": Schema(
+        "market",
+        fields={"context": ["array"], "position": ["array"], "scores": ["object"]},
+        required=["scores"],
+    ),
+    "comp": Schema(
+        "comp",
+        fields={
+            "summary": ["string"],
+            "headers": ["array"],
+            "rows": ["array"],
+            "diffs": ["array"],
+            "risks": ["array"],
+            "verdict": ["string"],
+        },
+        required=["headers", "rows"],
+    ),
+    "scout": Schema(
+        "scout",
+        roots=("array", "object"),
+        list_keys=["ai_startups", "items", "results", "companies", "startups", "후보", "목록"],
+    ),
+    "tech": Schema(
+        "tech",
+        fields={
+            "include": ["boolean"],
+            "is_ai": ["boolean"],
+            "company_name": ["string"],
+            "country": ["string"],
+            "segment": ["string"],
+            "summary": ["string"],
+            "tech_highlight": ["string"],
+            "source_url": ["string"],
+        },
+    ),
+    "decision": Schema(
+        "decision",
+        fields={"score": ["number"], "verdict": ["string"], "rationale": ["string"], "missing": ["array"]},
+        required=["score", "verdict"],
+        enums={"verdict": ["recommend", "hold", "pass"]},
+        require_json=True,
+    ),
+    "decision_batch": Schema(
+        "decision_batch",
+        fields={"decisions": ["array"]},
+        required=["decisions"],
+        require_json=True,
+    ),
+}
+
+_OPEN = {"{": "object", "[": "array"}
+_NUMBER = re.compile(r"-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?")
+_LITERALS = {"t": "true", "f": "false", "n": "null"}
+
+
+def _type_of(first: str) -> str:
+    if first in _OPEN:
+        return _OPEN[first]
+    if first == '"':
+        return "string"
+    if first == "-" or first.isdigit():
+        return "number"
+    if first in "tf":
+        return "boolean"
+    return "null"
+
+
+class StreamingJSONParser:
+    """Incremental JSON checker fed with text deltas (usable as invoke_chat's on_token).
+
+    Leading prose or a code fence before the root value is skipped (up to
+    `max_preamble` characters), text after it is ignored and `//` comments are
+    dropped. Each completed top-level field (or root array item) is parsed right away,
+    stored in `fields` and passed to `on_field(key, value)`, so e.g. a decision's
+    verdict is known before its rationale is generated. With `strict` the first
+    syntax or schema error raises MalformedJSON from feed(), which aborts the stream;
+    otherwise it is recorded in `error` and checking stops.
+    """
+
+    def __init__(
+        self,
+        schema: Optional[Schema] = None,
+        on_field: Optional[Callable[[Any, Any], None]] = None,
+        strict: bool = True,
+        max_preamble: int = 200,
+    ) -> None:
+        self.schema = schema or Schema("json", roots=("object", "array"))
+        self.on_field = on_field
+        self.strict = strict
+        self.max_preamble = max_preamble
+        self.fields: Dict[Any, Any] = {}
+        self.value: Any = None
+        self.error: Optional[str] = None
+        self.chars = 0
+        self._mode = "pre"  # pre -> json -> done; "text" once checking is given up
+        self._preamble = 0
+        self._buf: List[str] = []
+        self._stack: List[List[str]] = []  # [container kind, expected token]
+        self._scalar: Optional[str] = None  # "key" | "string" | "number" | "literal"
+        self._escape = False
+        self._literal = ""
+        self._slash = False
+        self._comment = False
+        self._field_key: Any = None
+        self._field_start = 0
+        self._items = 0
+
+    @property
+    def started(self) -> bool:
+        return bool(self._buf)
+
+    @property
+    def done(self) -> bool:
+        return self._mode == "done"
+
+    def __call__(self, text: str) -> None:
+        self.feed(text)
+
+    def feed(self, text: str) -> None:
+        self.chars += len(text)
+        if self._mode in ("done", "text"):
+            return
+        try:
+            for c in text:
+                self._char(c)
+                if self._mode in ("done", "text"):
+                    break
+        except MalformedJSON as e:
+            if self.strict:
+                raise
+            self.error = str(e)
+            self._mode = "text"
+
+    def finish(self) -> Any:
+        """The parsed root value; None for plain-text output (unless the schema requires JSON)."""
+        try:
+            if self._mode == "json":
+                raise MalformedJSON(f"{self.schema.name}: output ended inside JSON")
+            if self._mode == "done":
+                missing = [k for k in self.schema.required if k not in self.fields]
+                if isinstance(self.value, dict) and missing:
+                    raise SchemaViolation(f"{self.schema.name}: missing {', '.join(missing)}")
+                return self.value
+            if self.error is None and self.schema.require_json:
+                raise MalformedJSON(f"{self.schema.name}: no JSON in output")
+        except MalformedJSON as e:
+            if self.strict:
+                raise
+            self.error = self.error or str(e)
+        return None
+
+    # -- character state machine -------------------------------------------------
+
+    def _fail(self, msg: str) -> None:
+        raise MalformedJSON(f"{self.schema.name}: {msg} at char {self.chars}")
+
+    def _char(self, c: str) -> None:
+        if self._mode == "pre":
+            kind = _OPEN.get(c)
+            if kind is not None and kind in self.schema.roots:
+                self._mode = "json"
+                self._open(c)
+                return
+            self._preamble += 1
+            if self._preamble > self.max_preamble:
+                if self.schema.require_json:
+                    self._fail("no JSON value started")
+                self._mode = "text"
+            return
+        scalar = self._scalar
+        if scalar in ("key", "string"):
+            self._buf.append(c)
+            if self._escape:
+                self._escape = False
+            elif c == "\\":
+                self._escape = True
+            elif c == '"':
+                self._scalar = None
+                if scalar == "key":
+                    if len(self._stack) == 1:
+                        self._field_key = json.loads("".join(self._buf[self._field_start :]))
+                    self._stack[-1][1] = "colon"
+                else:
+                    self._value_end()
+            return
+        if scalar == "literal":
+            if c == self._literal[0]:
+                self._buf.append(c)
+                self._literal = self._literal[1:]
+                if not self._literal:
+                    self._scalar = None
+                    self._value_end()
+                return
+            self._fail(f"invalid literal near {c!r}")
+        if scalar == "number":
+            if c.isdigit() or c in "+-.eE":
+                self._buf.append(c)
+                return
+            self._scalar = None
+            self._value_end()
+        if self._comment:
+            if c == "\n":
+                self._comment = False
+            return
+        if self._slash:
+            self._slash = False
+            if c != "/":
+                self._fail("unexpected '/'")
+            self._comment = True
+            return
+        if c in " \t\r\n":
+            return
+        if c == "/":
+            self._slash = True
+            return
+        frame = self._stack[-1]
+        kind, expect = frame
+        if kind == "object":
+            if expect in ("key_or_end", "key"):
+                if c == '"':
+                    if len(self._stack) == 1:
+                        self._field_start = len(self._buf)
+                    self._buf.append(c)
+                    self._scalar = "key"
+                elif c == "}" and expect == "key_or_end":
+                    self._close(c)
+                else:
+                    self._fail(f"expected a key, got {c!r}")
+            elif expect == "colon":
+                if c != ":":
+                    self._fail(f"expected ':', got {c!r}")
+                self._buf.append(c)
+                frame[1] = "value"
+            elif expect == "value":
+                self._value_start(c)
+            elif c == ",":
+                self._buf.append(c)
+                frame[1] = "key"
+            elif c == "}":
+                self._close(c)
+            else:
+                self._fail(f"expected ',' or '}}', got {c!r}")
+        else:
+            if expect == "value_or_end" and c == "]":
+                self._close(c)
+            elif expect in ("value_or_end", "value"):
+                self._value_start(c)
+            elif c == ",":
+                self._buf.append(c)
+                frame[1] = "value"
+            elif c == "]":
+                self._close(c)
+            else:
+                self._fail(f"expected ',' or ']', got {c!r}")
+
+    def _open(self, c: str) -> None:
+        self._buf.append(c)
+        kind = _OPEN[c]
+        self._stack.append([kind, "key_or_end" if kind == "object" else "value_or_end"])
+
+    def _close(self, c: str) -> None:
+        self._buf.append(c)
+        self._stack.pop()
+        if not self._stack:
+            self._mode = "done"
+            self.value = json.loads("".join(self._buf), strict=False)
+            return
+        self._value_end()
+
+    def _value_start(self, c: str) -> None:
+        typ = _type_of(c)
+        if typ == "null" and c != "n":
+            self._fail(f"unexpected {c!r}")
+        if len(self._stack) == 1:
+            if self._stack[0][0] == "object":
+                allowed = self.schema.fields.get(self._field_key)
+                if allowed and typ != "null" and typ not in allowed:
+                    raise SchemaViolation(
+                        f"{self.schema.name}.{self._field_key}: expected {'/'.join(allowed)}, got {typ}"
+                    )
+            else:
+                self._field_key = self._items
+                self._items += 1
+            self._field_start = len(self._buf)
+        self._stack[-1][1] = "next"
+        if c in _OPEN:
+            self._open(c)
+            return
+        self._buf.append(c)
+        if c == '"':
+            self._scalar = "string"
+        elif typ == "number":
+            self._scalar = "number"
+        else:
+            self._scalar = "literal"
+            self._literal = _LITERALS[c][1:]
+
+    def _value_end(self) -> None:
+        if len(self._stack) != 1:
+            return
+        raw = "".join(self._buf[self._field_start :])
+        if _type_of(raw[0]) == "number" and not _NUMBER.fullmatch(raw):
+            self._fail(f"invalid number {raw!r}")
+        value = json.loads(raw, strict=False)
+        key = self._field_key
+        allowed = self.schema.enums.get(key) if isinstance(key, str) else None
+        if allowed and isinstance(value, str) and value.strip().lower() not in allowed:
+            raise SchemaViolation(f"{self.schema.name}.{key}: {value!r} not in {sorted(allowed)}")
+        self.fields[key] = value
+        if self.on_field is not None:
+            self.on_field(key, value)
+
+
+def parse_lenient(text: Any, schema: Optional[Schema] = None) -> Any:
+    """Whole-text fallback: json.loads, else the outermost {...}/[...] span (roots in schema order)."""
+    if not isinstance(text, str):
+        return None
+    roots = schema.roots if schema is not None else ("object",)
+    types = {"object": dict, "array": list}
+    s = re.sub(r"^```json|^```|```$", "", text.strip(), flags=re.IGNORECASE | re.MULTILINE).strip()
+    try:
+        value = json.loads(s)
+        if any(isinstance(value, types[r]) for r in roots):
+            return value
+    except ValueError:
+        pass
+    for root in roots:
+        open_, close = ("{", "}") if root == "object" else ("[", "]")
+        start, end = s.find(open_), s.rfind(close)
+        if start != -1 and end > start:
+            try:
+                return json.loads(s[start : end + 1])
+            except ValueError:
+                continue
+    return None
+
+
+def extract_list(value: Any, schema: Schema) -> List[Any]:
+    """The list in a list-shaped answer, unwrapping {"<list_key>": [...]}."""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict):
+        for key in schema.list_keys:
+            if isinstance(value.get(key), list):
+                return value[key]
+    return []
+
+
+_FIELD_LISTENER: ContextVar[Optional[Callable[[str, Any, Any], None]]] = ContextVar(
+    "json_field_listener", default=None
+)
+
+
+@contextmanager
+def listen_fields(fn: Callable[[str, Any, Any], None]) -> Iterator[None]:
+    """Call fn(agent, key, value) for every top-level field parsed by invoke_json in this context."""
+    token = _FIELD_LISTENER.set(fn)
+    try:
+        yield
+    finally:
+        _FIELD_LISTENER.reset(token)
+
+
+def json_streaming_enabled() -> bool:
+    return os.getenv("JSON_STREAM", "1").strip().lower() not in ("0", "false", "off", "no")
+
+
+_STATS_LOCK = threading.Lock()
+_ATTEMPTS: Counter = Counter()
+_ABORTS: Counter = Counter()
+_ABORTED_CHARS: Counter = Counter()
+
+_RETRY_HINT = (
+    "The previous answer was rejected ({reason}). "
+    "Answer again with the JSON only, exactly matching the schema: no prose, no code fences."
+)
+
+
+def invoke_json(
+    agent: str,
+    prompt,
+    llm,
+    variables: Dict[str, Any],
+    schema: Schema,
+    on_field: Optional[Callable[[Any, Any], None]] = None,
+    retries: Optional[int] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+) -> Tuple[str, Any]:
+    """invoke_chat for JSON-producing agents; returns (text, parsed value or None).
+
+    The completion is streamed through a StreamingJSONParser. Malformed or off-schema
+    output aborts the stream at the first bad token and the call is retried with a
+    corrective message (JSON_STREAM_RETRIES, default 1). The last attempt is never
+    aborted and falls back to lenient whole-text parsing, like the chains did before.
+    JSON_STREAM=0 skips streaming validation entirely.
+    """
+    if not json_streaming_enabled():
+        with _STATS_LOCK:
+            _ATTEMPTS[agent] += 1
+        text = invoke_chat(agent, prompt, llm, variables, response_format=response_format)
+        return text, parse_lenient(text, schema)
+    if retries is None:
+        retries = int(os.getenv("JSON_STREAM_RETRIES", "1"))
+    listener = _FIELD_LISTENER.get()
+    reason = ""
+
+    def _on_field(key: Any, value: Any) -> None:
+        if on_field is not None:
+            on_field(key, value)
+        if listener is not None:
+            listener(agent, key, value)
+
+    for attempt in range(retries + 1):
+        last = attempt == retries
+        parser = StreamingJSONParser(schema, on_field=_on_field, strict=not last)
+        p = prompt
+        if attempt:
+            p = prompt + [("human", _RETRY_HINT.format(reason=reason.replace("{", "(").replace("}", ")")))]
+        with _STATS_LOCK:
+            _ATTEMPTS[agent] += 1
+        try:
+            text = invoke_chat(agent, p, llm, variables, on_token=parser, response_format=response_format)
+            value = parser.finish()
+        except MalformedJSON as e:
+            reason = str(e)
+            with _STATS_LOCK:
+                _ABORTS[agent] += 1
+                _ABORTED_CHARS[agent] += parser.chars
+            continue
+        if value is None:
+            value = parse_lenient(text, schema)
+        return text, value
+    raise AssertionError("unreachable: the last attempt never aborts")
+
+
+def json_stream_stats() -> Dict[str, Any]:
+    """Attempts and aborted (retried) calls per agent, and how many streamed characters the aborts had produced."""
+    with _STATS_LOCK:
+        return {
+            "attempts": dict(_ATTEMPTS),
+            "aborts": dict(_ABORTS),
+            "aborted_chars": sum(_ABORTED_CHARS.values()),
+        }
+
+
+def reset_json_stream_stats() -> None:
+    with _STATS_LOCK:
+        _ATTEMPTS.clear()
+        _ABORTS.clear()
+        _ABORTED_CHARS.clear()
@@ -0,0 +1,280 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from db.cache import SqliteCache
+from rag.context import count_tokens
+
+
+DEFAULT_MODEL = "gpt-4o-mini"
+BASE = Path(__file__).resolve().parents[1]
+
+# One pooled client per (model, temperature); ChatOpenAI keeps its HTTP pool on the instance.
+_LLMS: Dict[Tuple[str, float], Any] = {}
+_LOCK = threading.Lock()
+
+
+def get_llm(model: str = DEFAULT_MODEL, temperature: float = 0):
+    key = (model, float(temperature))
+    llm = _LLMS.get(key)
+    if llm is not None:
+        return llm
+    with _LOCK:
+        llm = _LLMS.get(key)
+        if llm is None:
+            from langchain_openai import ChatOpenAI
+
+            # stream_usage: token usage also arrives on streamed responses
+            llm = ChatOpenAI(model=model, temperature=temperature, stream_usage=True)
+            _LLMS[key] = llm
+        return llm
+
+
+# Per-agent count of completed LLM round-trips (process-wide)
+_CALLS: Counter = Counter()
+_CALLS_LOCK = threading.Lock()
+# Per-agent prompt tokens sent on real round-trips (API usage when reported, else tiktoken)
+_PROMPT_TOKENS: Counter = Counter()
+# Per-agent time-to-first-token of streamed calls: [count, total ms, max ms]
+_TTFT: Dict[str, list] = {}
+
+class CallScope:
+    """LLM usage attributed to one unit of work (e.g. a graph node), across its threads."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+
+    def add(self, calls: int = 0, cache_hits: int = 0, prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        with self._lock:
+            self.calls += calls
+            self.cache_hits += cache_hits
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def first_token(self) -> None:
+        with self._lock:
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = {
+                "llm_calls": self.calls,
+                "cache_hits": self.cache_hits,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+            if self.first_token_at is not None:
+                # Scope start (e.g. node start) to the first streamed token
+                out["ttft_ms"] = round(1000 * (self.first_token_at - self.started), 1)
+            return out
+
+
+_SCOPE: ContextVar[Optional[CallScope]] = ContextVar("llm_call_scope", default=None)
+
+
+@contextmanager
+def track_calls() -> Iterator[CallScope]:
+    """Attribute invoke_chat usage in this context (and copied contexts) to a fresh scope."""
+    scope = CallScope()
+    token = _SCOPE.set(scope)
+    try:
+        yield scope
+    finally:
+        _SCOPE.reset(token)
+
+
+# Process-wide cap on in-flight LLM requests (OpenAI rate limits). Override with LLM_MAX_CONCURRENCY.
+_MAX_CONCURRENCY = max(1, int(os.getenv("LLM_MAX_CONCURRENCY", "4")))
+_INFLIGHT = threading.BoundedSemaphore(_MAX_CONCURRENCY)
+
+
+def max_concurrency() -> int:
+    return _MAX_CONCURRENCY
+
+
+def set_max_concurrency(n: int) -> None:
+    global _MAX_CONCURRENCY, _INFLIGHT
+    _MAX_CONCURRENCY = max(1, int(n))
+    _INFLIGHT = threading.BoundedSemaphore(_MAX_CONCURRENCY)
+
+
+# Persistent response cache. Keyed by hash(model, rendered messages, params), so a
+# re-run over an unchanged corpus is answered from disk. Disable with LLM_CACHE=0.
+_CACHE: Optional[SqliteCache] = None
+_CACHE_ENABLED = os.getenv("LLM_CACHE", "1").strip().lower() not in ("0", "false", "off", "no")
+_CACHE_LOCK = threading.Lock()
+_CACHE_HITS: Counter = Counter()
+
+
+def set_llm_cache_enabled(enabled: bool) -> None:
+    global _CACHE_ENABLED
+    _CACHE_ENABLED = bool(enabled)
+
+
+def response_cache() -> Optional[SqliteCache]:
+    global _CACHE
+    if not _CACHE_ENABLED:
+        return None
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = SqliteCache(
+                    os.getenv("LLM_CACHE_PATH", str(BASE / ".cache" / "llm.sqlite3")),
+                    ttl_seconds=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+                    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000")),
+                    max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024),
+                )
+    return _CACHE
+
+
+def _cache_key(llm, messages, response_format: Optional[Dict[str, Any]] = None) -> str:
+    payload: Dict[str, Any] = {
+        "model": getattr(llm, "model_name", None) or getattr(llm, "model", None),
+        "params": {
+            "temperature": getattr(llm, "temperature", None),
+            "max_tokens": getattr(llm, "max_tokens", None),
+            "top_p": getattr(llm, "top_p", None),
+        },
+        "messages": [[m.type, m.content] for m in messages],
+    }
+    if response_format is not None:
+        payload["response_format"] = response_format
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def streaming_enabled() -> bool:
+    """LLM_STREAM=1 streams every call (tokens reach LangGraph's "messages" stream mode)."""
+    return os.getenv("LLM_STREAM", "0").strip().lower() in ("1", "true", "on", "yes")
+
+
+def _stream(llm, messages, on_token: Optional[Callable[[str], None]]) -> Tuple[Any, Optional[float]]:
+    """Consume llm.stream(); returns the merged message and time-to-first-token in ms."""
+    t0 = time.perf_counter()
+    ttft: Optional[float] = None
+    full = None
+    for chunk in llm.stream(messages):
+        text = chunk.content if isinstance(chunk.content, str) else ""
+        if text and ttft is None:
+            ttft = 1000 * (time.perf_counter() - t0)
+            scope = _SCOPE.get()
+            if scope is not None:
+                scope.first_token()
+        # AIMessageChunk supports +: content is concatenated and usage summed
+        full = chunk if full is None else full + chunk
+        if text and on_token is not None:
+            on_token(text)
+    return full, ttft
+
+
+def invoke_chat(
+    agent: str,
+    prompt,
+    llm,
+    variables: Dict[str, Any],
+    on_token: Optional[Callable[[str], None]] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Run `prompt | llm` and return the message text, counting the call for `agent`.
+
+    Responses are served from the persistent cache when the rendered prompt was
+    seen before; only real round-trips count as LLM calls. With `on_token` (or
+    LLM_STREAM=1) the completion is streamed and `on_token` receives each text delta;
+    a cached response is delivered to it in one piece. `response_format` is bound to
+    the request (OpenAI structured output) and is part of the cache key.
+    """
+    messages = prompt.format_messages(**variables)
+    cache = response_cache()
+    key = _cache_key(llm, messages, response_format) if cache is not None else None
+    if cache is not None:
+        hit = cache.get(key)  # type: ignore[arg-type]
+        if hit is not None:
+            with _CALLS_LOCK:
+                _CACHE_HITS[agent] += 1
+            scope = _SCOPE.get()
+            if scope is not None:
+                scope.add(cache_hits=1)
+            text = hit.decode("utf-8")
+            if on_token is not None:
+                on_token(text)
+            return text
+    with _CALLS_LOCK:
+        _CALLS[agent] += 1
+    ttft: Optional[float] = None
+    runnable = llm.bind(response_format=response_format) if response_format is not None else llm
+    with _INFLIGHT:
+        if on_token is not None or streaming_enabled():
+            resp, ttft = _stream(runnable, messages, on_token)
+        else:
+            resp = runnable.invoke(messages)
+    out = (resp.content if resp is not None else "") or ""
+    usage = getattr(resp, "usage_metadata", None) or {}
+    tokens = usage.get("input_tokens") or sum(count_tokens(str(m.content)) for m in messages)
+    with _CALLS_LOCK:
+        _PROMPT_TOKENS[agent] += int(tokens)
+        if ttft is not None:
+            n, total, worst = _TTFT.get(agent) or [0, 0.0, 0.0]
+            _TTFT[agent] = [n + 1, total + ttft, max(worst, ttft)]
+    scope = _SCOPE.get()
+    if scope is not None:
+        scope.add(calls=1, prompt_tokens=int(tokens), completion_tokens=int(usage.get("output_tokens") or 0))
+    if cache is not None and out:
+        cache.set(key, out.encode("utf-8"))  # type: ignore[arg-type]
+    return out
+
+
+def llm_call_stats() -> Dict[str, Any]:
+    with _CALLS_LOCK:
+        stats: Dict[str, Any] = dict(_CALLS)
+        hits = dict(_CACHE_HITS)
+        tokens = dict(_PROMPT_TOKENS)
+    stats["total"] = sum(stats.values())
+    stats["cache_hits"] = sum(hits.values())
+    stats["prompt_tokens"] = sum(tokens.values())
+    return stats
+
+
+def prompt_token_stats() -> Dict[str, int]:
+    """Prompt tokens per agent for real (uncached) LLM calls."""
+    with _CALLS_LOCK:
+        stats = dict(_PROMPT_TOKENS)
+    stats["total"] = sum(stats.values())
+    return stats
+
+
+def ttft_stats() -> Dict[str, Dict[str, float]]:
+    """Time-to-first-token (ms) per agent for streamed, uncached LLM calls."""
+    with _CALLS_LOCK:
+        items = {k: list(v) for k, v in _TTFT.items()}
+    return {
+        agent: {"calls": n, "avg_ms": round(total / n, 1), "max_ms": round(worst, 1)}
+        for agent, (n, total, worst) in items.items()
+        if n
+    }
+
+
+def llm_cache_stats() -> Optional[Dict[str, Any]]:
+    cache = response_cache()
+    return cache.stats() if cache is not None else None
+
+
+def reset_llm_stats() -> None:
+    with _CALLS_LOCK:
+        _CALLS.clear()
+        _CACHE_HITS.clear()
+        _PROMPT_TOKENS.clear()
+        _TTFT.clear()
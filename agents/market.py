@@ -1,10 +1,13 @@
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-
+from agents.llm import get_llm
+from agents.schemas import invoke_structured
+from rag.context import pack_docs
 from rag.prompts import system_prompt, MARKET_SYS_DEFAULT, config_text
+from rag.vector import Prefetcher
 
 
 def market_chain(retriever, model: str = "gpt-4o-mini"):
+    from langchain_core.prompts import ChatPromptTemplate
+
     sys_msg = system_prompt("market_eval", MARKET_SYS_DEFAULT)
     cfg = config_text("market_eval")
     msgs = [("system", sys_msg)] + ([("system", f"Config:\n{cfg}")] if cfg else []) + [
@@ -14,30 +17,13 @@ def market_chain(retriever, model: str = "gpt-4o-mini"):
         ),
     ]
     prompt = ChatPromptTemplate.from_messages(msgs)
-    llm = ChatOpenAI(model=model, temperature=0)
+    llm = get_llm(model)
+    fetcher = Prefetcher(retriever)
 
     def run(domain: str, name: str):
-        try:
-            docs = retriever.invoke(f"{domain} {name} market size")
-        except Exception:
-            docs = retriever.get_relevant_documents(f"{domain} {name} market size")
-        ctx = "\n\n".join(d.page_content[:1000] for d in docs)
-        out = (prompt | llm).invoke({"domain": domain, "name": name, "ctx": ctx}).content
-        # Try parse JSON
-        parsed = None
-        try:
-            import json as _json
-
-            parsed = _json.loads(out)
-        except Exception:
-            try:
-                start, end = out.find("{"), out.rfind("}")
-                if start != -1 and end != -1:
-                    import json as _json
-
-                    parsed = _json.loads(out[start : end + 1])
-            except Exception:
-                parsed = None
+        docs = fetcher.get(f"{domain} {name} market size")
+        ctx = pack_docs(docs, "market", model=model)
+        out, parsed, _ = invoke_structured("market", prompt, llm, {"domain": domain, "name": name, "ctx": ctx})
         srcs = []
         snips = []
         for d in docs[:6]:
@@ -47,4 +33,14 @@ def market_chain(retriever, model: str = "gpt-4o-mini"):
             snips.append({"src": s or "", "text": d.page_content[:400]})
         return {"text": out, "json": parsed, "sources": list(dict.fromkeys([s for s in srcs if s])), "snippets": snips}
 
+    def prefetch(targets):
+        # Batch-retrieve context for [(domain, name), ...] ahead of run()
+        fetcher.prefetch([f"{domain} {name} market size" for domain, name in targets])
+
+    def release(targets):
+        # Drop prefetched context that was not consumed (end of the caller's run)
+        fetcher.discard([f"{domain} {name} market size" for domain, name in targets])
+
+    run.prefetch = prefetch
+    run.release = release
     return run
@@ -1,9 +1,9 @@
+import os
 from pathlib import Path
-from typing import Dict, Any
-
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
+from typing import Any, Callable, Dict, Optional
 
+from agents.llm import get_llm, invoke_chat
+from rag.context import context_budget, pack, packing_enabled
 from rag.prompts import report_template, project_readme_prompt
 
 
@@ -49,16 +49,26 @@ def write_report(
     return str(p)
 
 
-def compose_investment_brief(state: Dict[str, Any], model: str = "gpt-4o-mini") -> str:
+def compose_investment_brief(
+    state: Dict[str, Any],
+    model: str = "gpt-4o-mini",
+    on_token: Optional[Callable[[str], None]] = None,
+) -> str:
+    """LLM-written Markdown brief; `on_token` receives the text as it streams in."""
+    from langchain_core.prompts import ChatPromptTemplate
+
     # Build enumerated sources and snippets
     sources = list(dict.fromkeys(state.get("sources") or []))
     src_map = {s: i + 1 for i, s in enumerate(sources)}
-    snippets = state.get("snippets") or []
+    snippets = [(sn.get("src") or "", sn.get("text") or "") for sn in state.get("snippets") or []]
+    if packing_enabled():
+        # Dedupe snippets repeated across agents and fit them into the report token budget
+        snippets = pack(snippets, context_budget("report"), model).parts
+    else:
+        snippets = snippets[:12]
     snippet_block_lines = []
-    for idx, sn in enumerate(snippets[:12], start=1):
-        src = sn.get("src") or ""
+    for idx, (src, text) in enumerate(snippets, start=1):
         sid = src_map.get(src, idx)
-        text = (sn.get("text") or "")
         snippet_block_lines.append(f"<<<DOC id={sid} src=\"{src}\">>>{text}<<</DOC>>")
     snippet_block = "\n".join(snippet_block_lines)
 
@@ -245,8 +255,11 @@ ASSUMPTIONS: 최근 12~24개월 데이터 기준, 누락값은 '불명' 처리,
         sources_enumerated=sources_en,
     )
 
-    llm = ChatOpenAI(model=model, temperature=0)
-    return (tmpl | llm).invoke(
+    llm = get_llm(model)
+    return invoke_chat(
+        "report",
+        tmpl,
+        llm,
         {
             "context": context_block,
             "tech": state.get("tech") or "",
@@ -255,8 +268,9 @@ ASSUMPTIONS: 최근 12~24개월 데이터 기준, 누락값은 '불명' 처리,
             "outline": rendered_outline,
             "sources_enumerated": sources_en,
             "candidates_eval": candidates_eval,
-        }
-    ).content
+        },
+        on_token=on_token,
+    )
 
 
 def write_docx_report(
@@ -390,3 +404,29 @@ def write_text(path: str, content: str) -> str:
     p.parent.mkdir(parents=True, exist_ok=True)
     p.write_text(content, encoding="utf-8")
     return str(p)
+
+
+class IncrementalWriter:
+    """Appends streamed text to `path` and flushes each chunk, so the file can be tailed while it is written."""
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = self.path.open("w", encoding="utf-8")
+        self.chars = 0
+
+    def __call__(self, text: str) -> None:
+        self._f.write(text)
+        self._f.flush()
+        self.chars += len(text)
+
+    def close(self) -> str:
+        if not self._f.closed:
+            self._f.close()
+        return str(self.path)
+
+    def __enter__(self) -> "IncrementalWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,264 @@
+import json
+import os
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Literal, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError, field_validator
+
+from agents.jsonstream import SCHEMAS, Schema, invoke_json
+
+
+# Typed agent outputs. Field names follow the JSON specs in prompts/*.system.md and
+# DECISION_SYS_DEFAULT, so prompts and structured output ask for the same shape.
+
+
+class Startup(BaseModel):
+    name: str
+    country: str = ""
+    segment: str = ""
+    summary: str = ""
+    tech_highlight: str = ""
+    company_url: str = ""
+    source_url: str = ""
+
+
+class ScoutResult(BaseModel):
+    ai_startups: List[Startup]
+
+
+class TechSummary(BaseModel):
+    include: bool
+    is_ai: bool
+    company_name: str = ""
+    country: str = ""
+    segment: str = ""
+    summary: str = ""
+    tech_highlight: str = ""
+    source_url: str = ""
+
+
+class Score(BaseModel):
+    score: int = 0
+    reason: str = ""
+
+
+class MarketScores(BaseModel):
+    market: Score
+    product: Score
+    moat: Score
+    team: Score
+    traction: Score
+    regulatory: Score
+    risk: Score
+
+
+class MarketEval(BaseModel):
+    context: List[str]
+    position: List[str]
+    scores: MarketScores
+
+
+class CompRow(BaseModel):
+    criterion: str
+    values: List[str]
+
+
+class CompAnalysis(BaseModel):
+    summary: str
+    headers: List[str]
+    rows: List[CompRow]
+    diffs: List[str]
+    risks: List[str]
+    verdict: str
+
+
+class Decision(BaseModel):
+    score: int
+    verdict: Literal["recommend", "hold", "pass"]
+    rationale: str
+    missing: List[str] = []
+
+    @field_validator("verdict", mode="before")
+    @classmethod
+    def _lower(cls, v: Any) -> Any:
+        return v.strip().lower() if isinstance(v, str) else v
+
+
+class CandidateDecision(Decision):
+    name: str
+
+
+class DecisionBatch(BaseModel):
+    decisions: List[CandidateDecision]
+
+
+MODELS: Dict[str, Type[BaseModel]] = {
+    "scout": ScoutResult,
+    "tech": TechSummary,
+    "market": MarketEval,
+    "comp": CompAnalysis,
+    "decision": Decision,
+    "decision_batch": DecisionBatch,
+}
+
+
+def _strict(node: Any) -> None:
+    # OpenAI strict mode: every property required, no extra keys, no defaults/titles
+    if isinstance(node, list):
+        for x in node:
+            _strict(x)
+        return
+    if not isinstance(node, dict):
+        return
+    node.pop("title", None)
+    node.pop("default", None)
+    props = node.get("properties")
+    if isinstance(props, dict):
+        node["required"] = list(props)
+        node["additionalProperties"] = False
+    for key, value in node.items():
+        if key in ("properties", "$defs"):
+            for sub in value.values():
+                _strict(sub)
+        else:
+            _strict(value)
+
+
+def json_schema(model_cls: Type[BaseModel]) -> Dict[str, Any]:
+    schema = model_cls.model_json_schema()
+    _strict(schema)
+    return schema
+
+
+def structured_mode() -> str:
+    """STRUCTURED_OUTPUT: json_schema (default), json_object, or off (prompt-only JSON)."""
+    mode = os.getenv("STRUCTURED_OUTPUT", "json_schema").strip().lower()
+    return mode if mode in ("json_schema", "json_object") else "off"
+
+
+def response_format(model_cls: Type[BaseModel]) -> Optional[Dict[str, Any]]:
+    mode = structured_mode()
+    if mode == "json_schema":
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": model_cls.__name__, "schema": json_schema(model_cls), "strict": True},
+        }
+    if mode == "json_object":
+        return {"type": "json_object"}
+    return None
+
+
+def validate(model_cls: Type[BaseModel], value: Any) -> Tuple[Optional[BaseModel], Optional[str]]:
+    """(model, None) when `value` validates, else (None, a short error summary)."""
+    if value is None:
+        return None, "no JSON object in output"
+    try:
+        return model_cls.model_validate(value), None
+    except ValidationError as e:
+        errors = ["{}: {}".format(".".join(str(p) for p in err["loc"]) or "(root)", err["msg"]) for err in e.errors()]
+        return None, "; ".join(errors[:10])
+
+
+_REPAIR_PROMPT = None
+_REPAIR_LOCK = threading.Lock()
+# Broken outputs longer than this are cut before the repair call
+_REPAIR_MAX_CHARS = 6000
+
+
+def _repair_prompt():
+    global _REPAIR_PROMPT
+    if _REPAIR_PROMPT is None:
+        with _REPAIR_LOCK:
+            if _REPAIR_PROMPT is None:
+                from langchain_core.prompts import ChatPromptTemplate
+
+                _REPAIR_PROMPT = ChatPromptTemplate.from_messages(
+                    [
+                        (
+                            "system",
+                            "You repair JSON so that it validates against a JSON schema. Keep every value that "
+                            "is already valid, use empty strings/lists for missing fields, and output the JSON only.",
+                        ),
+                        ("human", "Schema:\n{schema}\n\nValidation errors:\n{errors}\n\nJSON to repair:\n{output}"),
+                    ]
+                )
+    return _REPAIR_PROMPT
+
+
+_STATS_LOCK = threading.Lock()
+_OUTCOMES: Dict[str, Counter] = {}
+
+
+def _count(agent: str, outcome: str) -> None:
+    with _STATS_LOCK:
+        _OUTCOMES.setdefault(agent, Counter())[outcome] += 1
+
+
+def invoke_structured(
+    agent: str,
+    prompt,
+    llm,
+    variables: Dict[str, Any],
+    model_cls: Optional[Type[BaseModel]] = None,
+    kind: Optional[str] = None,
+) -> Tuple[str, Any, Optional[BaseModel]]:
+    """Call an agent in structured-output mode and validate the answer with its Pydantic model.
+
+    Returns (text, value, model): `value` is the validated dict when validation
+    succeeds, otherwise the leniently parsed JSON (or None) as before. An answer that
+    fails validation gets one repair call that sees only the schema, the errors and
+    the broken output (no retrieval context), so it is much cheaper than a re-run.
+    `kind` selects the model/schema when one agent has several output shapes.
+    """
+    kind = kind or agent
+    model_cls = model_cls or MODELS[kind]
+    schema: Schema = SCHEMAS.get(kind) or Schema(kind)
+    fmt = response_format(model_cls)
+    text, value = invoke_json(agent, prompt, llm, variables, schema, response_format=fmt)
+    obj, errors = validate(model_cls, value)
+    if obj is not None:
+        _count(agent, "valid")
+        return text, obj.model_dump(), obj
+
+    repaired, rvalue = invoke_json(
+        agent,
+        _repair_prompt(),
+        llm,
+        {
+            "schema": json.dumps(json_schema(model_cls), ensure_ascii=False),
+            "errors": errors,
+            "output": text[:_REPAIR_MAX_CHARS],
+        },
+        schema,
+        retries=0,
+        response_format=fmt,
+    )
+    obj, _ = validate(model_cls, rvalue)
+    if obj is not None:
+        _count(agent, "repaired")
+        return repaired, obj.model_dump(), obj
+    _count(agent, "failed")
+    return text, value, None
+
+
+def structured_stats() -> Dict[str, Dict[str, Any]]:
+    """Per agent: answers valid on first pass, fixed by the repair call, still invalid, and the failure rate."""
+    with _STATS_LOCK:
+        items = {agent: dict(c) for agent, c in _OUTCOMES.items()}
+    out = {}
+    for agent, c in items.items():
+        total = sum(c.values())
+        out[agent] = {
+            "calls": total,
+            "valid": c.get("valid", 0),
+            "repaired": c.get("repaired", 0),
+            "failed": c.get("failed", 0),
+            "parse_failure_rate": round((c.get("repaired", 0) + c.get("failed", 0)) / total, 3) if total else 0.0,
+        }
+    return out
+
+
+def reset_structured_stats() -> None:
+    with _STATS_LOCK:
+        _OUTCOMES.clear()
@@ -1,12 +1,16 @@
-import json
 from typing import Dict
 
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-
+from agents.jsonstream import SCHEMAS, extract_list
+from agents.llm import get_llm
+from agents.schemas import invoke_structured
+from rag.context import pack_docs
 from rag.prompts import system_prompt, SCOUT_SYS_DEFAULT, config_text
 
-def _retrieve(retriever, query: str):
+def _retrieve(retriever, query: str, lexical_query: str | None = None):
+    # Hybrid retrievers take the keyword expansion on the BM25 side only
+    if lexical_query and hasattr(retriever, "search"):
+        return retriever.search(query, lexical_query=lexical_query)
+    query = lexical_query or query
     try:
         return retriever.invoke(query)
     except Exception:
@@ -14,23 +18,25 @@ def _retrieve(retriever, query: str):
 
 
 def scout_chain(retriever, model: str = "gpt-4o-mini"):
+    from langchain_core.prompts import ChatPromptTemplate
+
     sys_msg = system_prompt("startup_search", SCOUT_SYS_DEFAULT)
     cfg = config_text("startup_search")
     msgs = [("system", sys_msg)] + ([("system", f"Config:\n{cfg}")] if cfg else []) + [
         (
             "human",
-            "Domain={domain}\nQuery={query}\nContext:\n{ctx}\nReturn top 5 as JSON list.",
+            "Domain={domain}\nQuery={query}\nContext:\n{ctx}\nReturn the top 5 as JSON (ai_startups list).",
         )
     ]
     prompt = ChatPromptTemplate.from_messages(msgs)
-    llm = ChatOpenAI(model=model, temperature=0)
+    llm = get_llm(model)
 
     def run(domain: str, query: str) -> Dict:
-        # Strengthen retrieval with explicit unified keywords
+        # Strengthen retrieval with explicit unified keywords (lexical side when hybrid)
         composed = f"{domain} AI 인공지능 머신러닝 ML LLM 물류 유통 logistics 'supply chain' SCM {query}"
-        docs = _retrieve(retriever, composed)
-        ctx = "\n\n".join(d.page_content[:1000] for d in docs)
-        out = (prompt | llm).invoke({"domain": domain, "query": query, "ctx": ctx}).content
+        docs = _retrieve(retriever, f"{domain} {query}", lexical_query=composed)
+        ctx = pack_docs(docs, "scout", model=model)
+        out, data, result = invoke_structured("scout", prompt, llm, {"domain": domain, "query": query, "ctx": ctx})
 
         def _normalize_item(item):
             try:
@@ -54,31 +60,20 @@ def scout_chain(retriever, model: str = "gpt-4o-mini"):
                 pass
             return {"name": str(item).strip(), "tech": "", "url": ""}
 
-        def _extract_list(parsed):
-            if isinstance(parsed, list):
-                return parsed
-            if isinstance(parsed, dict):
-                for key in ["items", "results", "companies", "startups", "후보", "목록"]:
-                    val = parsed.get(key)
-                    if isinstance(val, list):
-                        return val
-            return []
-
-        data = []
-        try:
-            data = json.loads(out)
-        except Exception:
-            start, end = out.find("["), out.rfind("]")
-            if start != -1 and end != -1:
-                try:
-                    data = json.loads(out[start : end + 1])
-                except Exception:
-                    data = []
-
-        raw_list = _extract_list(data)
+        if result is not None:
+            # Validated ScoutResult: fields map directly, no key-alias guessing
+            raw_list = [
+                {
+                    "name": st.name.strip(),
+                    "tech": " ".join(t for t in (st.tech_highlight.strip(), st.summary.strip()) if t),
+                    "url": st.company_url or st.source_url,
+                }
+                for st in result.ai_startups
+            ]
+        else:
+            raw_list = [_normalize_item(item) for item in extract_list(data, SCHEMAS["scout"])]
         candidates = []
-        for item in raw_list:
-            cand = _normalize_item(item)
+        for cand in raw_list:
             if cand.get("name"):
                 candidates.append(cand)
             if len(candidates) >= 3:
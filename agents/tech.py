@@ -1,10 +1,13 @@
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-
+from agents.llm import get_llm
+from agents.schemas import invoke_structured
+from rag.context import pack_docs
 from rag.prompts import system_prompt, TECH_SYS_DEFAULT, config_text
+from rag.vector import Prefetcher
 
 
 def tech_chain(retriever, model: str = "gpt-4o-mini"):
+    from langchain_core.prompts import ChatPromptTemplate
+
     # System prompt can be replaced by prompts/tech_summary.system.md (JSON-only spec allowed)
     sys_msg = system_prompt("tech_summary", TECH_SYS_DEFAULT)
     cfg = config_text("tech_summary")
@@ -15,19 +18,13 @@ def tech_chain(retriever, model: str = "gpt-4o-mini"):
         ),
     ]
     prompt = ChatPromptTemplate.from_messages(msgs)
-    llm = ChatOpenAI(model=model, temperature=0)
+    llm = get_llm(model)
+    fetcher = Prefetcher(retriever)
 
     def run(name: str, query: str, tech_raw: str | None = None):
-        try:
-            docs = retriever.invoke(f"{name} {query}")
-        except Exception:
-            docs = retriever.get_relevant_documents(f"{name} {query}")
-        parts = []
-        if tech_raw:
-            parts.append(f"[DB] {tech_raw}")
-        parts.extend(d.page_content[:1000] for d in docs)
-        ctx = "\n\n".join(parts)
-        out = (prompt | llm).invoke({"name": name, "ctx": ctx}).content
+        docs = fetcher.get(f"{name} {query}")
+        ctx = pack_docs(docs, "tech", prefix=[("db", f"[DB] {tech_raw}")] if tech_raw else None, model=model)
+        out, _, _ = invoke_structured("tech", prompt, llm, {"name": name, "ctx": ctx})
         srcs = []
         snips = []
         for d in docs[:6]:
@@ -37,4 +34,14 @@ def tech_chain(retriever, model: str = "gpt-4o-mini"):
             snips.append({"src": s or "", "text": d.page_content[:400]})
         return {"text": out, "sources": list(dict.fromkeys([s for s in srcs if s])), "snippets": snips}
 
+    def prefetch(targets):
+        # Batch-retrieve context for [(name, query), ...] ahead of run()
+        fetcher.prefetch([f"{name} {query}" for name, query in targets])
+
+    def release(targets):
+        # Drop prefetched context that was not consumed (end of the caller's run)
+        fetcher.discard([f"{name} {query}" for name, query in targets])
+
+    run.prefetch = prefetch
+    run.release = release
     return run
@@ -0,0 +1,120 @@
+"""Recall@k / latency / memory for HNSW settings and quantized first-pass search.
+
+Vectors are read from an existing index; ground truth is brute-force L2 over the
+float vectors. HNSW configs are rebuilt in an in-memory Chroma collection, the
+quantized modes use rag.quant with exact re-ranking of the top-N.
+
+    python bench/ann.py --index .index/tech --queries 200 --k 10
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent.parent
+if str(BASE) not in sys.path:
+    sys.path.insert(0, str(BASE))
+
+
+def _load_vectors(index_dir: str, collection: str, page: int = 5000):
+    import chromadb
+
+    coll = chromadb.PersistentClient(path=index_dir).get_collection(collection)
+    ids, vecs, offset = [], [], 0
+    while True:
+        res = coll.get(include=["embeddings"], limit=page, offset=offset)
+        if not res.get("ids"):
+            break
+        ids.extend(res["ids"])
+        vecs.extend(res["embeddings"])
+        offset += len(res["ids"])
+    return ids, vecs
+
+
+def _recall(found, truth) -> float:
+    return len(set(found) & set(truth)) / max(1, len(truth))
+
+
+def _row(name, recalls, lat, nbytes) -> None:
+    lat = sorted(lat)
+    p95 = lat[int(0.95 * (len(lat) - 1))]
+    print(
+        f"{name:<34} recall={statistics.mean(recalls):.3f} "
+        f"p50={statistics.median(lat) * 1000:.2f}ms p95={p95 * 1000:.2f}ms mem={nbytes / 1e6:.1f}MB"
+    )
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--index", default=".index/tech")
+    p.add_argument("--collection", default="tech")
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--m", type=int, nargs="+", default=[16, 32])
+    p.add_argument("--ef-construction", type=int, nargs="+", default=[100, 200])
+    p.add_argument("--ef-search", type=int, nargs="+", default=[10, 50, 100])
+    p.add_argument("--top-n", type=int, nargs="+", default=[50, 100, 200])
+    args = p.parse_args()
+
+    import chromadb
+    import numpy as np
+
+    from rag.quant import QuantizedStore, rerank_exact
+    from rag.vector import hnsw_metadata
+
+    ids, vecs = _load_vectors(args.index, args.collection)
+    if not ids:
+        sys.exit(f"no vectors in {args.index}/{args.collection}")
+    x = np.asarray(vecs, dtype=np.float32)
+    rng = np.random.default_rng(0)
+    # Perturbed stored vectors stand in for queries so no embedding model is needed
+    picks = rng.choice(len(x), size=min(args.queries, len(x)), replace=False)
+    queries = x[picks] + rng.normal(0, 0.01, size=(len(picks), x.shape[1])).astype(np.float32)
+    truth = [[ids[i] for i in np.argsort(np.linalg.norm(x - q, axis=1))[: args.k]] for q in queries]
+    print(f"{len(ids)} vectors x {x.shape[1]} dims, {len(queries)} queries, k={args.k}")
+    _row("brute force (float32)", [1.0], [0.0], x.nbytes)
+
+    client = chromadb.EphemeralClient()
+    for m in args.m:
+        for efc in args.ef_construction:
+            name = f"bench_m{m}_efc{efc}"
+            hnsw = {"M": m, "ef_construction": efc}
+            coll = client.create_collection(name, metadata=hnsw_metadata(hnsw))
+            t0 = time.perf_counter()
+            for i in range(0, len(ids), 5000):
+                coll.add(ids=ids[i : i + 5000], embeddings=vecs[i : i + 5000])
+            build = time.perf_counter() - t0
+            # Graph links dominate HNSW memory on top of the raw vectors
+            nbytes = x.nbytes + len(ids) * m * 2 * 4
+            for ef in args.ef_search:
+                try:
+                    coll.modify(metadata={**hnsw_metadata(hnsw), "hnsw:search_ef": ef})
+                except Exception:
+                    print(f"  (this Chroma version cannot change ef_search; skipping ef={ef})")
+                    continue
+                recalls, lat = [], []
+                for q, t in zip(queries, truth):
+                    t1 = time.perf_counter()
+                    res = coll.query(query_embeddings=[q.tolist()], n_results=args.k)
+                    lat.append(time.perf_counter() - t1)
+                    recalls.append(_recall(res["ids"][0], t))
+                _row(f"hnsw M={m} efc={efc} ef={ef} ({build:.1f}s)", recalls, lat, nbytes)
+            client.delete_collection(name)
+
+    pos = {cid: i for i, cid in enumerate(ids)}
+    for mode in ("int8", "binary"):
+        store = QuantizedStore.build(mode, ids, x)
+        for top_n in args.top_n:
+            recalls, lat = [], []
+            for q, t in zip(queries, truth):
+                t1 = time.perf_counter()
+                cand = store.search(q, max(args.k, top_n))
+                found = rerank_exact(q, cand, x[[pos[c] for c in cand]], args.k)
+                lat.append(time.perf_counter() - t1)
+                recalls.append(_recall([c for c, _ in found], t))
+            _row(f"{mode} top_n={top_n} + exact rerank", recalls, lat, store.nbytes)
+
+
+if __name__ == "__main__":
+    main()
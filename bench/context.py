@@ -0,0 +1,49 @@
+"""Context tokens per agent prompt: blind character slicing vs. the token-budget packer.
+
+Retrieves the same documents each agent would and renders the context both ways
+(CONTEXT_PACKING=0 / 1) without calling the LLM. Token counts use tiktoken.
+End-to-end prompt tokens per run are printed by graph/app.py ("Prompt tokens:").
+
+    python bench/context.py --domain 물류 --query "라스트마일 배송" --names 팀프레시 메쉬코리아
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent.parent
+if str(BASE) not in sys.path:
+    sys.path.insert(0, str(BASE))
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--domain", default="물류")
+    p.add_argument("--query", default="신선식품 라스트마일 배송 자동화")
+    p.add_argument("--names", nargs="+", default=["StartupA", "StartupB", "StartupC"])
+    args = p.parse_args()
+
+    import graph.app as app
+    from rag.context import context_budget, count_tokens, pack_docs
+
+    jobs = [("scout", "scout", f"{args.domain} {args.query}")]
+    jobs += [("tech", "tech", f"{n} {args.query}") for n in args.names]
+    jobs += [("market", "market", f"{args.domain} {n} market size") for n in args.names]
+    jobs += [("comp", "comp", f"{args.domain} competitors " + " ".join(args.names))]
+
+    totals = {"legacy": 0, "packed": 0}
+    for agent, retriever_name, query in jobs:
+        docs = app.CTX.retriever(retriever_name).invoke(query)
+        row = {}
+        for label, flag in (("legacy", "0"), ("packed", "1")):
+            os.environ["CONTEXT_PACKING"] = flag
+            row[label] = count_tokens(pack_docs(docs, agent))
+            totals[label] += row[label]
+        print(f"{agent:<7} docs={len(docs)} budget={context_budget(agent)} legacy={row['legacy']} packed={row['packed']}  {query[:40]}")
+    saved = totals["legacy"] - totals["packed"]
+    print(f"total   legacy={totals['legacy']} packed={totals['packed']} saved={saved} "
+          f"({100 * saved / max(totals['legacy'], 1):.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
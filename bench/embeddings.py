@@ -0,0 +1,111 @@
+"""Embedding backend throughput and memory: PyTorch (hf) vs ONNX Runtime (fp32 / int8).
+
+Each backend runs in its own subprocess so load time and peak RSS are not mixed up.
+Reported: load seconds, passages/s, single-query latency, peak RSS, and the mean
+cosine similarity to the first backend's vectors (quality cost of quantization).
+
+    python bench/embeddings.py --n 512 --threads 4
+    EMBED_MODEL=intfloat/multilingual-e5-small python bench/embeddings.py
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent.parent
+if str(BASE) not in sys.path:
+    sys.path.insert(0, str(BASE))
+
+CONFIGS = {
+    "hf": {"EMBED_BACKEND": "hf"},
+    "onnx": {"EMBED_BACKEND": "onnx", "EMBED_QUANTIZE": "0"},
+    "onnx-int8": {"EMBED_BACKEND": "onnx", "EMBED_QUANTIZE": "1"},
+}
+
+_SAMPLES = [
+    "신선식품 라스트마일 배송을 위한 냉장 물류 자동화 스타트업이 시리즈 A 투자를 유치했다.",
+    "The company builds route optimization software for cold-chain delivery fleets in Seoul.",
+    "도심형 마이크로 풀필먼트 센터는 주문 후 30분 이내 배송을 목표로 한다.",
+    "Competitors include regional 3PL providers and in-house logistics teams of large retailers.",
+]
+
+
+def _texts(n: int):
+    return [f"{_SAMPLES[i % len(_SAMPLES)]} ({i})" for i in range(n)]
+
+
+def _run_one(name: str, n: int, out: str) -> None:
+    import numpy as np
+
+    from rag.embeddings import get_embedding
+
+    texts = _texts(n)
+    t0 = time.perf_counter()
+    emb = get_embedding()
+    load = time.perf_counter() - t0
+    emb.embed_documents(texts[:8])  # warm-up outside the timing
+    t0 = time.perf_counter()
+    vecs = emb.embed_documents(texts)
+    docs_s = n / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    for q in texts[:20]:
+        emb.embed_query(q)
+    query_ms = 1000 * (time.perf_counter() - t0) / 20
+    np.save(out, np.asarray(vecs, dtype=np.float32))
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    print(json.dumps({"backend": name, "load_s": round(load, 2), "docs_per_s": round(docs_s, 1),
+                      "query_ms": round(query_ms, 1), "peak_rss_mb": round(rss, 1)}))
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--backends", nargs="+", default=list(CONFIGS), choices=list(CONFIGS))
+    p.add_argument("--n", type=int, default=512)
+    p.add_argument("--threads", type=int, default=0)
+    p.add_argument("--batch-size", type=int, default=32)
+    p.add_argument("--one", help=argparse.SUPPRESS)
+    p.add_argument("--out", help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.one:
+        _run_one(args.one, args.n, args.out)
+        return
+
+    import numpy as np
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench_emb_"))
+    ref = None
+    for name in args.backends:
+        env = {
+            **os.environ,
+            **CONFIGS[name],
+            "EMBED_THREADS": str(args.threads),
+            "EMBED_ENCODE_BATCH_SIZE": str(args.batch_size),
+        }
+        out = tmp / f"{name}.npy"
+        proc = subprocess.run(
+            [sys.executable, __file__, "--one", name, "--n", str(args.n), "--out", str(out)],
+            cwd=str(BASE), env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"{name:<10} failed: {proc.stderr.strip().splitlines()[-1:]}")
+            continue
+        row = json.loads(proc.stdout.strip().splitlines()[-1])
+        vecs = np.load(out)
+        vecs /= np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)
+        if ref is None:
+            ref = vecs
+        row["cos_vs_ref"] = round(float((vecs * ref).sum(axis=1).mean()), 4)
+        print(
+            f"{name:<10} load={row['load_s']}s {row['docs_per_s']} passages/s "
+            f"query={row['query_ms']}ms rss={row['peak_rss_mb']}MB cos={row['cos_vs_ref']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Latency and recall of dense, BM25 and hybrid (RRF) retrieval over the data/ corpus.
+
+Queries are built from the chunks themselves: a window of words taken from a sampled
+chunk, which should retrieve that chunk. recall@k is the fraction of queries whose
+source chunk appears in the top k.
+
+    python bench/retrieval.py --samples 50 --k 5
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent.parent
+if str(BASE) not in sys.path:
+    sys.path.insert(0, str(BASE))
+
+
+def _queries(collection, samples: int, words: int, seed: int, where=None):
+    # Unified layout: sample only the benchmarked kind's chunks from the shared collection
+    res = collection.get(where=where, include=["documents"]) if where else collection.get(include=["documents"])
+    pairs = [(cid, doc) for cid, doc in zip(res["ids"], res["documents"]) if doc and len(doc.split()) > words]
+    rnd = random.Random(seed)
+    out = []
+    for cid, doc in rnd.sample(pairs, min(samples, len(pairs))):
+        toks = doc.split()
+        start = rnd.randrange(0, len(toks) - words)
+        out.append((cid, " ".join(toks[start : start + words])))
+    return out
+
+
+def _measure(fn, queries, k):
+    hits, lat = 0, []
+    for cid, q in queries:
+        t0 = time.perf_counter()
+        ids = fn(q, k)
+        lat.append(1000 * (time.perf_counter() - t0))
+        hits += cid in ids
+    return hits / max(len(queries), 1), statistics.median(lat) if lat else 0.0
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--samples", type=int, default=50)
+    p.add_argument("--words", type=int, default=8, help="Words per synthetic query")
+    p.add_argument("--k", type=int, default=5)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    import graph.app as app
+    from rag.lexical import reciprocal_rank_fusion
+    from rag.vector import HybridRetriever
+
+    for name, r in app.CTX.retrievers.items():
+        if not isinstance(r, HybridRetriever):
+            print(f"{name}: no BM25 index, skipped")
+            continue
+        queries = _queries(r.collection, args.samples, args.words, args.seed, where=r.where)
+        r.embedding.embed_query("warm up")
+
+        def dense(q, k):
+            return [cid for cid, _ in r.dense(q, k)]
+
+        def bm25(q, k):
+            return r.lexical(q, k)
+
+        def hybrid(q, k):
+            return reciprocal_rank_fusion([dense(q, r.fetch_k), bm25(q, r.fetch_k)], k=r.rrf_k)[:k]
+
+        print(f"== {name} ({len(queries)} queries, k={args.k})")
+        for label, fn in (("dense", dense), ("bm25", bm25), ("hybrid", hybrid)):
+            recall, p50 = _measure(fn, queries, args.k)
+            print(f"  {label:<7} recall@{args.k} {recall:5.2f}   p50 {p50:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
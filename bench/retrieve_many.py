@@ -0,0 +1,48 @@
+"""Per-query retrieval loop vs. retrieve_many() for 3, 10 and 50 candidates.
+
+Each round uses fresh query strings so the query-embedding cache cannot help
+either side; the comparison is one-at-a-time embedding + search against one
+batched forward pass + one Chroma query.
+
+    python bench/retrieve_many.py --collection tech
+"""
+import argparse
+import sys
+import time
+import uuid
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent.parent
+if str(BASE) not in sys.path:
+    sys.path.insert(0, str(BASE))
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--collection", default="tech")
+    p.add_argument("--sizes", type=int, nargs="+", default=[3, 10, 50])
+    p.add_argument("--query", default="신선식품 라스트마일 냉장 물류 자동화")
+    args = p.parse_args()
+
+    import graph.app as app
+    from rag.vector import retrieve_many
+
+    retriever = app.CTX.retriever(args.collection)
+    retrieve_many(retriever, ["warm up"])  # load the model outside the timings
+
+    for n in args.sizes:
+        tag = uuid.uuid4().hex[:6]
+        loop_q = [f"Startup{i}-{tag}a {args.query}" for i in range(n)]
+        batch_q = [f"Startup{i}-{tag}b {args.query}" for i in range(n)]
+        t0 = time.perf_counter()
+        for q in loop_q:
+            retriever.invoke(q)
+        t_loop = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        retrieve_many(retriever, batch_q)
+        t_batch = time.perf_counter() - t0
+        print(f"n={n:<3}  loop {t_loop:7.3f}s   retrieve_many {t_batch:7.3f}s   speedup x{t_loop / max(t_batch, 1e-9):.1f}")
+
+
+if __name__ == "__main__":
+    main()
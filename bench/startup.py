@@ -0,0 +1,48 @@
+"""Startup-time benchmark for graph/app.py.
+
+Measures a cold `import graph.app`, `app.py --help`, and then each lazy phase of
+AppContext (engine, retrievers/embedding load, chain construction, graph compile).
+
+    python bench/startup.py
+"""
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent.parent
+if str(BASE) not in sys.path:
+    sys.path.insert(0, str(BASE))
+
+
+def _wall(cmd: list[str]) -> float:
+    t0 = time.perf_counter()
+    subprocess.run(cmd, cwd=str(BASE), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    rows = [
+        ("cold import graph.app", _wall([sys.executable, "-c", "import graph.app"])),
+        ("app.py --help", _wall([sys.executable, str(BASE / "graph" / "app.py"), "--help"])),
+    ]
+
+    import graph.app as app
+
+    ctx = app.AppContext()
+    _ = ctx.engine
+    _ = ctx.retrievers
+    for agent in app.CHAIN_FACTORIES:
+        ctx.chain(agent)
+    t0 = time.perf_counter()
+    app.build_graph()
+    rows += [(f"ctx {k}", v) for k, v in ctx.timings.items()]
+    rows.append(("build_graph", time.perf_counter() - t0))
+
+    width = max(len(r[0]) for r in rows)
+    for name, sec in rows:
+        print(f"{name:<{width}}  {sec:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
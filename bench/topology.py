@@ -0,0 +1,114 @@
+"""End-to-end latency of the sequential vs. parallel graph topology with a stubbed LLM.
+
+Every LLM call sleeps for a fixed latency and returns canned output, retrievers are
+empty and the DB is disabled, so only graph shape and fan-out affect the timings.
+
+    python bench/topology.py --latency 0.5 --repeat 3
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BASE = Path(__file__).resolve().parent.parent
+if str(BASE) not in sys.path:
+    sys.path.insert(0, str(BASE))
+
+CANNED = {
+    "scout": json.dumps(
+        {
+            "ai_startups": [
+                {"name": f"Startup{i}", "segment": "물류", "summary": "AI 물류 자동화", "company_url": ""}
+                for i in range(3)
+            ]
+        },
+        ensure_ascii=False,
+    ),
+    "tech": json.dumps({"include": True, "is_ai": True, "summary": "AI 물류"}, ensure_ascii=False),
+    "market": json.dumps(
+        {
+            "context": [],
+            "position": [],
+            "scores": {
+                k: {"score": 3, "reason": "stub"}
+                for k in ("market", "product", "moat", "team", "traction", "regulatory", "risk")
+            },
+        }
+    ),
+    "comp": json.dumps({"summary": "", "headers": [], "rows": [], "diffs": [], "risks": [], "verdict": ""}),
+    "decision": json.dumps({"score": 50, "verdict": "pass", "rationale": "stub"}),
+}
+
+
+def _canned(agent: str, variables: dict) -> str:
+    if agent == "decision" and "candidates" in variables:
+        # Batched decision: one entry per "### <name>" block of the prompt
+        names = re.findall(r"^### (.+)$", variables["candidates"], flags=re.MULTILINE)
+        entry = json.loads(CANNED["decision"])
+        return json.dumps({"decisions": [{**entry, "name": n} for n in names]}, ensure_ascii=False)
+    return CANNED.get(agent, "")
+
+
+def _stub_llm(latency: float) -> None:
+    # Agents reach the model through agents.schemas -> agents.jsonstream -> agents.llm,
+    # so the shared invoke_chat is replaced where those modules look it up
+    import agents.competitor
+    import agents.decision
+    import agents.jsonstream
+    import agents.llm
+    import agents.market
+    import agents.scout
+    import agents.tech
+
+    def fake_invoke(agent, prompt, llm, variables, on_token=None, response_format=None):
+        time.sleep(latency)
+        text = _canned(agent, variables)
+        if on_token is not None:
+            on_token(text)
+        return text
+
+    agents.llm.invoke_chat = fake_invoke
+    agents.jsonstream.invoke_chat = fake_invoke
+    for mod in (agents.scout, agents.tech, agents.market, agents.competitor, agents.decision):
+        mod.get_llm = lambda *a, **k: None
+
+
+def run(latency: float, repeat: int) -> Dict[str, List[float]]:
+    """Seconds per graph run for the sequential and parallel topologies."""
+    os.environ.setdefault("OPENAI_API_KEY", "sk-bench-stub-key")
+    import graph.app as app
+
+    _stub_llm(latency)
+    app.CTX._retrievers = {}
+    app.CTX._engine = None
+
+    out: Dict[str, List[float]] = {}
+    for parallel in (False, True):
+        graph = app.build_graph(parallel=parallel)
+        times = []
+        for _ in range(repeat):
+            state = {"domain": "물류/유통", "query": "bench", "sources": [], "cand_idx": 0}
+            t0 = time.perf_counter()
+            graph.invoke(state, config={"recursion_limit": 50})
+            times.append(time.perf_counter() - t0)
+        out["parallel" if parallel else "sequential"] = times
+    return out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--latency", type=float, default=0.5, help="Seconds per stubbed LLM call")
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    for label, times in run(args.latency, args.repeat).items():
+        print(f"{label:<10}  median {statistics.median(times):7.3f}s  min {min(times):7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
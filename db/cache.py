@@ -0,0 +1,130 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class SqliteCache:
+    """Small on-disk key/value cache with TTL and size-bounded LRU eviction.
+
+    Keys are strings (callers hash their inputs), values are bytes. Safe to share
+    across threads; one connection is guarded by a lock. Entry count and total size
+    are kept in memory (seeded at open) so a write does not scan the table; they are
+    re-read every `resync_every` writes in case another process shares the file.
+    """
+
+    resync_every = 1000
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS kv (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS kv_accessed ON kv (accessed)")
+        self._count, self._bytes = self._totals()
+        self._writes = 0
+
+    def _totals(self) -> tuple:
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM kv").fetchone()
+        return int(count), int(total)
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created, size FROM kv WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+                self._count -= 1
+                self._bytes -= row[2]
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE kv SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return bytes(row[0])
+
+    def set(self, key: str, value: bytes) -> None:
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM kv WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), len(value), now, now),
+            )
+            if old is None:
+                self._count += 1
+            else:
+                self._bytes -= old[0]
+            self._bytes += len(value)
+            self._writes += 1
+            if self._writes % self.resync_every == 0:
+                self._count, self._bytes = self._totals()
+            self._evict()
+
+    def _evict(self) -> None:
+        if self.max_entries is None and self.max_bytes is None:
+            return
+        count, total = self._count, self._bytes
+        over_n = max(0, count - self.max_entries) if self.max_entries is not None else 0
+        over_b = max(0, total - self.max_bytes) if self.max_bytes is not None else 0
+        if not over_n and not over_b:
+            return
+        # Drop least recently used rows until both bounds hold
+        freed, dropped, victims = 0, 0, []
+        for key, size in self._conn.execute("SELECT key, size FROM kv ORDER BY accessed ASC"):
+            if dropped >= over_n and freed >= over_b:
+                break
+            victims.append((key,))
+            dropped += 1
+            freed += size
+        self._conn.executemany("DELETE FROM kv WHERE key = ?", victims)
+        self._count -= dropped
+        self._bytes -= freed
+        self.evictions += len(victims)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM kv")
+            self._count, self._bytes = 0, 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, total = self._totals()
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": count,
+            "bytes": total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
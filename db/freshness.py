@@ -0,0 +1,94 @@
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+# Agent -> startups column holding its analysis
+ANALYSIS_COLUMNS = {"tech": "tech_summary", "market": "market_eval", "comp": "competitor_analysis"}
+# Technology descriptions change slowly; market and competitor views go stale faster
+DEFAULT_MAX_AGE_HOURS = {"tech_summary": 24 * 7, "market_eval": 24, "competitor_analysis": 24}
+
+
+class FreshnessPolicy:
+    """Decides whether an analysis stored in `startups` can be reused instead of re-running the LLM.
+
+    A value is fresh when it is younger than the column's max age and its fingerprint
+    (hash of the source corpus manifest plus the analysis inputs) matches the current
+    one, so changed source documents invalidate it immediately.
+    """
+
+    def __init__(self, max_age_hours: Optional[Dict[str, float]] = None, enabled: bool = True) -> None:
+        self.max_age_hours = {**DEFAULT_MAX_AGE_HOURS, **(max_age_hours or {})}
+        self.enabled = enabled
+
+    @classmethod
+    def from_env(cls) -> "FreshnessPolicy":
+        """FRESHNESS=0 disables reuse; FRESH_MAX_AGE_HOURS_<COLUMN> (e.g. _MARKET_EVAL) sets max ages."""
+        enabled = os.getenv("FRESHNESS", "1").strip().lower() not in ("0", "false", "off", "no")
+        ages = {}
+        for column in DEFAULT_MAX_AGE_HOURS:
+            v = os.getenv(f"FRESH_MAX_AGE_HOURS_{column.upper()}")
+            if v:
+                ages[column] = float(v)
+        return cls(ages, enabled)
+
+    def stamp(
+        self,
+        column: str,
+        fingerprint: str,
+        now: Optional[datetime] = None,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Extra columns to write alongside a freshly computed `column`.
+
+        `context` holds the sources/snippets the analysis was grounded on; it is stored
+        as JSON so a reused analysis still contributes them to the report.
+        """
+        context = context or {}
+        ctx = {"sources": list(context.get("sources") or []), "snippets": list(context.get("snippets") or [])}
+        return {
+            f"{column}_at": now or datetime.utcnow(),
+            f"{column}_fp": fingerprint,
+            f"{column}_ctx": json.dumps(ctx, ensure_ascii=False, default=str),
+        }
+
+    def stored_context(self, row: Optional[Dict[str, Any]], column: str) -> Optional[Dict[str, Any]]:
+        """Sources/snippets stored with `column`, or None when absent (rows written before they were kept)."""
+        raw = (row or {}).get(f"{column}_ctx")
+        if not raw:
+            return None
+        try:
+            ctx = json.loads(raw)
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(ctx, dict):
+            return None
+        return {"sources": list(ctx.get("sources") or []), "snippets": list(ctx.get("snippets") or [])}
+
+    def fresh_value(
+        self,
+        row: Optional[Dict[str, Any]],
+        column: str,
+        fingerprint: str,
+        now: Optional[datetime] = None,
+    ) -> Optional[str]:
+        if not self.enabled or not row or not row.get(column):
+            return None
+        # Without its sources/snippets a reused analysis would silently drop them from the report
+        if self.stored_context(row, column) is None:
+            return None
+        if row.get(f"{column}_fp") != fingerprint:
+            return None
+        at = row.get(f"{column}_at")
+        if isinstance(at, str):
+            try:
+                at = datetime.fromisoformat(at)
+            except ValueError:
+                return None
+        if not isinstance(at, datetime):
+            return None
+        age_hours = ((now or datetime.utcnow()) - at.replace(tzinfo=None)).total_seconds() / 3600
+        if age_hours > self.max_age_hours.get(column, 0):
+            return None
+        return row[column]
@@ -1,6 +1,9 @@
 import os
-from typing import Optional, Dict, Any
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
 
 try:
     from sqlalchemy import create_engine, text
@@ -45,130 +48,426 @@ def _dsn_from_env() -> Optional[str]:
     return None
 
 
-def get_engine() -> Optional["Engine"]:
+def _pool_options(dsn: str) -> Dict[str, Any]:
+    # SQLite (local stand-in) uses its own pool; QueuePool options only apply to servers
+    if dsn.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": int(os.getenv("PG_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("PG_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("PG_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("PG_POOL_RECYCLE", "1800")),
+    }
+
+
+def get_engine(**pool_overrides: Any) -> Optional["Engine"]:
+    """Pooled engine for POSTGRES_DSN / POSTGRES_* (or DB_*), with the schema migrated.
+
+    Pool settings come from PG_POOL_SIZE / PG_MAX_OVERFLOW / PG_POOL_TIMEOUT /
+    PG_POOL_RECYCLE; keyword arguments override them. Migrations run here once per
+    process, so the data functions below never issue DDL.
+    """
     if create_engine is None:
         return None
     dsn = _dsn_from_env()
     if not dsn:
         return None
-    return create_engine(dsn, pool_pre_ping=True)
+    engine = create_engine(dsn, pool_pre_ping=True, **{**_pool_options(dsn), **pool_overrides})
+    migrate(engine)
+    return engine
 
 
-def ensure_schema(engine: "Engine") -> None:
-    if text is None:
-        return
-    with engine.begin() as conn:
-        conn.execute(
-            text(
-                """
-                CREATE TABLE IF NOT EXISTS invest_runs (
-                    id SERIAL PRIMARY KEY,
-                    ts TIMESTAMP NOT NULL,
-                    domain TEXT,
-                    query TEXT,
-                    target TEXT,
-                    verdict TEXT,
-                    score INT,
-                    rationale TEXT,
-                    report_path TEXT
-                );
-                """
-            )
-        )
+class AddColumn(NamedTuple):
+    """Migration step adding a column; skipped when the column already exists."""
 
-        # Per-startup info store
-        conn.execute(
-            text(
-                """
-                CREATE TABLE IF NOT EXISTS startups (
-                    id SERIAL PRIMARY KEY,
-                    created_at TIMESTAMP NOT NULL,
-                    updated_at TIMESTAMP NOT NULL,
-                    domain TEXT,
-                    query TEXT,
-                    name TEXT UNIQUE,
-                    tech_raw TEXT,
-                    tech_summary TEXT,
-                    market_eval TEXT,
-                    competitor_analysis TEXT,
-                    decision TEXT,
-                    score INT,
-                    rationale TEXT
-                );
-                """
-            )
-        )
+    table: str
+    column: str
+    type: str
 
-        # Optional: sources linked to startups
-        conn.execute(
-            text(
-                """
-                CREATE TABLE IF NOT EXISTS startup_sources (
-                    id SERIAL PRIMARY KEY,
-                    startup_name TEXT REFERENCES startups(name) ON DELETE CASCADE,
-                    source TEXT
-                );
-                """
+
+# Ordered schema migrations; each runs once per database, recorded in schema_version.
+# Steps are SQL strings ({pk} is the dialect's auto-increment primary key column type)
+# or AddColumn, which tolerates databases where the column was already added by hand.
+MIGRATIONS: List[Tuple[int, List[Union[str, AddColumn]]]] = [
+    (
+        1,
+        [
+            """
+            CREATE TABLE IF NOT EXISTS invest_runs (
+                id {pk},
+                ts TIMESTAMP NOT NULL,
+                domain TEXT,
+                query TEXT,
+                target TEXT,
+                verdict TEXT,
+                score INT,
+                rationale TEXT,
+                report_path TEXT
             )
-        )
-        # Ensure deduplication on (startup_name, source)
-        conn.execute(
-            text(
-                """
-                DO $$ BEGIN
-                    IF NOT EXISTS (
-                        SELECT 1 FROM pg_indexes WHERE indexname = 'startup_sources_uniq'
-                    ) THEN
-                        CREATE UNIQUE INDEX startup_sources_uniq ON startup_sources (startup_name, source);
-                    END IF;
-                END $$;
-                """
+            """,
+            # Per-startup info store
+            """
+            CREATE TABLE IF NOT EXISTS startups (
+                id {pk},
+                created_at TIMESTAMP NOT NULL,
+                updated_at TIMESTAMP NOT NULL,
+                domain TEXT,
+                query TEXT,
+                name TEXT UNIQUE,
+                tech_raw TEXT,
+                tech_summary TEXT,
+                market_eval TEXT,
+                competitor_analysis TEXT,
+                decision TEXT,
+                score INT,
+                rationale TEXT
             )
-        )
+            """,
+            # Optional: sources linked to startups
+            """
+            CREATE TABLE IF NOT EXISTS startup_sources (
+                id {pk},
+                startup_name TEXT REFERENCES startups(name) ON DELETE CASCADE,
+                source TEXT
+            )
+            """,
+            # Ensure deduplication on (startup_name, source)
+            "CREATE UNIQUE INDEX IF NOT EXISTS startup_sources_uniq ON startup_sources (startup_name, source)",
+        ],
+    ),
+    (
+        2,
+        [
+            # When each analysis was written and from which corpus/input (see db.freshness)
+            AddColumn("startups", "tech_summary_at", "TIMESTAMP"),
+            AddColumn("startups", "tech_summary_fp", "TEXT"),
+            AddColumn("startups", "market_eval_at", "TIMESTAMP"),
+            AddColumn("startups", "market_eval_fp", "TEXT"),
+            AddColumn("startups", "competitor_analysis_at", "TIMESTAMP"),
+            AddColumn("startups", "competitor_analysis_fp", "TEXT"),
+        ],
+    ),
+    (
+        3,
+        [
+            # Sources/snippets each analysis was grounded on, restored when it is reused
+            AddColumn("startups", "tech_summary_ctx", "TEXT"),
+            AddColumn("startups", "market_eval_ctx", "TEXT"),
+            AddColumn("startups", "competitor_analysis_ctx", "TEXT"),
+        ],
+    ),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Database URL -> migrated version, so each database is migrated once per process
+_MIGRATED: Dict[str, int] = {}
+_MIGRATE_LOCK = threading.Lock()
+
+
+def _migration_key(engine: "Engine") -> Optional[str]:
+    # In-memory SQLite URLs do not identify a database: every engine gets a new one
+    if engine.dialect.name == "sqlite" and engine.url.database in (None, "", ":memory:"):
+        return None
+    return engine.url.render_as_string(hide_password=False)
+
+
+def _apply(conn: Any, step: Union[str, AddColumn], pk: str) -> None:
+    if isinstance(step, str):
+        conn.execute(text(step.format(pk=pk)))
+        return
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(f"ALTER TABLE {step.table} ADD COLUMN IF NOT EXISTS {step.column} {step.type}"))
+        return
+    from sqlalchemy import inspect
+
+    existing = {c["name"] for c in inspect(conn).get_columns(step.table)}
+    if step.column not in existing:
+        conn.execute(text(f"ALTER TABLE {step.table} ADD COLUMN {step.column} {step.type}"))
+
+
+def migrate(engine: "Engine") -> int:
+    """Bring the database up to SCHEMA_VERSION; a no-op after the first call per database."""
+    if text is None:
+        return 0
+    key = _migration_key(engine)
+    if key in _MIGRATED:
+        return _MIGRATED[key]  # type: ignore[index]
+    with _MIGRATE_LOCK:
+        if key in _MIGRATED:
+            return _MIGRATED[key]  # type: ignore[index]
+        sqlite = engine.dialect.name == "sqlite"
+        pk = "INTEGER PRIMARY KEY AUTOINCREMENT" if sqlite else "SERIAL PRIMARY KEY"
+        with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                # Serialize concurrent migrators (several workers starting at once)
+                conn.execute(text("SELECT pg_advisory_xact_lock(724311)"))
+            conn.execute(
+                text("CREATE TABLE IF NOT EXISTS schema_version (version INT PRIMARY KEY, applied_at TIMESTAMP NOT NULL)")
+            )
+            current = conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+            for version, statements in MIGRATIONS:
+                if version <= current:
+                    continue
+                for step in statements:
+                    _apply(conn, step, pk)
+                conn.execute(
+                    text("INSERT INTO schema_version (version, applied_at) VALUES (:v, :ts)"),
+                    {"v": version, "ts": datetime.utcnow()},
+                )
+                current = version
+        if key is not None:
+            _MIGRATED[key] = current
+        return current
+
+
+def ensure_schema(engine: "Engine") -> None:
+    # Kept for existing callers; the schema is migrated once by get_engine()
+    migrate(engine)
+
+
+_LOG_RUN_SQL = """
+    INSERT INTO invest_runs (ts, domain, query, target, verdict, score, rationale, report_path)
+    VALUES (:ts, :domain, :query, :target, :verdict, :score, :rationale, :report_path)
+"""
+
+_UPSERT_STARTUP_SQL = """
+    INSERT INTO startups (created_at, updated_at, domain, query, name, tech_raw)
+    VALUES (:now, :now, :domain, :query, :name, :tech_raw)
+    ON CONFLICT (name) DO UPDATE SET
+        updated_at = EXCLUDED.updated_at,
+        domain = EXCLUDED.domain,
+        query = EXCLUDED.query,
+        tech_raw = COALESCE(EXCLUDED.tech_raw, startups.tech_raw)
+"""
+
+_ADD_SOURCE_SQL = """
+    INSERT INTO startup_sources (startup_name, source) VALUES (:name, :source)
+    ON CONFLICT (startup_name, source) DO NOTHING
+"""
+
+
+def _run_params(s: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "ts": datetime.utcnow(),
+        "domain": s.get("domain"),
+        "query": s.get("query"),
+        "target": s.get("target"),
+        "verdict": s.get("decision"),
+        "score": s.get("score"),
+        "rationale": s.get("rationale"),
+        "report_path": s.get("report_path"),
+    }
+
+
+def _update_sql(columns: Tuple[str, ...]) -> str:
+    sets = ", ".join(f"{k} = :{k}" for k in columns)
+    return f"UPDATE startups SET {sets}, updated_at = :updated_at WHERE name = :name"
+
 
+class UnitOfWork:
+    """Buffers every write of one pipeline run and commits them in a single transaction.
 
-def log_run(engine: Optional["Engine"], s: Dict[str, Any]) -> None:
+    Repeated writes are coalesced (column updates per startup are merged, sources are
+    de-duplicated) and sent with executemany on flush(). Reads through
+    get_startup_by_name() see the buffered values. Thread-safe, so parallel graph
+    branches can share one instance.
+    """
+
+    def __init__(self, engine: "Engine") -> None:
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._upserts: Dict[str, Dict[str, Any]] = {}
+        self._updates: Dict[str, Dict[str, Any]] = {}
+        self._sources: Dict[str, Dict[str, None]] = {}
+        self._runs: List[Dict[str, Any]] = []
+        # Batch taken by flush() but not committed yet; still visible to reads
+        self._inflight: Tuple[list, dict, dict, list] = ([], {}, {}, [])
+        self.buffered = 0
+        self.statements = 0
+
+    def _after_write(self) -> None:
+        # Hook for subclasses (e.g. write-behind scheduling); called outside the lock
+        pass
+
+    def __bool__(self) -> bool:
+        # Usable as a write target even while nothing is buffered
+        return True
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._upserts) + len(self._updates) + sum(map(len, self._sources.values())) + len(self._runs)
+
+    def upsert_startup(self, *, domain: str, query: str, name: str, tech_raw: Optional[str]) -> None:
+        with self._lock:
+            prev = self._upserts.get(name) or {}
+            self._upserts[name] = {
+                "now": datetime.utcnow(),
+                "domain": domain,
+                "query": query,
+                "name": name,
+                "tech_raw": tech_raw if tech_raw is not None else prev.get("tech_raw"),
+            }
+            self.buffered += 1
+        self._after_write()
+
+    def update_startup_columns(self, name: str, updates: Dict[str, Any]) -> None:
+        if not updates:
+            return
+        with self._lock:
+            self._updates.setdefault(name, {}).update(updates)
+            self.buffered += 1
+        self._after_write()
+
+    def add_startup_sources(self, name: str, sources: List[str]) -> None:
+        if not sources:
+            return
+        with self._lock:
+            self._sources.setdefault(name, {}).update(dict.fromkeys(sources))
+            self.buffered += 1
+        self._after_write()
+
+    def log_run(self, s: Dict[str, Any]) -> None:
+        with self._lock:
+            self._runs.append(_run_params(s))
+            self.buffered += 1
+        self._after_write()
+
+    def pending(self, name: str) -> Dict[str, Any]:
+        """Buffered column values for startup `name` (not yet committed)."""
+        with self._lock:
+            out: Dict[str, Any] = {}
+            inflight_upserts = {u["name"]: u for u in self._inflight[0]}
+            for upserts, updates in ((inflight_upserts, self._inflight[1]), (self._upserts, self._updates)):
+                up = upserts.get(name)
+                if up:
+                    out.update({k: up[k] for k in ("domain", "query", "name")})
+                    if up.get("tech_raw") is not None:
+                        out["tech_raw"] = up["tech_raw"]
+                out.update(updates.get(name) or {})
+            return out
+
+    def _take(self) -> Tuple[list, dict, dict, list]:
+        with self._lock:
+            batch = (list(self._upserts.values()), self._updates, self._sources, self._runs)
+            self._upserts, self._updates, self._sources, self._runs = {}, {}, {}, []
+            self._inflight = batch
+            return batch
+
+    def _settle(self) -> None:
+        with self._lock:
+            self._inflight = ([], {}, {}, [])
+
+    def _restore(self, batch: Tuple[list, dict, dict, list]) -> None:
+        """Put a batch whose commit failed back in front of newer writes (newer values win)."""
+        upserts, updates, sources, runs = batch
+        with self._lock:
+            for row in upserts:
+                newer = self._upserts.get(row["name"])
+                if newer is None:
+                    self._upserts[row["name"]] = row
+                elif newer.get("tech_raw") is None:
+                    newer["tech_raw"] = row.get("tech_raw")
+            for name, cols in updates.items():
+                self._updates[name] = {**cols, **self._updates.get(name, {})}
+            for name, srcs in sources.items():
+                self._sources[name] = {**srcs, **self._sources.get(name, {})}
+            self._runs = runs + self._runs
+            self._inflight = ([], {}, {}, [])
+
+    def discard(self) -> None:
+        self._take()
+        self._settle()
+
+    def flush(self) -> int:
+        """Commit all buffered writes in one transaction; returns the number of statements sent."""
+        if text is None:
+            return 0
+        batch = self._take()
+        try:
+            sent = self._commit(*batch)
+        except BaseException:
+            self._restore(batch)
+            raise
+        self._settle()
+        self.statements += sent
+        return sent
+
+    def _commit(self, upserts: list, updates: dict, sources: dict, runs: list) -> int:
+        now = datetime.utcnow()
+        by_columns: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for name, cols in updates.items():
+            by_columns.setdefault(tuple(sorted(cols)), []).append({**cols, "name": name, "updated_at": now})
+        source_rows = [{"name": n, "source": src} for n, srcs in sources.items() for src in srcs]
+        sent = 0
+        if not (upserts or by_columns or source_rows or runs):
+            return 0
+        with self.engine.begin() as conn:
+            # Parents first: sources reference startups(name)
+            if upserts:
+                conn.execute(text(_UPSERT_STARTUP_SQL), upserts)
+                sent += 1
+            for columns, rows in by_columns.items():
+                conn.execute(text(_update_sql(columns)), rows)
+                sent += 1
+            if source_rows:
+                conn.execute(text(_ADD_SOURCE_SQL), source_rows)
+                sent += 1
+            if runs:
+                conn.execute(text(_LOG_RUN_SQL), runs)
+                sent += 1
+        return sent
+
+
+Target = Union["Engine", UnitOfWork, None]
+
+_CURRENT: ContextVar[Optional[UnitOfWork]] = ContextVar("db_unit_of_work", default=None)
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def unit_of_work(engine: Optional["Engine"]) -> Iterator[Optional[UnitOfWork]]:
+    """Scope one run's writes: committed together on success, dropped on error.
+
+    The active unit of work is also visible through current_unit_of_work() in this
+    context (and in threads started with a copied context). Yields None without an engine.
+    """
+    if not engine:
+        yield None
+        return
+    uow = UnitOfWork(engine)
+    token = _CURRENT.set(uow)
+    try:
+        yield uow
+        uow.flush()
+    except BaseException:
+        uow.discard()
+        raise
+    finally:
+        _CURRENT.reset(token)
+
+
+def log_run(engine: Target, s: Dict[str, Any]) -> None:
+    if isinstance(engine, UnitOfWork):
+        engine.log_run(s)
+        return
     if not engine or text is None:
         return
-    ensure_schema(engine)
     with engine.begin() as conn:
-        conn.execute(
-            text(
-                """
-                INSERT INTO invest_runs (ts, domain, query, target, verdict, score, rationale, report_path)
-                VALUES (:ts, :domain, :query, :target, :verdict, :score, :rationale, :report_path)
-                """
-            ),
-            {
-                "ts": datetime.utcnow(),
-                "domain": s.get("domain"),
-                "query": s.get("query"),
-                "target": s.get("target"),
-                "verdict": s.get("decision"),
-                "score": s.get("score"),
-                "rationale": s.get("rationale"),
-                "report_path": s.get("report_path"),
-            },
-        )
+        conn.execute(text(_LOG_RUN_SQL), _run_params(s))
 
 
-def upsert_startup(engine: Optional["Engine"], *, domain: str, query: str, name: str, tech_raw: Optional[str]) -> None:
+def upsert_startup(engine: Target, *, domain: str, query: str, name: str, tech_raw: Optional[str]) -> None:
+    if isinstance(engine, UnitOfWork):
+        engine.upsert_startup(domain=domain, query=query, name=name, tech_raw=tech_raw)
+        return
     if not engine or text is None:
         return
-    ensure_schema(engine)
     with engine.begin() as conn:
         conn.execute(
-            text(
-                """
-                INSERT INTO startups (created_at, updated_at, domain, query, name, tech_raw)
-                VALUES (:now, :now, :domain, :query, :name, :tech_raw)
-                ON CONFLICT (name) DO UPDATE SET
-                    updated_at = EXCLUDED.updated_at,
-                    domain = EXCLUDED.domain,
-                    query = EXCLUDED.query,
-                    tech_raw = COALESCE(EXCLUDED.tech_raw, startups.tech_raw)
-                """
-            ),
+            text(_UPSERT_STARTUP_SQL),
             {
                 "now": datetime.utcnow(),
                 "domain": domain,
@@ -179,38 +478,37 @@ def upsert_startup(engine: Optional["Engine"], *, domain: str, query: str, name:
         )
 
 
-def update_startup_columns(engine: Optional["Engine"], name: str, updates: Dict[str, Any]) -> None:
+def update_startup_columns(engine: Target, name: str, updates: Dict[str, Any]) -> None:
+    if isinstance(engine, UnitOfWork):
+        engine.update_startup_columns(name, updates)
+        return
     if not engine or text is None or not updates:
         return
-    ensure_schema(engine)
-    sets = ", ".join(f"{k} = :{k}" for k in updates.keys())
     params = {**updates, "name": name, "updated_at": datetime.utcnow()}
     with engine.begin() as conn:
-        conn.execute(text(f"UPDATE startups SET {sets}, updated_at = :updated_at WHERE name = :name"), params)
+        conn.execute(text(_update_sql(tuple(updates.keys()))), params)
 
 
-def get_startup_by_name(engine: Optional["Engine"], name: str) -> Optional[Dict[str, Any]]:
+def get_startup_by_name(engine: Target, name: str) -> Optional[Dict[str, Any]]:
+    pending: Dict[str, Any] = {}
+    if isinstance(engine, UnitOfWork):
+        pending = engine.pending(name)
+        engine = engine.engine
     if not engine or text is None:
-        return None
-    ensure_schema(engine)
-    with engine.begin() as conn:
+        return pending or None
+    with engine.connect() as conn:
         row = conn.execute(text("SELECT * FROM startups WHERE name = :name"), {"name": name}).mappings().first()
-        return dict(row) if row else None
+    if not row and not pending:
+        return None
+    return {**(dict(row) if row else {}), **pending}
 
 
-def add_startup_sources(engine: Optional["Engine"], name: str, sources: list[str]) -> None:
+def add_startup_sources(engine: Target, name: str, sources: list[str]) -> None:
+    if isinstance(engine, UnitOfWork):
+        engine.add_startup_sources(name, sources)
+        return
     if not engine or text is None or not sources:
         return
-    ensure_schema(engine)
     with engine.begin() as conn:
         # Insert with ON CONFLICT DO NOTHING to deduplicate
-        values_clause = ",".join([f"(:name, :s{i})" for i in range(len(sources))])
-        params = {"name": name}
-        params.update({f"s{i}": src for i, src in enumerate(sources)})
-        conn.execute(
-            text(
-                f"INSERT INTO startup_sources (startup_name, source) VALUES {values_clause} "
-                "ON CONFLICT (startup_name, source) DO NOTHING"
-            ),
-            params,
-        )
+        conn.execute(text(_ADD_SOURCE_SQL), [{"name": name, "source": src} for src in dict.fromkeys(sources)])
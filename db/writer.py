@@ -0,0 +1,156 @@
+import atexit
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from db.postgres import UnitOfWork
+
+
+class WriteBehindWriter(UnitOfWork):
+    """Process-wide write-behind buffer: writes return immediately, a background thread commits.
+
+    Writes are coalesced exactly like a UnitOfWork and flushed every `interval` seconds
+    (or as soon as `batch_size` writes are buffered). Producers block once `max_pending`
+    items are waiting, so memory stays bounded when the database is slow. A failed
+    commit is retried with exponential backoff; after `retries` consecutive failures the
+    batch is parked in `dead` and reported. `drain()` waits until everything buffered so
+    far is committed; the buffer is also drained at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        engine: Any,
+        interval: float = 0.2,
+        batch_size: int = 200,
+        max_pending: int = 5000,
+        retries: int = 3,
+        backoff: float = 0.5,
+    ) -> None:
+        super().__init__(engine)
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+        self.max_pending = max(1, max_pending)
+        self.retries = retries
+        self.backoff = backoff
+        self.commits = 0
+        self.failures = 0
+        self.dead: List[Tuple[str, Tuple[list, dict, dict, list]]] = []
+        self._cond = threading.Condition()
+        self._since_flush = 0
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name="db-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _after_write(self) -> None:
+        with self._cond:
+            self._since_flush += 1
+            if self._since_flush >= self.batch_size:
+                self._cond.notify_all()
+            # Backpressure: wait for the writer thread instead of growing without bound
+            while not self._closed and len(self) >= self.max_pending:
+                self._cond.notify_all()
+                self._cond.wait(self.interval)
+
+    def _flush_with_retry(self) -> None:
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            batch = self._take()
+            try:
+                sent = self._commit(*batch)
+            except Exception as e:
+                self.failures += 1
+                if attempt == self.retries:
+                    self._settle()
+                    self.dead.append((f"{type(e).__name__}: {e}", batch))
+                    print(f"[db] write-behind batch dropped after {attempt + 1} attempts: {e}", file=sys.stderr)
+                    return
+                self._restore(batch)
+                time.sleep(delay)
+                delay *= 2
+                continue
+            self._settle()
+            self.statements += sent
+            if sent:
+                self.commits += 1
+            return
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed and self._since_flush < self.batch_size:
+                    self._cond.wait(self.interval)
+                if self._closed and not len(self):
+                    self._cond.notify_all()
+                    return
+                self._since_flush = 0
+                self._busy = True
+            try:
+                if len(self):
+                    self._flush_with_retry()
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def flush(self) -> int:
+        # Synchronous flush from a caller thread would race the writer; wait for it instead
+        self.drain()
+        return 0
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Block until all writes buffered before this call are committed (or parked as dead).
+
+        Returns False on timeout or if the writer thread is gone.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._since_flush = self.batch_size  # flush now, don't wait for the interval
+            self._cond.notify_all()
+            while len(self) or self._busy:
+                if not self._thread.is_alive():
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else self.interval)
+        return True
+
+    def close(self, timeout: Optional[float] = 30.0) -> bool:
+        """Drain and stop the writer thread (registered with atexit)."""
+        ok = self.drain(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return ok
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": self.buffered,
+            "pending": len(self),
+            "statements": self.statements,
+            "commits": self.commits,
+            "failures": self.failures,
+            "dead": len(self.dead),
+        }
+
+
+def write_behind_enabled() -> bool:
+    return os.getenv("DB_WRITE_MODE", "batch").strip().lower() == "async"
+
+
+def make_writer(engine: Any) -> Optional[WriteBehindWriter]:
+    """Writer configured from WRITE_BEHIND_INTERVAL / _BATCH_SIZE / _MAX_PENDING / _RETRIES."""
+    if not engine:
+        return None
+    return WriteBehindWriter(
+        engine,
+        interval=float(os.getenv("WRITE_BEHIND_INTERVAL", "0.2")),
+        batch_size=int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "200")),
+        max_pending=int(os.getenv("WRITE_BEHIND_MAX_PENDING", "5000")),
+        retries=int(os.getenv("WRITE_BEHIND_RETRIES", "3")),
+    )
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+import contextvars
+import hashlib
+import json
+import operator
 import os
 import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List, Literal, Optional, TypedDict
-
-from langgraph.graph import END, StateGraph
+from typing import Annotated, Any, Callable, Dict, List, Literal, Optional, TypedDict
 
 BASE = Path(__file__).resolve().parent.parent
 if str(BASE) not in sys.path:
@@ -41,8 +48,22 @@ def _normalize_openai_env():
 
 _normalize_openai_env()
 
-from rag.loaders import load_dir
-from rag.vector import as_retriever, build_index
+from rag.prompts import prompt_version
+from rag.rerank import rerank_stats
+from rag.vector import as_retriever, format_sync_report, query_cache_stats, sync_index
+from agents.jsonstream import json_stream_stats, parse_lenient, reset_json_stream_stats
+from agents.llm import (
+    DEFAULT_MODEL,
+    llm_cache_stats,
+    llm_call_stats,
+    max_concurrency,
+    prompt_token_stats,
+    reset_llm_stats,
+    set_llm_cache_enabled,
+    set_max_concurrency,
+    ttft_stats,
+)
+from agents.schemas import reset_structured_stats, structured_stats
 from agents.scout import scout_chain
 from agents.tech import tech_chain
 from agents.market import market_chain
@@ -55,13 +76,22 @@ from agents.report import (
     write_docx_report,
 )
 from db.postgres import (
+    current_unit_of_work,
     get_engine,
     log_run,
+    unit_of_work,
     upsert_startup,
     update_startup_columns,
     get_startup_by_name,
     add_startup_sources,
 )
+from db.freshness import ANALYSIS_COLUMNS, FreshnessPolicy
+from db.writer import make_writer, write_behind_enabled
+from graph.events import EventLog, instrument
+
+
+def _merge_dicts(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {**(left or {}), **(right or {})}
 
 
 class S(TypedDict, total=False):
@@ -75,17 +105,22 @@ class S(TypedDict, total=False):
     decision: Optional[Literal["recommend", "hold", "pass"]]
     score: Optional[int]
     rationale: Optional[str]
-    sources: List[str]
+    # Append reducers: parallel branches each contribute their own entries
+    sources: Annotated[List[str], operator.add]
     report_path: Optional[str]
     report_docx_path: Optional[str]
     candidates: Optional[List[dict]]
     cand_idx: Optional[int]
     loop_count: Optional[int]
-    snippets: Optional[List[dict]]
+    snippets: Annotated[List[dict], operator.add]
     market_struct: Optional[dict]
     comp_struct: Optional[dict]
     decisions: Optional[List[dict]]
     recommended: Optional[List[dict]]
+    # "<agent>:<candidate>" -> chain result; each analysis is computed once per run
+    analyses: Annotated[Dict[str, Any], _merge_dicts]
+    # Where n_report writes; set per item in batch mode so concurrent runs don't collide
+    output_dir: Optional[str]
 
 
 INDEX_DIR = BASE / ".index"
@@ -97,32 +132,151 @@ DATA_DIRS = {
 }
 
 
-def prepare():
-    INDEX_DIR.mkdir(exist_ok=True)
+def prepare(
+    index_dir: Path = INDEX_DIR,
+    data_dirs: Dict[str, Path] = DATA_DIRS,
+    reports: Optional[Dict[str, dict]] = None,
+):
+    """Sync every collection with its data directory and open retrievers.
+
+    Only added/changed files are embedded (see rag.vector.sync_index); per-collection
+    reports are stored in `reports` when given and printed when something changed.
+    INDEX_LAYOUT=unified keeps all corpora in one collection under .index/unified,
+    filtered by kind (convert existing indexes with `python -m rag.migrate`).
+    """
+    index_dir.mkdir(exist_ok=True)
+    unified = os.getenv("INDEX_LAYOUT", "split").strip().lower() == "unified"
     retrievers = {}
-    for name, d in DATA_DIRS.items():
-        idx_dir = INDEX_DIR / name
-        if not idx_dir.exists():
-            docs = load_dir(str(d))
-            build_index(docs, str(idx_dir))
-        if idx_dir.exists() and any(idx_dir.iterdir()):
-            retrievers[name] = as_retriever(str(idx_dir))
+    for name, d in data_dirs.items():
+        idx_dir = index_dir / ("unified" if unified else name)
+        kind = name if unified else None
+        report = sync_index(str(d), str(idx_dir), verbose=True, kind=kind)
+        if reports is not None:
+            reports[name] = report
+        if report["added"] or report["changed"] or report["removed"]:
+            print(format_sync_report(report))
+        if report["chunks_total"]:
+            retrievers[name] = as_retriever(str(idx_dir), kind=kind)
     return retrievers
 
 
-IDX = prepare()
-PG_ENGINE = get_engine()
-
-
 class _NullRetriever:
     def get_relevant_documents(self, *_args, **_kwargs):
         return []
 
 
+# agent name -> (factory, retriever name or None, prompt file stem)
+CHAIN_FACTORIES: Dict[str, tuple] = {
+    "scout": (scout_chain, "scout", "startup_search"),
+    "tech": (tech_chain, "tech", "tech_summary"),
+    "market": (market_chain, "market", "market_eval"),
+    "comp": (competitor_chain, "comp", "competitor_analysis"),
+    "decision": (decision_chain, None, "decision"),
+}
+
+_UNSET = object()
+
+
+class AppContext:
+    """Process resources built on first use: retrievers, agent chains and the DB engine.
+
+    Nothing heavy happens at import time, so `--help`/`--viz` stay fast. `timings`
+    records how long each phase took the first time it was needed.
+    """
+
+    def __init__(self, index_dir: Path = INDEX_DIR, data_dirs: Optional[Dict[str, Path]] = None):
+        self.index_dir = index_dir
+        self.data_dirs = data_dirs or DATA_DIRS
+        self.timings: Dict[str, float] = {}
+        self.index_reports: Dict[str, dict] = {}
+        self._retrievers: Optional[Dict[str, Any]] = None
+        self._engine: Any = _UNSET
+        self._writer: Any = _UNSET
+        self._chains: Dict[str, tuple] = {}
+        self._lock = threading.RLock()
+
+    def _timed(self, phase: str, fn: Callable[[], Any]) -> Any:
+        t0 = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            self.timings[phase] = round(self.timings.get(phase, 0.0) + time.perf_counter() - t0, 4)
+
+    @property
+    def retrievers(self) -> Dict[str, Any]:
+        if self._retrievers is None:
+            with self._lock:
+                if self._retrievers is None:
+                    self._retrievers = self._timed(
+                        "retrievers", lambda: prepare(self.index_dir, self.data_dirs, self.index_reports)
+                    )
+        return self._retrievers
+
+    def retriever(self, name: str):
+        return self.retrievers.get(name) or _NullRetriever()
+
+    @property
+    def engine(self):
+        if self._engine is _UNSET:
+            with self._lock:
+                if self._engine is _UNSET:
+                    self._engine = self._timed("engine", get_engine)
+        return self._engine
+
+    @property
+    def writer(self):
+        """Write-behind writer when DB_WRITE_MODE=async (and a DB is configured), else None."""
+        if self._writer is _UNSET:
+            with self._lock:
+                if self._writer is _UNSET:
+                    self._writer = make_writer(self.engine) if write_behind_enabled() else None
+        return self._writer
+
+    def chain(self, agent: str, model: str = DEFAULT_MODEL) -> Callable:
+        """Built chain for `agent`, cached by (agent, model, prompt file mtimes).
+
+        Editing a prompt/config file rebuilds the chain on next use; otherwise the
+        same prompt template and pooled LLM client are reused across calls and runs.
+        """
+        factory, idx_name, prompt_name = CHAIN_FACTORIES[agent]
+        key = (model, prompt_version(prompt_name))
+        hit = self._chains.get(agent)
+        if hit and hit[0] == key:
+            return hit[1]
+        with self._lock:
+            hit = self._chains.get(agent)
+            if hit and hit[0] == key:
+                return hit[1]
+            args = (self.retriever(idx_name),) if idx_name else ()
+            run = self._timed(f"chain:{agent}", lambda: factory(*args, model=model))
+            self._chains[agent] = (key, run)
+            return run
+
+
+CTX = AppContext()
+
+
+def __getattr__(name: str):
+    # Backwards compatible lazy aliases for the former module-level globals
+    if name == "IDX":
+        return CTX.retrievers
+    if name == "PG_ENGINE":
+        return CTX.engine
+    raise AttributeError(name)
+
+
+def _db():
+    # Writes of the current run go to its unit of work (one transaction at the end) or,
+    # with DB_WRITE_MODE=async, to the background writer; otherwise straight to the engine
+    return current_unit_of_work() or CTX.writer or CTX.engine
+
+
 def n_scout(s: S):
-    run = scout_chain(IDX.get("scout", _NullRetriever()))
+    run = CTX.chain("scout")
+    db = _db()
 
     # Use existing candidates if any
+    new_sources: List[str] = []
     cands = s.get("candidates") or []
     idx = s.get("cand_idx") if s.get("cand_idx") is not None else 0
     used_existing = False
@@ -185,125 +339,310 @@ def n_scout(s: S):
         else:
             s["target"] = s.get("target") or "TOP-1-STARTUP"
         if merged_sources:
-            s["sources"] = s.get("sources", []) + list(dict.fromkeys(merged_sources))  # type: ignore[arg-type]
+            new_sources = list(dict.fromkeys(merged_sources))
 
     # Persist to DB
-    if PG_ENGINE and s.get("target"):
+    if db and s.get("target"):
         upsert_startup(
-            PG_ENGINE,
+            db,
             domain=s.get("domain", ""),
             query=s.get("query", ""),
             name=s["target"],  # type: ignore[index]
             tech_raw=s.get("tech_raw"),
         )
-        if not used_existing and s.get("sources"):
+        all_sources = list(s.get("sources") or []) + new_sources
+        if not used_existing and all_sources:
             try:
-                add_startup_sources(PG_ENGINE, s["target"], list(dict.fromkeys(s["sources"]))[:10])  # type: ignore[arg-type]
+                add_startup_sources(db, s["target"], list(dict.fromkeys(all_sources))[:10])  # type: ignore[arg-type]
             except Exception:
                 pass
-    return s
+    # `sources` has an append reducer, so only the newly found ones are returned
+    return {
+        "candidates": s.get("candidates"),
+        "cand_idx": s.get("cand_idx"),
+        "target": s.get("target"),
+        "tech_raw": s.get("tech_raw"),
+        "sources": new_sources,
+    }
+
+
+def _analysis_key(agent: str, name: str) -> str:
+    return f"{agent}:{name}"
+
+
+def _comp_key(cands: List[Any]) -> str:
+    # Same normalization as competitor_chain: up to three candidate names
+    names = [str(c.get("name") if isinstance(c, dict) else c) for c in cands or []]
+    return _analysis_key("comp", "|".join([n for n in names if n and n != "None"][:3]))
+
+
+def _new_update() -> Dict[str, Any]:
+    # Partial state returned by a node; list/dict keys are combined by their reducers
+    return {"sources": [], "snippets": [], "analyses": {}}
+
+
+def _record(upd: Dict[str, Any], key: str, res: Any) -> Any:
+    upd["analyses"][key] = res
+    if isinstance(res, dict):
+        upd["sources"].extend(res.get("sources") or [])
+        upd["snippets"].extend(res.get("snippets") or [])
+    return res
+
+
+def _analyses(s: S, upd: Dict[str, Any]) -> Dict[str, Any]:
+    return {**(s.get("analyses") or {}), **upd["analyses"]}
+
+
+def _memoized(s: S, upd: Dict[str, Any], key: str, compute: Callable[[], Any]) -> Any:
+    """Return the analysis stored under `key`, computing (and recording) it once per run."""
+    analyses = _analyses(s, upd)
+    if key in analyses:
+        return analyses[key]
+    return _record(upd, key, compute())
+
+
+def _run_parallel(s: S, upd: Dict[str, Any], jobs: Dict[str, Callable[[], Any]]) -> None:
+    """Compute missing analyses concurrently (bounded by the LLM concurrency limit) and record them."""
+    done = _analyses(s, upd)
+    jobs = {k: fn for k, fn in jobs.items() if k not in done}
+    if not jobs:
+        return
+    workers = min(len(jobs), max_concurrency())
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis") as ex:
+        futures = {k: ex.submit(contextvars.copy_context().run, fn) for k, fn in jobs.items()}
+        # Record in submission order so sources/snippets stay deterministic
+        for k, fut in futures.items():
+            _record(upd, k, fut.result())
+
+
+FRESHNESS = FreshnessPolicy.from_env()
+
+
+def _fingerprint(agent: str, *inputs: Any) -> str:
+    # Corpus the agent retrieves from (manifest hash from sync_index) plus the analysis inputs
+    idx_name = CHAIN_FACTORIES[agent][1]
+    corpus = (CTX.index_reports.get(idx_name) or {}).get("fingerprint", "")
+    raw = "\0".join([corpus, *(str(x) for x in inputs)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _parse_json(text: Any) -> Optional[dict]:
+    # Same lenient parsing as the market/competitor chains' fallback
+    return parse_lenient(text)
+
+
+def _stored_analysis(agent: str, name: Optional[str], fp: str) -> Optional[dict]:
+    """A fresh analysis for `name` from the startups table, or None."""
+    db = _db()
+    if not FRESHNESS.enabled or not db or not name:
+        return None
+    column = ANALYSIS_COLUMNS[agent]
+    row = get_startup_by_name(db, name)
+    text = FRESHNESS.fresh_value(row, column, fp)
+    if text is None:
+        return None
+    res: Dict[str, Any] = {"text": text, "from_db": True, **(FRESHNESS.stored_context(row, column) or {})}
+    if agent in ("market", "comp"):
+        res["json"] = _parse_json(text)
+    return res
+
+
+def _fresh_or(agent: str, name: Optional[str], fp: str, compute: Callable[[], Any]) -> Any:
+    return _stored_analysis(agent, name, fp) or compute()
+
+
+def _persist_analysis(agent: str, name: Optional[str], fp: str, res: Any, text: Any = None) -> None:
+    """Store a newly computed analysis with its timestamp/fingerprint (reused ones are left as-is)."""
+    db = _db()
+    if not db or not name or (isinstance(res, dict) and res.get("from_db")):
+        return
+    column = ANALYSIS_COLUMNS[agent]
+    if text is None:
+        text = res.get("text") if isinstance(res, dict) else res
+    if not text:
+        return
+    context = res if isinstance(res, dict) else None
+    update_startup_columns(db, name, {column: text, **FRESHNESS.stamp(column, fp, context=context)})
+
+
+def served_from_db(state: Dict[str, Any]) -> int:
+    """Number of analyses in a run that were reused from the DB instead of calling the LLM."""
+    return sum(1 for v in (state.get("analyses") or {}).values() if isinstance(v, dict) and v.get("from_db"))
 
 
 def n_tech(s: S):
-    run = tech_chain(IDX.get("tech", _NullRetriever()))
-    if PG_ENGINE and s.get("target"):
-        rec = get_startup_by_name(PG_ENGINE, s["target"])  # type: ignore[arg-type]
+    run = CTX.chain("tech")
+    db = _db()
+    upd = _new_update()
+    tech_raw = s.get("tech_raw")
+    if db and s.get("target"):
+        rec = get_startup_by_name(db, s["target"])  # type: ignore[arg-type]
         if rec and rec.get("tech_raw"):
-            s["tech_raw"] = rec.get("tech_raw")
-    tech_res = run(s["target"], s["query"], s.get("tech_raw"))  # include DB tech_raw
-    s["tech"] = tech_res.get("text") if isinstance(tech_res, dict) else tech_res
+            tech_raw = rec.get("tech_raw")
+    key = _analysis_key("tech", s["target"])  # type: ignore[arg-type]
+    fp = _fingerprint("tech", s.get("target"), s.get("query"))
+    tech_res = _memoized(
+        s, upd, key, lambda: _fresh_or("tech", s.get("target"), fp, lambda: run(s["target"], s["query"], tech_raw))
+    )  # include DB tech_raw
+    tech = tech_res.get("text") if isinstance(tech_res, dict) else tech_res
+    if tech:
+        # Only real summaries are stored; the fallback below must not look fresh next run
+        _persist_analysis("tech", s.get("target"), fp, tech_res, tech)
     # Fallback: if tech is empty but we have tech_raw, synthesize minimal JSON-like summary
-    if not s.get("tech") and s.get("tech_raw"):
-        tr = s.get("tech_raw") or ""
-        s["tech"] = (
+    if not tech and tech_raw:
+        tr = tech_raw or ""
+        tech = (
             '{"include": true, "is_ai": true, "company_name": "' + str(s.get("target") or "") + '",'
             ' "country": "", "segment": "", "summary": "' + str(tr).replace('"', '\\"')[:350] + '",'
             ' "tech_highlight": "' + str(tr).split("\n")[0].replace('"', '\\"')[:120] + '", "source_url": ""}'
         )
-    # merge sources from retrieval
-    if isinstance(tech_res, dict) and tech_res.get("sources"):
-        s.setdefault("sources", []).extend(tech_res["sources"])  # type: ignore[index]
-    if isinstance(tech_res, dict) and tech_res.get("snippets"):
-        s.setdefault("snippets", []).extend(tech_res["snippets"])  # type: ignore[index]
-    if PG_ENGINE and s.get("target"):
-        update_startup_columns(PG_ENGINE, s["target"], {"tech_summary": s.get("tech")})  # type: ignore[arg-type]
-    s.setdefault("sources", []).append("tech")
-    return s
+        upd["analyses"][key] = {"text": tech}
+    upd["sources"].append("tech")
+    return {**upd, "tech": tech, "tech_raw": tech_raw}
 
 
 def n_market(s: S):
-    run = market_chain(IDX.get("market", _NullRetriever()))
-    market_res = run(s["domain"], s["target"])  # always callable
-    s["market"] = market_res.get("text") if isinstance(market_res, dict) else market_res
+    run = CTX.chain("market")
+    upd = _new_update()
+    key = _analysis_key("market", s["target"])  # type: ignore[arg-type]
+    fp = _fingerprint("market", s.get("domain"), s.get("target"))
+    market_res = _memoized(
+        s, upd, key, lambda: _fresh_or("market", s.get("target"), fp, lambda: run(s["domain"], s["target"]))
+    )  # always callable
+    upd["market"] = market_res.get("text") if isinstance(market_res, dict) else market_res
     if isinstance(market_res, dict) and market_res.get("json"):
-        s["market_struct"] = market_res["json"]
-    if isinstance(market_res, dict) and market_res.get("sources"):
-        s.setdefault("sources", []).extend(market_res["sources"])  # type: ignore[index]
-    if isinstance(market_res, dict) and market_res.get("snippets"):
-        s.setdefault("snippets", []).extend(market_res["snippets"])  # type: ignore[index]
-    if PG_ENGINE and s.get("target"):
-        update_startup_columns(PG_ENGINE, s["target"], {"market_eval": s.get("market")})  # type: ignore[arg-type]
-    s.setdefault("sources", []).append("market")
-    return s
+        upd["market_struct"] = market_res["json"]
+    _persist_analysis("market", s.get("target"), fp, market_res)
+    upd["sources"].append("market")
+    return upd
 
 
 def n_comp(s: S):
-    run = competitor_chain(IDX.get("comp", _NullRetriever()))
+    run = CTX.chain("comp")
+    upd = _new_update()
     cands = s.get("candidates") or ([s.get("target")] if s.get("target") else [])
-    comp_res = run(s["domain"], cands)  # always callable
-    s["comp"] = comp_res.get("text") if isinstance(comp_res, dict) else comp_res
+    comp_key = _comp_key(cands)
+    fp = _fingerprint("comp", s.get("domain"), comp_key)
+    comp_res = _memoized(
+        s, upd, comp_key, lambda: _fresh_or("comp", s.get("target"), fp, lambda: run(s["domain"], cands))
+    )  # always callable
+    upd["comp"] = comp_res.get("text") if isinstance(comp_res, dict) else comp_res
     if isinstance(comp_res, dict) and comp_res.get("json"):
-        s["comp_struct"] = comp_res["json"]
-    if isinstance(comp_res, dict) and comp_res.get("sources"):
-        s.setdefault("sources", []).extend(comp_res["sources"])  # type: ignore[index]
-    if isinstance(comp_res, dict) and comp_res.get("snippets"):
-        s.setdefault("snippets", []).extend(comp_res["snippets"])  # type: ignore[index]
-    if PG_ENGINE and s.get("target"):
-        update_startup_columns(PG_ENGINE, s["target"], {"competitor_analysis": s.get("comp")})  # type: ignore[arg-type]
-    s.setdefault("sources", []).append("competitors")
-    return s
+        upd["comp_struct"] = comp_res["json"]
+    _persist_analysis("comp", s.get("target"), fp, comp_res)
+    upd["sources"].append("competitors")
+    return upd
 
 
 def n_decision(s: S):
-    # Evaluate all candidates, not just the first target
-    t_chain = tech_chain(IDX.get("tech", _NullRetriever()))
-    m_chain = market_chain(IDX.get("market", _NullRetriever()))
-    c_chain = competitor_chain(IDX.get("comp", _NullRetriever()))
-    d_chain = decision_chain()
+    # Evaluate all candidates, not just the first target. Tech/market/comp results
+    # computed by earlier nodes (or earlier loop iterations) are reused from state;
+    # whatever is missing fans out concurrently, then decisions fan out per candidate.
+    t_chain = CTX.chain("tech")
+    m_chain = CTX.chain("market")
+    c_chain = CTX.chain("comp")
+    d_chain = CTX.chain("decision")
+    upd = _new_update()
 
     cands = s.get("candidates") or ([] if not s.get("target") else [{"name": s.get("target")}] )
-    results: List[dict] = []
-
+    domain = s.get("domain") or ""
+    query = s.get("query") or ""
+    names: List[tuple] = []
     for cand in cands[:3]:
         name = cand.get("name") if isinstance(cand, dict) else str(cand)
-        if not name:
-            continue
-        # Tech
-        tech_res = t_chain(name, s.get("query") or "", (cand.get("tech") if isinstance(cand, dict) else None))
-        tech_text = tech_res.get("text") if isinstance(tech_res, dict) else tech_res
-        if isinstance(tech_res, dict):
-            if tech_res.get("sources"):
-                s.setdefault("sources", []).extend(tech_res["sources"])  # type: ignore[index]
-            if tech_res.get("snippets"):
-                s.setdefault("snippets", []).extend(tech_res["snippets"])  # type: ignore[index]
-        # Market
-        market_res = m_chain(s.get("domain") or "", name)
-        market_text = market_res.get("text") if isinstance(market_res, dict) else market_res
-        if isinstance(market_res, dict):
-            if market_res.get("sources"):
-                s.setdefault("sources", []).extend(market_res["sources"])  # type: ignore[index]
-            if market_res.get("snippets"):
-                s.setdefault("snippets", []).extend(market_res["snippets"])  # type: ignore[index]
-        # Competitors use full candidate list
-        comp_res = c_chain(s.get("domain") or "", cands)
-        comp_text = comp_res.get("text") if isinstance(comp_res, dict) else comp_res
-        if isinstance(comp_res, dict):
-            if comp_res.get("sources"):
-                s.setdefault("sources", []).extend(comp_res["sources"])  # type: ignore[index]
-            if comp_res.get("snippets"):
-                s.setdefault("snippets", []).extend(comp_res["snippets"])  # type: ignore[index]
-        # Decision
-        out = d_chain(tech_text or "", market_text or "", comp_text or "")
+        if name:
+            names.append((name, cand.get("tech") if isinstance(cand, dict) else None))
+
+    def _text(res: Any) -> Any:
+        return res.get("text") if isinstance(res, dict) else res
+
+    # Analyses still fresh in the DB (same corpus and inputs) are reused instead of recomputed
+    done = _analyses(s, upd)
+    fps = {}
+    for name, _ in names:
+        fps[("tech", name)] = _fingerprint("tech", name, query)
+        fps[("market", name)] = _fingerprint("market", domain, name)
+        for agent in ("tech", "market"):
+            key = _analysis_key(agent, name)
+            if key not in done:
+                stored = _stored_analysis(agent, name, fps[(agent, name)])
+                if stored is not None:
+                    _record(upd, key, stored)
+    done = _analyses(s, upd)
+
+    # Retrieve context for every candidate still to analyze in one batched pass per collection
+    tech_targets = [(name, query) for name, _ in names if _analysis_key("tech", name) not in done]
+    market_targets = [(domain, name) for name, _ in names if _analysis_key("market", name) not in done]
+    t_chain.prefetch(tech_targets)
+    m_chain.prefetch(market_targets)
+
+    # Competitors use full candidate list, so one analysis serves every candidate
+    comp_key = _comp_key(cands)
+    comp_fp = _fingerprint("comp", domain, comp_key)
+    jobs: Dict[str, Callable[[], Any]] = {
+        comp_key: lambda: _fresh_or("comp", s.get("target"), comp_fp, lambda: c_chain(domain, cands))
+    }
+    for name, tech_raw in names:
+        jobs[_analysis_key("tech", name)] = partial(t_chain, name, query, tech_raw)
+        jobs[_analysis_key("market", name)] = partial(m_chain, domain, name)
+    new_keys = [k for k in jobs if k not in done]
+    try:
+        _run_parallel(s, upd, jobs)
+    finally:
+        # Prefetched context is scoped to this run; never leave it for another thesis
+        t_chain.release(tech_targets)
+        m_chain.release(market_targets)
+
+    # Persist what was computed here so later runs can reuse it for every candidate
+    db = _db()
+    analyses = _analyses(s, upd)
+    if db:
+        for name, tech_raw in names:
+            if _analysis_key("tech", name) in new_keys or _analysis_key("market", name) in new_keys:
+                upsert_startup(db, domain=domain, query=query, name=name, tech_raw=tech_raw)
+            for agent in ("tech", "market"):
+                if _analysis_key(agent, name) in new_keys:
+                    _persist_analysis(agent, name, fps[(agent, name)], analyses[_analysis_key(agent, name)])
+        if comp_key in new_keys:
+            _persist_analysis("comp", s.get("target"), comp_fp, analyses[comp_key])
+
+    analyses = _analyses(s, upd)
+    comp_text = _text(analyses[comp_key])
+    # All candidates share the competitor analysis: decide them in one call, then fall
+    # back to one call per candidate for any the batched answer did not cover
+    pending = [name for name, _ in names if _analysis_key("decision", name) not in analyses]
+    if len(pending) > 1:
+        batch = d_chain.run_many(
+            [
+                (
+                    name,
+                    _text(analyses[_analysis_key("tech", name)]) or "",
+                    _text(analyses[_analysis_key("market", name)]) or "",
+                )
+                for name in pending
+            ],
+            comp_text or "",
+        )
+        for name, out in batch.items():
+            _record(upd, _analysis_key("decision", name), out)
+    _run_parallel(
+        s,
+        upd,
+        {
+            _analysis_key("decision", name): partial(
+                d_chain,
+                _text(analyses[_analysis_key("tech", name)]) or "",
+                _text(analyses[_analysis_key("market", name)]) or "",
+                comp_text or "",
+            )
+            for name, _ in names
+        },
+    )
+
+    results: List[dict] = []
+    analyses = _analyses(s, upd)
+    for name, _ in names:
+        out = analyses[_analysis_key("decision", name)]
         rec = {
             "name": name,
             "score": out.get("score"),
@@ -313,28 +652,50 @@ def n_decision(s: S):
         results.append(rec)
 
     # Aggregate results
-    s["decisions"] = results
+    upd["decisions"] = results
     recommended = [r for r in results if str(r.get("verdict")).lower() == "recommend"]
-    s["recommended"] = recommended
+    upd["recommended"] = recommended
     # For graph branching, treat as recommend if any are recommended else pass
     if recommended:
-        s["decision"] = "recommend"
-        s["score"] = max((r.get("score") or 0) for r in recommended)
-        s["rationale"] = "; ".join([str(r.get("rationale") or "") for r in recommended])[:800]
+        upd["decision"] = "recommend"
+        upd["score"] = max((r.get("score") or 0) for r in recommended)
+        upd["rationale"] = "; ".join([str(r.get("rationale") or "") for r in recommended])[:800]
     else:
-        s["decision"] = "pass"
-        s["score"] = max((r.get("score") or 0) for r in results) if results else 0
-        s["rationale"] = "; ".join([str(r.get("rationale") or "") for r in results])[:800]
-    return s
+        upd["decision"] = "pass"
+        upd["score"] = max((r.get("score") or 0) for r in results) if results else 0
+        upd["rationale"] = "; ".join([str(r.get("rationale") or "") for r in results])[:800]
+    return upd
+
+
+def _stream_writer() -> Callable[[Any], None]:
+    """LangGraph "custom" stream writer of the running node (a no-op outside a graph run)."""
+    try:
+        from langgraph.config import get_stream_writer
+
+        return get_stream_writer()
+    except Exception:
+        return lambda _chunk: None
 
 
 def n_report(s: S):
+    out_dir = Path(s.get("output_dir") or BASE / "outputs")
     # Compose full report using LLM to better match requested outline
     try:
-        from agents.report import compose_investment_brief
+        from agents.report import IncrementalWriter, compose_investment_brief
+
+        emit = _stream_writer()
+        # The brief is streamed straight into the report file as tokens arrive, and to
+        # stream_mode="custom" consumers; a cached brief arrives there in one piece
+        with IncrementalWriter(str(out_dir / "investment_report.md")) as sink:
+
+            def on_token(text: str) -> None:
+                sink(text)
+                emit({"report_token": text})
 
-        md = compose_investment_brief(s)
-        s["report_path"] = write_text(str(BASE / "outputs" / "investment_report.md"), md)
+            md = compose_investment_brief(s, on_token=on_token)
+        if sink.chars != len(md):
+            write_text(str(out_dir / "investment_report.md"), md)
+        s["report_path"] = sink.close()
     except Exception:
         # Fallback to template formatter if compose fails
         s["report_path"] = write_report(
@@ -347,7 +708,7 @@ def n_report(s: S):
             actions="추가 레퍼런스/실사용 고객 MRR 증빙 요청",
             sources=list(dict.fromkeys(s.get("sources") or [])),
             candidates=s.get("candidates") or [],
-            path=str(BASE / "outputs" / "investment_report.md"),
+            path=str(out_dir / "investment_report.md"),
         )
     docx_path = write_docx_report(
         verdict=s.get("decision") or "hold",
@@ -358,32 +719,75 @@ def n_report(s: S):
         comp=s.get("comp") or "",
         actions="추가 레퍼런스/실사용 고객 MRR 증빙 요청",
         sources=s.get("sources") or [],
-        path=str(BASE / "outputs" / "investment_report.docx"),
+        path=str(out_dir / "investment_report.docx"),
     )
     if docx_path:
         s["report_docx_path"] = docx_path
     readme_md = generate_project_readme_md(s)
-    # Save to outputs and project root for presentation
-    write_text(str(BASE / "outputs" / "README.md"), readme_md)
-    write_text(str(BASE / "README.md"), readme_md)
-    log_run(PG_ENGINE, s)
-    return s
+    # Save to outputs and project root for presentation (the root copy only for single runs)
+    write_text(str(out_dir / "README.md"), readme_md)
+    if not s.get("output_dir"):
+        write_text(str(BASE / "README.md"), readme_md)
+    db = _db()
+    log_run(db, s)
+    if hasattr(db, "drain"):
+        # The run log is the durability point: wait for the write-behind queue
+        db.drain(float(os.getenv("WRITE_BEHIND_DRAIN_TIMEOUT", "30")))
+    return {"report_path": s.get("report_path"), "report_docx_path": s.get("report_docx_path")}
+
+
+def initial_state(domain: str, query: str, output_dir: Optional[str] = None) -> S:
+    state: S = {
+        "domain": domain,
+        "query": query,
+        "target": None,
+        "tech_raw": None,
+        "tech": None,
+        "market": None,
+        "comp": None,
+        "decision": None,
+        "score": None,
+        "rationale": None,
+        "sources": [],
+        "report_path": None,
+        "report_docx_path": None,
+        "candidates": None,
+        "cand_idx": 0,
+    }
+    if output_dir:
+        state["output_dir"] = output_dir
+    return state
+
 
+def build_state_graph(parallel: bool = True):
+    """Pipeline graph. With `parallel` (default) tech/market/competitor analyses run as
+    concurrent branches after scouting and join before the decision; otherwise they
+    run one after another (kept for comparison benchmarks)."""
+    from langgraph.graph import END, StateGraph
 
-def build_state_graph():
     g = StateGraph(S)
-    g.add_node("startup_search", n_scout)
-    g.add_node("tech_summary", n_tech)
-    g.add_node("market_eval", n_market)
-    g.add_node("competitor_analysis", n_comp)
-    g.add_node("investment_decision", n_decision)
-    g.add_node("report_writer", n_report)
+    # Nodes emit JSON-line events when config["configurable"]["events"] is set
+    for name, fn in (
+        ("startup_search", n_scout),
+        ("tech_summary", n_tech),
+        ("market_eval", n_market),
+        ("competitor_analysis", n_comp),
+        ("investment_decision", n_decision),
+        ("report_writer", n_report),
+    ):
+        g.add_node(name, instrument(name, fn))
 
     g.set_entry_point("startup_search")
-    g.add_edge("startup_search", "tech_summary")
-    g.add_edge("tech_summary", "market_eval")
-    g.add_edge("market_eval", "competitor_analysis")
-    g.add_edge("competitor_analysis", "investment_decision")
+    branches = ["tech_summary", "market_eval", "competitor_analysis"]
+    if parallel:
+        for b in branches:
+            g.add_edge("startup_search", b)
+        g.add_edge(branches, "investment_decision")
+    else:
+        g.add_edge("startup_search", "tech_summary")
+        g.add_edge("tech_summary", "market_eval")
+        g.add_edge("market_eval", "competitor_analysis")
+        g.add_edge("competitor_analysis", "investment_decision")
 
     def after_decision(s: S):
         v = (s.get("decision") or "").lower()
@@ -402,8 +806,8 @@ def build_state_graph():
     return g
 
 
-def build_graph():
-    return build_state_graph().compile()
+def build_graph(parallel: bool = True):
+    return build_state_graph(parallel).compile()
 
 
 def save_graph_png(path: Path) -> Optional[str]:
@@ -439,11 +843,28 @@ if __name__ == "__main__":
     p = argparse.ArgumentParser()
     p.add_argument("--domain", default="물류/유통")
     p.add_argument("--query", default="신선식품 라스트마일 냉장 물류 자동화")
-    p.add_argument("--stream", action="store_true", help="Stream LangGraph updates with tqdm progress")
+    p.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream LangGraph updates with tqdm progress and print the report as it is generated",
+    )
     p.add_argument("--trace", action="store_true", help="Enable LangSmith tracing")
     p.add_argument("--project", default="InvestAgent", help="LangSmith project name")
     p.add_argument("--viz", action="store_true", help="Save graph PNG to outputs/graph.png")
     p.add_argument("--openai-key", default=None, help="Override OPENAI_API_KEY for this run")
+    p.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=None,
+        help="Max in-flight LLM requests (default: LLM_MAX_CONCURRENCY or 4)",
+    )
+    p.add_argument("--no-llm-cache", action="store_true", help="Bypass the on-disk LLM response cache")
+    p.add_argument(
+        "--events",
+        default=None,
+        metavar="PATH",
+        help="Append per-node JSON-line events (timestamps, LLM calls, tokens, cache hits) to PATH ('-' = stdout)",
+    )
     args = p.parse_args()
 
     if args.trace:
@@ -453,24 +874,22 @@ if __name__ == "__main__":
     if args.openai_key:
         os.environ["OPENAI_API_KEY"] = args.openai_key
 
+    if args.max_concurrency:
+        set_max_concurrency(args.max_concurrency)
+
+    if args.no_llm_cache:
+        set_llm_cache_enabled(False)
+
     app = build_graph()
-    state: S = {
-        "domain": args.domain,
-        "query": args.query,
-        "target": None,
-        "tech_raw": None,
-        "tech": None,
-        "market": None,
-        "comp": None,
-        "decision": None,
-        "score": None,
-        "rationale": None,
-        "sources": [],
-        "report_path": None,
-        "report_docx_path": None,
-        "candidates": None,
-        "cand_idx": 0,
-    }
+    reset_llm_stats()
+    reset_json_stream_stats()
+    reset_structured_stats()
+    events = EventLog.open(args.events) if args.events else None
+    run_id = uuid.uuid4().hex[:12]
+    run_config: Dict[str, Any] = {"recursion_limit": 50, "configurable": {"events": events, "run_id": run_id}}
+    if events:
+        events.emit("run_start", run_id=run_id, domain=args.domain, query=args.query)
+    state = initial_state(args.domain, args.query)
 
     def _summarize_node(node_name: str, st: dict) -> str:
         try:
@@ -495,52 +914,97 @@ if __name__ == "__main__":
             pass
         return "-"
 
-    if args.stream:
-        try:
-            from tqdm import tqdm
-        except Exception:
-            tqdm = None  # type: ignore
-
-        # Initialize with expected nodes; will grow if loops occur
-        expected_nodes = 6
-        pbar = tqdm(total=expected_nodes, unit="node", desc="Pipeline", dynamic_ncols=True) if 'tqdm' in globals() and tqdm else None
-        final_state = None
-        for updates in app.stream(state, stream_mode="updates", config={"recursion_limit": 50}):
-            for node_name, delta in updates.items():
-                if node_name == "__end__":
-                    if isinstance(delta, dict) and "value" in delta:
-                        final_state = delta["value"]
-                    else:
-                        final_state = delta
+    # All DB writes of this run are buffered and committed in one transaction
+    with unit_of_work(CTX.engine if CTX.writer is None else None) as uow:
+        if args.stream:
+            try:
+                from tqdm import tqdm
+            except Exception:
+                tqdm = None  # type: ignore
+
+            # Initialize with expected nodes; will grow if loops occur
+            expected_nodes = 6
+            pbar = tqdm(total=expected_nodes, unit="node", desc="Pipeline", dynamic_ncols=True) if 'tqdm' in globals() and tqdm else None
+            # One pass: "updates" drives progress, the last "values" chunk is the final state,
+            # "custom" carries the report writer's tokens (also for a brief served from the LLM cache)
+            out: Dict[str, Any] = {}
+            t_run = time.perf_counter()
+            report_ttft: Optional[float] = None
+            for mode, chunk in app.stream(state, stream_mode=["updates", "values", "custom"], config=run_config):
+                if mode == "values":
+                    out = chunk
+                    continue
+                if mode == "custom":
+                    text = chunk.get("report_token") if isinstance(chunk, dict) else None
+                    if not text:
+                        continue
+                    if report_ttft is None:
+                        report_ttft = time.perf_counter() - t_run
+                        if pbar:
+                            pbar.clear()
+                        print("\n--- investment_report.md (streaming) ---", flush=True)
+                    sys.stdout.write(text)
+                    sys.stdout.flush()
                     continue
-                summary = _summarize_node(node_name, delta if isinstance(delta, dict) else {})
-                if pbar:
-                    pbar.update(1)
-                    # If loops push beyond initial total, extend
-                    if pbar.n > pbar.total:
-                        pbar.total = pbar.n
-                        pbar.refresh()
-                    pbar.set_postfix_str(f"{node_name} | {summary}")
-                else:
-                    print(f"[node] {node_name} :: {summary}")
-        if pbar:
-            pbar.close()
-        if isinstance(final_state, dict):
-            out = final_state
+                for node_name, delta in chunk.items():
+                    summary = _summarize_node(node_name, delta if isinstance(delta, dict) else {})
+                    if pbar:
+                        pbar.update(1)
+                        # If loops push beyond initial total, extend
+                        if pbar.n > pbar.total:
+                            pbar.total = pbar.n
+                            pbar.refresh()
+                        pbar.set_postfix_str(f"{node_name} | {summary}")
+                    else:
+                        print(f"[node] {node_name} :: {summary}")
+            if pbar:
+                pbar.close()
+            if report_ttft is not None:
+                print(f"\nReport first token after {report_ttft:.2f}s (run start)")
         else:
-            out = None
-            for val in app.stream(state, stream_mode="values", config={"recursion_limit": 50}):
-                out = val
-            if out is None:
-                out = {}
-    else:
-        out = app.invoke(state, config={"recursion_limit": 50})
+            out = app.invoke(state, config=run_config)
 
     if args.viz:
         png = save_graph_png(BASE / "outputs" / "graph.png")
         if png:
             print(f"Graph image saved: {png}")
 
+    if events:
+        events.emit(
+            "run_end",
+            run_id=run_id,
+            decision=out.get("decision"),
+            analyses_from_db=served_from_db(out),
+            ttft_ms=ttft_stats(),
+            structured=structured_stats(),
+            **llm_call_stats(),
+        )
+        events.close()
+
     print("Decision:", out.get("decision"))
+    print("LLM calls:", llm_call_stats())
+    print("Analyses served from DB:", served_from_db(out))
+    print("Prompt tokens:", prompt_token_stats())
+    ttft = ttft_stats()
+    if ttft:
+        print("Time to first token (ms):", ttft)
+    js = json_stream_stats()
+    if js["aborts"]:
+        print("JSON streaming (aborted + retried):", js)
+    so = structured_stats()
+    if so:
+        print("Structured output:", so, "attempts:", js["attempts"])
+    cache_stats = llm_cache_stats()
+    if cache_stats:
+        print("LLM cache:", cache_stats)
+    for qs in query_cache_stats():
+        print("Query embedding cache:", qs)
+    for rs in rerank_stats():
+        print("Rerank:", rs)
+    if uow is not None:
+        print("DB writes:", {"buffered": uow.buffered, "statements": uow.statements})
+    if CTX.writer is not None:
+        CTX.writer.drain()
+        print("DB writes (async):", CTX.writer.stats())
     if out.get("report_path"):
         print("Report:", out["report_path"])  # type: ignore[index]
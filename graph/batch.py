@@ -0,0 +1,214 @@
+"""Batch portfolio mode: evaluate many (domain, query) pairs in one process.
+
+Items share one compiled graph, one set of retrievers/embedding models, the DB engine
+and the LLM/query caches, so startup cost is paid once. Items run concurrently
+(--workers), each with its own output directory and DB unit of work. Progress is
+appended to <out>/results.jsonl; re-running the same command skips finished items.
+
+    python graph/batch.py theses.jsonl --workers 4 --timeout 900
+    python graph/batch.py theses.csv --out outputs/nightly --events outputs/nightly/events.jsonl
+
+Input rows need `domain` and `query`; an optional `id` names the output directory
+(default: a hash of domain and query).
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+BASE = Path(__file__).resolve().parent.parent
+if str(BASE) not in sys.path:
+    sys.path.insert(0, str(BASE))
+
+from agents.jsonstream import json_stream_stats
+from agents.llm import llm_call_stats, reset_llm_stats, set_llm_cache_enabled, set_max_concurrency
+from agents.schemas import structured_stats
+from db.postgres import unit_of_work
+from graph.app import CTX, build_graph, initial_state, served_from_db
+from graph.events import EventLog
+
+
+def load_items(path: str) -> List[Dict[str, str]]:
+    """Rows from a .jsonl or .csv file, each with domain, query and a stable id."""
+    p = Path(path)
+    if p.suffix.lower() == ".csv":
+        with p.open(encoding="utf-8-sig", newline="") as f:
+            rows: Iterable[Dict[str, Any]] = list(csv.DictReader(f))
+    else:
+        rows = [json.loads(line) for line in p.read_text(encoding="utf-8").splitlines() if line.strip()]
+    items = []
+    for row in rows:
+        domain = str(row.get("domain") or "").strip()
+        query = str(row.get("query") or "").strip()
+        if not query:
+            continue
+        item_id = str(row.get("id") or "").strip()
+        if not item_id:
+            item_id = hashlib.sha1(f"{domain}\0{query}".encode("utf-8")).hexdigest()[:12]
+        items.append({"id": item_id, "domain": domain, "query": query})
+    return items
+
+
+def _done_ids(results_path: Path, retry_failed: bool) -> set:
+    done = set()
+    if not results_path.exists():
+        return done
+    for line in results_path.read_text(encoding="utf-8").splitlines():
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            continue
+        if rec.get("status") == "ok" or not retry_failed:
+            done.add(rec.get("id"))
+    return done
+
+
+class BatchRunner:
+    """Runs items through one compiled graph with bounded parallelism and per-item timeouts."""
+
+    def __init__(
+        self,
+        out_dir: Path,
+        workers: int = 4,
+        timeout: Optional[float] = None,
+        events: Optional[EventLog] = None,
+    ) -> None:
+        self.out_dir = out_dir
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.events = events
+        self.results_path = out_dir / "results.jsonl"
+        self.app = build_graph()
+        self.abandoned = 0
+        self._lock = threading.Lock()
+
+    def _invoke(self, item: Dict[str, str], box: Dict[str, Any]) -> None:
+        try:
+            state = initial_state(item["domain"], item["query"], str(self.out_dir / item["id"]))
+            config = {"recursion_limit": 50, "configurable": {"events": self.events, "run_id": item["id"]}}
+            with unit_of_work(CTX.engine if CTX.writer is None else None):
+                box["out"] = self.app.invoke(state, config=config)
+        except BaseException as e:
+            box["error"] = f"{type(e).__name__}: {e}"
+
+    def run_item(self, item: Dict[str, str]) -> Dict[str, Any]:
+        # The graph runs on its own thread so a stuck item can be abandoned at the
+        # timeout; Python threads cannot be killed, so it finishes in the background.
+        t0 = time.perf_counter()
+        box: Dict[str, Any] = {}
+        th = threading.Thread(target=self._invoke, args=(item, box), name=f"batch-{item['id']}", daemon=True)
+        th.start()
+        th.join(self.timeout)
+        rec: Dict[str, Any] = {**item, "seconds": round(time.perf_counter() - t0, 3)}
+        if th.is_alive():
+            with self._lock:
+                self.abandoned += 1
+            rec.update(status="timeout", error=f"exceeded {self.timeout}s")
+        elif "error" in box:
+            rec.update(status="error", error=box["error"])
+        else:
+            out = box.get("out") or {}
+            rec.update(
+                status="ok",
+                decision=out.get("decision"),
+                score=out.get("score"),
+                target=out.get("target"),
+                report_path=out.get("report_path"),
+                from_db=served_from_db(out),
+            )
+        self._record(rec)
+        return rec
+
+    def _record(self, rec: Dict[str, Any]) -> None:
+        line = json.dumps(rec, ensure_ascii=False, default=str)
+        with self._lock:
+            with self.results_path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def run(self, items: List[Dict[str, str]], verbose: bool = True) -> List[Dict[str, Any]]:
+        results = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as ex:
+            futures = [ex.submit(self.run_item, item) for item in items]
+            for n, fut in enumerate(as_completed(futures), start=1):
+                rec = fut.result()
+                results.append(rec)
+                if verbose:
+                    print(f"[{n}/{len(items)}] {rec['id']} {rec['status']} {rec['seconds']}s {rec.get('decision') or rec.get('error') or ''}")
+        return results
+
+
+def summarize(results: List[Dict[str, Any]], wall: float, skipped: int, abandoned: int) -> Dict[str, Any]:
+    lat = sorted(r["seconds"] for r in results if r["status"] == "ok")
+    by_status: Dict[str, int] = {}
+    for r in results:
+        by_status[r["status"]] = by_status.get(r["status"], 0) + 1
+    return {
+        "items": len(results),
+        "skipped_done": skipped,
+        **by_status,
+        "abandoned_threads": abandoned,
+        "analyses_from_db": sum(r.get("from_db") or 0 for r in results),
+        "wall_seconds": round(wall, 2),
+        "throughput_per_min": round(60 * len(results) / wall, 2) if wall > 0 else 0.0,
+        "latency_p50": round(statistics.median(lat), 2) if lat else None,
+        "latency_p95": round(lat[int(0.95 * (len(lat) - 1))], 2) if lat else None,
+        "latency_max": round(lat[-1], 2) if lat else None,
+        "llm": llm_call_stats(),
+        "structured_output": structured_stats(),
+        "llm_attempts": json_stream_stats()["attempts"],
+        "startup": dict(CTX.timings),
+    }
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("input", help="JSONL or CSV with domain, query (and optional id) per row")
+    p.add_argument("--out", default=str(BASE / "outputs" / "batch"), help="Output directory (results.jsonl, per-item reports)")
+    p.add_argument("--workers", type=int, default=4, help="Items evaluated concurrently")
+    p.add_argument("--timeout", type=float, default=None, help="Per-item timeout in seconds")
+    p.add_argument("--retry-failed", action="store_true", help="Re-run items whose last result was an error/timeout")
+    p.add_argument("--max-concurrency", type=int, default=None, help="Max in-flight LLM requests across all items")
+    p.add_argument("--no-llm-cache", action="store_true", help="Bypass the on-disk LLM response cache")
+    p.add_argument("--events", default=None, metavar="PATH", help="Append per-node JSON-line events to PATH ('-' = stdout)")
+    args = p.parse_args()
+
+    if args.max_concurrency:
+        set_max_concurrency(args.max_concurrency)
+    if args.no_llm_cache:
+        set_llm_cache_enabled(False)
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    items = load_items(args.input)
+    done = _done_ids(out_dir / "results.jsonl", args.retry_failed)
+    todo = [it for it in dict((it["id"], it) for it in items).values() if it["id"] not in done]
+    print(f"{len(items)} items, {len(items) - len(todo)} already done, {len(todo)} to run")
+
+    # Pay startup once, before workers race for it (reported separately as "startup")
+    _ = CTX.retrievers, CTX.engine, CTX.writer
+    events = EventLog.open(args.events) if args.events else None
+    runner = BatchRunner(out_dir, args.workers, args.timeout, events)
+    reset_llm_stats()
+    t0 = time.perf_counter()
+    results = runner.run(todo)
+    if CTX.writer is not None:
+        CTX.writer.drain()
+    summary = summarize(results, time.perf_counter() - t0, len(items) - len(todo), runner.abandoned)
+    if events:
+        events.emit("batch_end", **summary)
+        events.close()
+    (out_dir / "summary.json").write_text(json.dumps(summary, ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+    print("Summary:", json.dumps(summary, ensure_ascii=False, default=str))
+
+
+if __name__ == "__main__":
+    main()
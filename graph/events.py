@@ -0,0 +1,96 @@
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, TextIO
+
+from agents.jsonstream import listen_fields
+from agents.llm import track_calls
+
+
+class EventLog:
+    """Thread-safe JSON-lines sink for structured pipeline events (one object per line)."""
+
+    def __init__(self, stream: TextIO, owned: bool = False) -> None:
+        self.stream = stream
+        self.owned = owned
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: str) -> "EventLog":
+        if path == "-":
+            return cls(sys.stdout)
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        return cls(p.open("a", encoding="utf-8"), owned=True)
+
+    def emit(self, event: str, **fields: Any) -> None:
+        line = json.dumps({"ts": round(time.time(), 6), "event": event, **fields}, ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def close(self) -> None:
+        if self.owned:
+            self.stream.close()
+
+
+def _preview(value: Any) -> Any:
+    if isinstance(value, str):
+        return value[:200]
+    if isinstance(value, (list, dict)):
+        return {"type": type(value).__name__, "len": len(value)}
+    return value
+
+
+def instrument(node: str, fn: Callable[[Dict[str, Any]], Any]) -> Callable[..., Any]:
+    """Wrap a graph node so it emits node_start/node_end events.
+
+    The sink and run id come from config["configurable"] ("events", "run_id"); without a
+    sink the node runs unchanged. node_end carries start/end timestamps, duration, status
+    and the LLM calls, cache hits and tokens spent inside the node (including its threads).
+    Top-level fields of JSON answers are emitted as partial_field events as soon as they
+    are parsed from the token stream (e.g. a decision's verdict before its rationale).
+    """
+
+    def wrapped(s, config: Optional[Dict[str, Any]] = None):
+        cfg = (config or {}).get("configurable") or {}
+        log: Optional[EventLog] = cfg.get("events")
+        if log is None:
+            return fn(s)
+        run_id = cfg.get("run_id")
+        start = time.time()
+        log.emit("node_start", run_id=run_id, node=node, start=start)
+        status, error = "ok", None
+
+        def on_field(agent: str, key: Any, value: Any) -> None:
+            log.emit("partial_field", run_id=run_id, node=node, agent=agent, key=key, value=_preview(value))
+
+        with track_calls() as scope, listen_fields(on_field):
+            try:
+                return fn(s)
+            except Exception as e:
+                status, error = "error", f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                end = time.time()
+                fields = {"error": error} if error else {}
+                log.emit(
+                    "node_end",
+                    run_id=run_id,
+                    node=node,
+                    start=start,
+                    end=end,
+                    duration_ms=round(1000 * (end - start), 1),
+                    status=status,
+                    **scope.as_dict(),
+                    **fields,
+                )
+
+    # Not functools.wraps: its __wrapped__ would make LangGraph read fn's signature
+    # (no `config` parameter) and never pass the config carrying the event sink
+    wrapped.__name__ = getattr(fn, "__name__", node)
+    wrapped.__qualname__ = getattr(fn, "__qualname__", node)
+    wrapped.__doc__ = fn.__doc__
+    return wrapped
@@ -0,0 +1,151 @@
+import os
+from functools import lru_cache
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple
+
+
+# Per-agent context budgets in tokens; override with CONTEXT_TOKENS_<AGENT> (e.g. CONTEXT_TOKENS_TECH)
+DEFAULT_BUDGETS = {"scout": 1500, "tech": 1200, "market": 1200, "comp": 1500, "report": 2000}
+# Character caps of the previous blind slicing, used when CONTEXT_PACKING=0
+LEGACY_CHARS = {"scout": 1000, "tech": 1000, "market": 1000, "comp": 1200, "report": 400}
+
+_MIN_OVERLAP = 40
+_MIN_TAIL_TOKENS = 48
+
+
+@lru_cache(maxsize=8)
+def _encoder(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Token count with the model's local tokenizer (tiktoken); ~3 chars/token without it."""
+    enc = _encoder(model)
+    if enc is None:
+        return (len(text) + 2) // 3
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, limit: int, model: str = "gpt-4o-mini") -> str:
+    enc = _encoder(model)
+    if enc is None:
+        return text[: limit * 3]
+    ids = enc.encode(text, disallowed_special=())
+    return text if len(ids) <= limit else enc.decode(ids[:limit])
+
+
+def packing_enabled() -> bool:
+    return os.getenv("CONTEXT_PACKING", "1").strip().lower() not in ("0", "false", "off", "no")
+
+
+def context_budget(agent: str) -> int:
+    return int(os.getenv(f"CONTEXT_TOKENS_{agent.upper()}", str(DEFAULT_BUDGETS.get(agent, 1500))))
+
+
+def _norm(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _trim_overlap(kept: str, new: str) -> str:
+    """Drop the part of `new` that repeats the start or end of `kept` (splitter chunk_overlap)."""
+    head = new[:_MIN_OVERLAP]
+    if len(head) == _MIN_OVERLAP:
+        # kept's tail == new's head: adjacent chunk following a kept one
+        p = kept.find(head, max(0, len(kept) - 4 * len(new)))
+        while p != -1:
+            if new.startswith(kept[p:]):
+                return new[len(kept) - p :]
+            p = kept.find(head, p + 1)
+    tail = new[-_MIN_OVERLAP:]
+    if len(tail) == _MIN_OVERLAP:
+        # new's tail == kept's head: adjacent chunk preceding a kept one
+        p = kept.rfind(tail, 0, len(new))
+        while p != -1:
+            end = p + _MIN_OVERLAP
+            if new.endswith(kept[:end]):
+                return new[: len(new) - end]
+            p = kept.rfind(tail, 0, p + _MIN_OVERLAP - 1)
+    return new
+
+
+class PackedContext(NamedTuple):
+    parts: List[Tuple[str, str]]  # (source, text) in relevance order
+    tokens: int
+    deduped: int
+    dropped: int
+
+
+def pack(
+    items: Sequence[Tuple[str, str]],
+    budget: int,
+    model: str = "gpt-4o-mini",
+    sep: str = "\n\n",
+) -> PackedContext:
+    """Fit (source, text) items, most relevant first, into `budget` tokens.
+
+    Exact and contained duplicates are skipped and text repeated from an overlapping
+    chunk of the same source is trimmed. The first item that does not fit is cut at a
+    token boundary if enough room is left; everything after it is dropped.
+    """
+    parts: List[Tuple[str, str]] = []
+    seen: List[str] = []
+    used = 0
+    deduped = 0
+    sep_tokens = count_tokens(sep, model)
+    for n, (src, text) in enumerate(items):
+        text = (text or "").strip()
+        norm = _norm(text)
+        if not norm or any(norm in s for s in seen):
+            deduped += 1
+            continue
+        for psrc, ptext in parts:
+            if psrc == src:
+                trimmed = _trim_overlap(ptext, text)
+                if trimmed is not text:
+                    text = trimmed.strip()
+                    deduped += 1
+        if not text:
+            continue
+        gap = sep_tokens if parts else 0
+        cost = count_tokens(text, model) + gap
+        if used + cost > budget:
+            fit = budget - used - gap
+            if fit >= _MIN_TAIL_TOKENS:
+                cut = truncate_tokens(text, fit, model)
+                parts.append((src, cut))
+                used += count_tokens(cut, model) + gap
+                n += 1
+            return PackedContext(parts, used, deduped, len(items) - n)
+        parts.append((src, text))
+        seen.append(norm)
+        used += cost
+    return PackedContext(parts, used, deduped, 0)
+
+
+def _source(doc: Any) -> str:
+    meta = getattr(doc, "metadata", None) or {}
+    return str(meta.get("source") or meta.get("file_path") or "")
+
+
+def pack_docs(
+    docs: Sequence[Any],
+    agent: str,
+    prefix: Optional[List[Tuple[str, str]]] = None,
+    model: str = "gpt-4o-mini",
+) -> str:
+    """Context string for `agent` from retrieved documents (plus optional leading items).
+
+    Uses the agent's token budget; with CONTEXT_PACKING=0 falls back to the old
+    per-chunk character slicing so the two can be compared.
+    """
+    items = list(prefix or []) + [(_source(d), d.page_content) for d in docs]
+    if not packing_enabled():
+        cap = LEGACY_CHARS.get(agent, 1000)
+        return "\n\n".join(text if src == "db" else text[:cap] for src, text in items)
+    return "\n\n".join(text for _, text in pack(items, context_budget(agent), model).parts)
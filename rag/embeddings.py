@@ -0,0 +1,265 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DEFAULT_EMBED_MODEL = "intfloat/multilingual-e5-large"
+EMBED_BACKENDS = ("hf", "onnx")
+
+BASE = Path(__file__).resolve().parents[1]
+
+# Process-wide registry: one embedding model per (backend, model, device, quantize, prefix),
+# shared by every collection.
+_REGISTRY: Dict[Tuple[str, str, str, bool, bool], Any] = {}
+_STATS: Dict[Tuple[str, str, str, bool, bool], Dict[str, Any]] = {}
+_LOCK = threading.Lock()
+
+
+def _flag(name: str, default: str = "0") -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "on", "yes")
+
+
+def _use_prefix(model: str) -> bool:
+    # E5 models are trained with "query: " / "passage: " prefixes. Off by default: the
+    # shipped indexes were embedded without them and enabling it re-embeds every index.
+    # E5_PREFIX=auto turns them on for e5 models (then rebuild on purpose).
+    mode = os.getenv("E5_PREFIX", "0").strip().lower()
+    if mode == "auto":
+        return "e5" in model.lower()
+    return mode in ("1", "true", "on", "yes")
+
+
+def _resolve(model: Optional[str], device: Optional[str], backend: Optional[str]) -> Tuple[str, str, str, bool, bool]:
+    model = model or os.getenv("EMBED_MODEL", DEFAULT_EMBED_MODEL)
+    device = device or os.getenv("EMBED_DEVICE", "cpu")
+    backend = (backend or os.getenv("EMBED_BACKEND", "hf")).strip().lower()
+    if backend not in EMBED_BACKENDS:
+        raise ValueError(f"unknown EMBED_BACKEND: {backend} (expected one of {EMBED_BACKENDS})")
+    quantize = backend == "onnx" and _flag("EMBED_QUANTIZE")
+    return backend, model, device, quantize, _use_prefix(model)
+
+
+def embedding_signature(model: Optional[str] = None, backend: Optional[str] = None) -> str:
+    """Identifies the vector space an index was built in.
+
+    Stored in index manifests: the model name, plus markers for e5 prefixing and int8
+    quantization, since either changes the vectors. Device and thread count do not.
+    """
+    _backend, model, _device, quantize, prefix = _resolve(model, None, backend)
+    sig = model
+    if prefix:
+        sig += "|e5-prefix"
+    if quantize:
+        sig += "|int8"
+    return sig
+
+
+class EmbeddingProvider:
+    """LangChain-compatible embeddings with separate query and passage roles.
+
+    Subclasses implement `_encode` for raw texts; this class adds the e5 role
+    prefixes and splits input into batches of `batch_size`.
+    """
+
+    backend = "base"
+
+    def __init__(self, model: str, device: str = "cpu", batch_size: int = 32, prefix: bool = False) -> None:
+        self.model = model
+        self.device = device
+        self.batch_size = max(1, batch_size)
+        self.query_prefix = "query: " if prefix else ""
+        self.passage_prefix = "passage: " if prefix else ""
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    def _encode_batched(self, texts: List[str]) -> List[List[float]]:
+        out: List[List[float]] = []
+        for i in range(0, len(texts), self.batch_size):
+            out.extend(self._encode(texts[i : i + self.batch_size]))
+        return out
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode_batched([self.passage_prefix + t for t in texts])
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self._encode_batched([self.query_prefix + t for t in texts])
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+
+    def param_bytes(self) -> int:
+        return 0
+
+
+class HFEmbeddings(EmbeddingProvider):
+    """sentence-transformers / PyTorch via langchain_huggingface (the original backend)."""
+
+    backend = "hf"
+
+    def __init__(self, model: str, device: str = "cpu", batch_size: int = 32, prefix: bool = False, threads: int = 0) -> None:
+        super().__init__(model, device, batch_size, prefix)
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        if threads:
+            import torch
+
+            torch.set_num_threads(threads)
+        self.client = HuggingFaceEmbeddings(
+            model_name=model,
+            model_kwargs={"device": device},
+            encode_kwargs={"batch_size": self.batch_size},
+        )
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        return self.client.embed_documents(texts)
+
+    def param_bytes(self) -> int:
+        # Best effort: sum parameter sizes of the underlying torch module
+        try:
+            st = getattr(self.client, "_client", None) or getattr(self.client, "client", None)
+            return int(sum(p.numel() * p.element_size() for p in st.parameters()))
+        except Exception:
+            return 0
+
+
+def _onnx_dir(model: str) -> Path:
+    root = Path(os.getenv("ONNX_CACHE_DIR", str(BASE / ".cache" / "onnx")))
+    return root / model.replace("/", "__")
+
+
+def _onnx_model_path(model: str, quantize: bool) -> Path:
+    """Export `model` to ONNX once (via optimum) and optionally int8-quantize the weights."""
+    out = _onnx_dir(model)
+    fp32 = out / "model.onnx"
+    if not fp32.exists():
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+
+        ORTModelForFeatureExtraction.from_pretrained(model, export=True).save_pretrained(str(out))
+    if not quantize:
+        return fp32
+    int8 = out / "model.int8.onnx"
+    if not int8.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        # Dynamic quantization: int8 weights, activations quantized per batch at runtime
+        quantize_dynamic(
+            str(fp32),
+            str(int8),
+            weight_type=QuantType.QInt8,
+            use_external_data_format=(out / "model.onnx_data").exists(),
+        )
+    return int8
+
+
+class OnnxEmbeddings(EmbeddingProvider):
+    """ONNX Runtime backend for CPU-only nodes: no PyTorch at inference time.
+
+    Mean pooling + L2 normalization, matching the sentence-transformers e5 pipeline.
+    With `quantize` the exported graph is dynamically quantized to int8 weights.
+    """
+
+    backend = "onnx"
+
+    def __init__(
+        self,
+        model: str,
+        device: str = "cpu",
+        batch_size: int = 32,
+        prefix: bool = False,
+        threads: int = 0,
+        quantize: bool = False,
+        max_length: int = 512,
+    ) -> None:
+        super().__init__(model, device, batch_size, prefix)
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.quantize = quantize
+        self.max_length = max_length
+        self.path = _onnx_model_path(model, quantize)
+        self.tokenizer = AutoTokenizer.from_pretrained(model)
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+        providers = ["CUDAExecutionProvider", "CPUExecutionProvider"] if device.startswith("cuda") else ["CPUExecutionProvider"]
+        self.session = ort.InferenceSession(str(self.path), opts, providers=providers)
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        import numpy as np
+
+        enc = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np")
+        feed = {k: v.astype(np.int64) for k, v in enc.items() if k in self._inputs}
+        if "token_type_ids" in self._inputs and "token_type_ids" not in feed:
+            feed["token_type_ids"] = np.zeros_like(feed["input_ids"])
+        hidden = self.session.run(None, feed)[0]
+        mask = enc["attention_mask"][..., None].astype(np.float32)
+        vec = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        vec /= np.maximum(np.linalg.norm(vec, axis=1, keepdims=True), 1e-12)
+        return vec.tolist()
+
+    def param_bytes(self) -> int:
+        try:
+            return sum(p.stat().st_size for p in self.path.parent.glob(self.path.name + "*"))
+        except Exception:
+            return 0
+
+
+def get_embedding(model: Optional[str] = None, device: Optional[str] = None, backend: Optional[str] = None):
+    """Return the shared embedding model for (backend, model, device), loading it on first use.
+
+    Defaults come from EMBED_MODEL / EMBED_DEVICE / EMBED_BACKEND ("hf" or "onnx").
+    EMBED_QUANTIZE=1 int8-quantizes the ONNX model, EMBED_ENCODE_BATCH_SIZE and
+    EMBED_THREADS tune inference, E5_PREFIX (0 default/auto/1) controls "query: "/"passage: ".
+    For lighter CPU workers combine with a smaller model, e.g.
+    EMBED_MODEL=intfloat/multilingual-e5-small. Every retriever and index build goes
+    through here, so a process loads each model exactly once.
+    """
+    key = _resolve(model, device, backend)
+    emb = _REGISTRY.get(key)
+    if emb is not None:
+        return emb
+    with _LOCK:
+        emb = _REGISTRY.get(key)
+        if emb is not None:
+            return emb
+        backend, model, device, quantize, prefix = key
+        batch_size = int(os.getenv("EMBED_ENCODE_BATCH_SIZE", "32"))
+        threads = int(os.getenv("EMBED_THREADS", "0"))
+        t0 = time.perf_counter()
+        if backend == "onnx":
+            emb = OnnxEmbeddings(model, device, batch_size, prefix, threads, quantize)
+        else:
+            emb = HFEmbeddings(model, device, batch_size, prefix, threads)
+        _STATS[key] = {
+            "backend": backend,
+            "model": model,
+            "device": device,
+            "quantized": quantize,
+            "e5_prefix": prefix,
+            "batch_size": batch_size,
+            "threads": threads,
+            "load_seconds": round(time.perf_counter() - t0, 3),
+            "param_bytes": emb.param_bytes(),
+        }
+        _REGISTRY[key] = emb
+        return emb
+
+
+def embedding_stats() -> List[Dict[str, Any]]:
+    """Loaded models with their load time and parameter memory."""
+    return [dict(v) for v in _STATS.values()]
+
+
+def embedding_memory_bytes() -> int:
+    return sum(int(v.get("param_bytes") or 0) for v in _STATS.values())
+
+
+def clear_embeddings() -> None:
+    with _LOCK:
+        _REGISTRY.clear()
+        _STATS.clear()
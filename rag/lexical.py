@@ -0,0 +1,127 @@
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+BM25_NAME = "bm25.json"
+
+_TOKEN_RE = re.compile(r"[가-힣]+|[a-z0-9]+(?:[.'-][a-z0-9]+)*")
+# Common Korean particles/endings stripped from the end of a Hangul token
+_JOSA = sorted(
+    ["은", "는", "이", "가", "을", "를", "의", "에", "에서", "으로", "로", "와", "과", "도", "만", "까지",
+     "부터", "에게", "한테", "보다", "처럼", "이다", "입니다", "하는", "했다", "하고", "및"],
+    key=len,
+    reverse=True,
+)
+_STOP = {"the", "a", "an", "of", "and", "or", "to", "in", "on", "for", "is", "are", "with", "by"}
+
+
+def _strip_josa(tok: str) -> str:
+    for j in _JOSA:
+        if len(tok) > len(j) + 1 and tok.endswith(j):
+            return tok[: -len(j)]
+    return tok
+
+
+def tokenize(text: str) -> List[str]:
+    """Korean-aware tokenizer for BM25.
+
+    Latin/number runs become lowercase words. Hangul runs have trailing particles
+    stripped and additionally emit character bigrams, so compound nouns such as
+    '라스트마일배송' still match '라스트마일' or '배송' without a morphological analyzer.
+    """
+    out: List[str] = []
+    for tok in _TOKEN_RE.findall((text or "").lower()):
+        if "가" <= tok[0] <= "힣":
+            stem = _strip_josa(tok)
+            if stem in _JOSA:
+                continue
+            out.append(stem)
+            if len(stem) > 2:
+                out.extend(stem[i : i + 2] for i in range(len(stem) - 1))
+        elif len(tok) > 1 and tok not in _STOP:
+            out.append(tok)
+    return out
+
+
+class BM25Index:
+    """Inverted-index Okapi BM25 over chunk ids, persisted as JSON next to chroma.sqlite3."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.doc_len: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.avgdl = 0.0
+
+    @classmethod
+    def build(cls, ids: Sequence[str], texts: Sequence[str], **kw) -> "BM25Index":
+        idx = cls(**kw)
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for n, (cid, text) in enumerate(zip(ids, texts)):
+            tf = Counter(tokenize(text))
+            idx.ids.append(cid)
+            idx.doc_len.append(sum(tf.values()))
+            for term, c in tf.items():
+                postings[term].append((n, c))
+        idx.postings = dict(postings)
+        idx.avgdl = (sum(idx.doc_len) / len(idx.doc_len)) if idx.doc_len else 0.0
+        return idx
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, k: int = 20) -> List[Tuple[str, float]]:
+        n_docs = len(self.ids)
+        if not n_docs:
+            return []
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = math.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+            for n, tf in plist:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[n] / (self.avgdl or 1.0))
+                scores[n] += idf * tf * (self.k1 + 1) / (tf + norm)
+        top = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+        return [(self.ids[n], s) for n, s in top]
+
+    def save(self, path: str) -> None:
+        data = {
+            "k1": self.k1,
+            "b": self.b,
+            "ids": self.ids,
+            "doc_len": self.doc_len,
+            "postings": self.postings,
+        }
+        tmp = f"{path}.tmp"
+        Path(tmp).write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BM25Index"]:
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except Exception:
+            return None
+        idx = cls(k1=data.get("k1", 1.5), b=data.get("b", 0.75))
+        idx.ids = data["ids"]
+        idx.doc_len = data["doc_len"]
+        idx.postings = {t: [tuple(p) for p in pl] for t, pl in data["postings"].items()}  # type: ignore[misc]
+        idx.avgdl = (sum(idx.doc_len) / len(idx.doc_len)) if idx.doc_len else 0.0
+        return idx
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[str]:
+    """Fuse ranked id lists: score(id) = sum 1 / (k + rank)."""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, cid in enumerate(ranking, start=1):
+            scores[cid] += 1.0 / (k + rank)
+    return [cid for cid, _ in sorted(scores.items(), key=lambda x: x[1], reverse=True)]
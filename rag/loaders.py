@@ -1,32 +1,85 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple
 
-from langchain_community.document_loaders import PyPDFLoader, TextLoader, CSVLoader
-from langchain_core.documents import Document
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
 
+SUPPORTED_SUFFIXES = (".pdf", ".md", ".txt", ".csv")
 
-def load_dir(path: str) -> List[Document]:
-    """Load documents from directory recursively.
 
-    Supports: pdf, md, txt, csv. Silently skips unreadable files.
-    """
-    docs: List[Document] = []
+def iter_files(path: str) -> List[Path]:
+    """Supported files under `path`, recursively, in a stable order."""
     p = Path(path)
     if not p.exists():
-        return docs
-    for f in p.rglob("*"):
-        if not f.is_file():
-            continue
-        suf = f.suffix.lower()
-        try:
-            if suf == ".pdf":
-                docs += PyPDFLoader(str(f)).load()
-            elif suf in [".md", ".txt"]:
-                docs += TextLoader(str(f), encoding="utf-8").load()
-            elif suf == ".csv":
-                docs += CSVLoader(str(f)).load()
-        except Exception:
-            # Skip problematic files without breaking the flow
-            continue
-    return docs
+        return []
+    return sorted(f for f in p.rglob("*") if f.is_file() and f.suffix.lower() in SUPPORTED_SUFFIXES)
+
+
+def load_file(f: Path) -> List["Document"]:
+    """Load one file. Raises on unreadable input; callers decide whether to skip."""
+    from langchain_community.document_loaders import PyPDFLoader, TextLoader, CSVLoader
+
+    suf = f.suffix.lower()
+    if suf == ".pdf":
+        return PyPDFLoader(str(f)).load()
+    if suf in [".md", ".txt"]:
+        return TextLoader(str(f), encoding="utf-8").load()
+    if suf == ".csv":
+        return CSVLoader(str(f)).load()
+    return []
+
+
+def _load_one(path: str) -> Tuple[str, List["Document"], Optional[str]]:
+    # Top-level so it can run in a worker process
+    try:
+        return path, load_file(Path(path)), None
+    except Exception as e:
+        return path, [], f"{type(e).__name__}: {e}"
+
+
+def ingest_workers() -> int:
+    return max(1, int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1))))
 
+
+def iter_load(files: Iterable[Path], workers: Optional[int] = None) -> Iterator[Tuple[Path, List["Document"], Optional[str]]]:
+    """Parse files in a process pool, yielding (path, docs, error) as each completes.
+
+    At most `2 * workers` files are in flight, so memory stays bounded regardless of
+    corpus size. With one worker (or a single file) parsing stays in-process.
+    """
+    files = list(files)
+    workers = min(workers or ingest_workers(), len(files) or 1)
+    if workers <= 1 or len(files) <= 1:
+        for f in files:
+            yield (f, *_load_one(str(f))[1:])
+        return
+    pending = iter(files)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        inflight = set()
+        for f in pending:
+            inflight.add(ex.submit(_load_one, str(f)))
+            if len(inflight) >= 2 * workers:
+                break
+        while inflight:
+            done, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                path, docs, err = fut.result()
+                nxt = next(pending, None)
+                if nxt is not None:
+                    inflight.add(ex.submit(_load_one, str(nxt)))
+                yield Path(path), docs, err
+
+
+def load_dir(path: str, workers: Optional[int] = None) -> List["Document"]:
+    """Load documents from directory recursively.
+
+    Supports: pdf, md, txt, csv. Silently skips unreadable files. Files are parsed in
+    parallel (INGEST_WORKERS processes, default: CPU count).
+    """
+    docs: List["Document"] = []
+    for _f, file_docs, _err in iter_load(iter_files(path), workers):
+        # Problematic files come back empty without breaking the flow
+        docs += file_docs
+    return docs
@@ -0,0 +1,69 @@
+"""Convert per-corpus `.index/<name>` Chroma directories into one unified collection.
+
+Vectors, documents and metadata are copied as-is (no re-embedding); each chunk is
+tagged kind=<name> and its id prefixed with "<name>:". Manifests are carried over
+per kind and BM25 indexes rebuilt, so the next sync_index(kind=...) is a no-op.
+
+    python -m rag.migrate --index-dir .index --kinds scout tech market comp
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from rag.vector import MANIFEST_NAME, UNIFIED_COLLECTION, _layout, _read_manifest, _rebuild_bm25, _write_manifest
+
+UNIFIED_DIR_NAME = "unified"
+
+
+def migrate_to_unified(index_dir: str, kinds: List[str], target: Optional[str] = None, page: int = 1000) -> Dict[str, Any]:
+    import chromadb
+
+    target = target or str(Path(index_dir) / UNIFIED_DIR_NAME)
+    dest = chromadb.PersistentClient(path=target).get_or_create_collection(UNIFIED_COLLECTION)
+    report: Dict[str, Any] = {"target": target, "kinds": {}}
+    for kind in kinds:
+        src_dir = Path(index_dir) / kind
+        if not (src_dir / "chroma.sqlite3").exists():
+            report["kinds"][kind] = "missing"
+            continue
+        src = chromadb.PersistentClient(path=str(src_dir)).get_collection(src_dir.name)
+        prefix = _layout(target, kind)["id_prefix"]
+        # Replace anything previously migrated for this kind
+        dest.delete(where={"kind": kind})
+        copied, offset = 0, 0
+        while True:
+            res = src.get(include=["embeddings", "documents", "metadatas"], limit=page, offset=offset)
+            ids = res.get("ids") or []
+            if not ids:
+                break
+            metas = [{**(m or {}), "kind": kind} for m in (res.get("metadatas") or [{}] * len(ids))]
+            dest.add(
+                ids=[prefix + i for i in ids],
+                embeddings=res["embeddings"],
+                documents=res["documents"],
+                metadatas=metas,
+            )
+            copied += len(ids)
+            offset += len(ids)
+        manifest = _read_manifest(str(src_dir), MANIFEST_NAME)
+        if manifest:
+            for entry in (manifest.get("files") or {}).values():
+                entry["ids"] = [prefix + i for i in entry.get("ids") or []]
+            _write_manifest(target, manifest, _layout(target, kind)["manifest"])
+        _rebuild_bm25(dest, target, kind)
+        report["kinds"][kind] = copied
+    return report
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--index-dir", default=str(Path(__file__).resolve().parents[1] / ".index"))
+    p.add_argument("--kinds", nargs="+", default=["scout", "tech", "market", "comp"])
+    p.add_argument("--target", default=None, help="Unified index dir (default: <index-dir>/unified)")
+    args = p.parse_args()
+    print(json.dumps(migrate_to_unified(args.index_dir, args.kinds, args.target), ensure_ascii=False, indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
+import threading
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 
 # Defaults (used if no external prompt file is present)
@@ -56,13 +58,53 @@ BASE = Path(__file__).resolve().parents[1]
 PROMPTS_DIR = BASE / "prompts"
 
 
+# path -> (mtime_ns, text); files are re-read only when they change on disk
+_FILE_CACHE: Dict[Path, Tuple[int, str]] = {}
+_FILE_LOCK = threading.Lock()
+
+
+def _mtime_ns(p: Path) -> Optional[int]:
+    try:
+        return p.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
 def _read_text(p: Path) -> str | None:
+    mtime = _mtime_ns(p)
+    if mtime is None:
+        return None
+    hit = _FILE_CACHE.get(p)
+    if hit and hit[0] == mtime:
+        return hit[1]
     try:
-        if p.exists():
-            return p.read_text(encoding="utf-8")
+        t = p.read_text(encoding="utf-8")
     except Exception:
         return None
-    return None
+    with _FILE_LOCK:
+        _FILE_CACHE[p] = (mtime, t)
+    return t
+
+
+def _system_candidates(name: str) -> list[Path]:
+    return [PROMPTS_DIR / f"{name}.system.md", PROMPTS_DIR / f"{name}.md"]
+
+
+def _config_candidates(name: str) -> list[Path]:
+    return [
+        PROMPTS_DIR / f"{name}.config.yaml",
+        PROMPTS_DIR / f"{name}.config.yml",
+        PROMPTS_DIR / f"{name}.config.md",
+    ]
+
+
+def prompt_version(name: str) -> Tuple[Optional[int], ...]:
+    """Modification times of every file that feeds an agent's prompt.
+
+    Changes whenever a system/config file is created, edited or removed, so it can
+    key caches of built chains.
+    """
+    return tuple(_mtime_ns(p) for p in _system_candidates(name) + _config_candidates(name))
 
 
 def _escape_curly(text: str) -> str:
@@ -73,7 +115,7 @@ def _escape_curly(text: str) -> str:
 
 def system_prompt(name: str, default_text: str) -> str:
     # Prefer explicit .system.md but also allow plain .md
-    for candidate in [PROMPTS_DIR / f"{name}.system.md", PROMPTS_DIR / f"{name}.md"]:
+    for candidate in _system_candidates(name):
         t = _read_text(candidate)
         if t:
             return _escape_curly(t)
@@ -86,11 +128,7 @@ def config_text(name: str) -> str | None:
     Supported names: {name}.config.yaml | {name}.config.yml | {name}.config.md
     Returns None if no config file exists.
     """
-    for candidate in [
-        PROMPTS_DIR / f"{name}.config.yaml",
-        PROMPTS_DIR / f"{name}.config.yml",
-        PROMPTS_DIR / f"{name}.config.md",
-    ]:
+    for candidate in _config_candidates(name):
         t = _read_text(candidate)
         if t:
             return _escape_curly(t)
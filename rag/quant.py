@@ -0,0 +1,107 @@
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+QUANT_MODES = ("int8", "binary")
+
+
+def quant_name(mode: str, kind: Optional[str] = None) -> str:
+    return f"quant.{kind}.{mode}.npz" if kind else f"quant.{mode}.npz"
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    n = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.maximum(n, 1e-12)
+
+
+# popcount for every byte value, used for Hamming distance on packed bits
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class QuantizedStore:
+    """Compressed copy of a collection's vectors for a cheap first-pass search.
+
+    int8: per-dimension symmetric scalar quantization of unit-normalized vectors
+    (4x smaller than float32). binary: one sign bit per dimension (32x smaller),
+    ranked by Hamming distance. Callers re-rank the top-N with the float vectors.
+    """
+
+    def __init__(self, mode: str, ids: List[str], codes: np.ndarray, scale: Optional[np.ndarray] = None) -> None:
+        if mode not in QUANT_MODES:
+            raise ValueError(f"unknown quantization mode: {mode}")
+        self.mode = mode
+        self.ids = ids
+        self.codes = codes
+        self.scale = scale
+
+    @classmethod
+    def build(cls, mode: str, ids: Sequence[str], vectors: Any) -> "QuantizedStore":
+        x = _normalize(np.asarray(vectors, dtype=np.float32))
+        if mode == "binary":
+            return cls(mode, list(ids), np.packbits(x > 0, axis=1))
+        scale = np.maximum(np.abs(x).max(axis=0), 1e-12) / 127.0 if len(x) else np.ones(x.shape[1:], np.float32)
+        codes = np.clip(np.rint(x / scale), -127, 127).astype(np.int8)
+        return cls(mode, list(ids), codes, scale.astype(np.float32))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes + (self.scale.nbytes if self.scale is not None else 0))
+
+    def search(self, query: Sequence[float], top_n: int, block: int = 65536) -> List[str]:
+        """Ids of the `top_n` approximate nearest neighbours of `query`."""
+        if not self.ids:
+            return []
+        q = _normalize(np.asarray(query, dtype=np.float32))
+        top_n = min(top_n, len(self.ids))
+        if self.mode == "binary":
+            qbits = np.packbits(q > 0)
+            dist = np.concatenate(
+                [
+                    _POPCOUNT[np.bitwise_xor(self.codes[i : i + block], qbits)].sum(axis=1, dtype=np.int32)
+                    for i in range(0, len(self.codes), block)
+                ]
+            )
+            order = np.argpartition(dist, top_n - 1)[:top_n]
+            order = order[np.argsort(dist[order], kind="stable")]
+        else:
+            qs = q * self.scale
+            score = np.concatenate(
+                [self.codes[i : i + block].astype(np.float32) @ qs for i in range(0, len(self.codes), block)]
+            )
+            order = np.argpartition(-score, top_n - 1)[:top_n]
+            order = order[np.argsort(-score[order], kind="stable")]
+        return [self.ids[i] for i in order]
+
+    def save(self, path: str) -> None:
+        tmp = f"{path}.tmp.npz"
+        # Fixed-width unicode, so loading never has to unpickle anything from the index dir
+        arrays: Dict[str, Any] = {"ids": np.array(self.ids, dtype=str), "codes": self.codes}
+        if self.scale is not None:
+            arrays["scale"] = self.scale
+        np.savez(tmp, mode=np.array(self.mode), **arrays)
+        Path(tmp).replace(path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["QuantizedStore"]:
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                scale = data["scale"] if "scale" in data.files else None
+                return cls(str(data["mode"]), [str(i) for i in data["ids"]], data["codes"], scale)
+        except Exception:
+            # Unreadable, or an older file with pickled ids: the caller rebuilds it
+            return None
+
+
+def rerank_exact(query: Sequence[float], ids: Sequence[str], vectors: Any, k: int) -> List[Tuple[str, float]]:
+    """Order candidate ids by exact L2 distance (Chroma's default space) on float vectors."""
+    if not len(ids):
+        return []
+    v = np.asarray(vectors, dtype=np.float32)
+    d = np.linalg.norm(v - np.asarray(query, dtype=np.float32), axis=1)
+    order = np.argsort(d, kind="stable")[:k]
+    return [(ids[i], float(d[i])) for i in order]
@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+
+DEFAULT_RERANK_MODEL = "BAAI/bge-reranker-v2-m3"
+
+_REGISTRY: Dict[tuple, "CrossEncoderReranker"] = {}
+_LOCK = threading.Lock()
+# Weight of the newest batch in the per-pair scoring latency estimate
+_EMA_ALPHA = 0.3
+
+
+class CrossEncoderReranker:
+    """Local cross-encoder that re-orders retrieved chunks for one query.
+
+    Pairs are scored in batches in their incoming (dense/fused) order. Before each
+    batch its cost, estimated from an EMA of per-pair latency kept across queries, is
+    checked against what is left of `budget_ms`; a batch that would not fit is not
+    started, and the remaining chunks keep their incoming order behind the scored ones
+    (all of them when even the first batch does not fit). Only the very first batch
+    after loading runs unestimated. The kept chunks are then cut to fit `max_tokens`
+    (counted with the model's tokenizer).
+    """
+
+    def __init__(
+        self,
+        model: str,
+        device: str = "cpu",
+        batch_size: int = 16,
+        budget_ms: float = 300.0,
+        max_tokens: int = 0,
+    ) -> None:
+        from sentence_transformers import CrossEncoder
+
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.budget_ms = budget_ms
+        self.max_tokens = max_tokens
+        t0 = time.perf_counter()
+        self.encoder = CrossEncoder(model, device=device)
+        # Warm up so one-off initialization cost does not enter the latency estimate
+        self.encoder.predict([("warmup", "warmup")])
+        self.load_seconds = time.perf_counter() - t0
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.fallbacks = 0
+        self.partial = 0
+        self.pairs_scored = 0
+        # Seconds per scored pair (EMA); None until the first batch is measured
+        self.pair_seconds: Optional[float] = None
+        self.retrieve_calls = 0
+        self.retrieve_queries = 0
+        self.retrieve_seconds = 0.0
+        self.rerank_seconds = 0.0
+
+    def _tokens(self, text: str) -> int:
+        tok = getattr(self.encoder, "tokenizer", None)
+        if tok is None:
+            return max(1, len(text) // 3)
+        return len(tok.encode(text, add_special_tokens=False))
+
+    def rerank(self, query: str, docs: Sequence["Document"], top_n: int) -> List["Document"]:
+        docs = list(docs)
+        if len(docs) <= 1:
+            return docs[:top_n]
+        t0 = time.perf_counter()
+        deadline = t0 + self.budget_ms / 1000.0 if self.budget_ms > 0 else None
+        scores: List[float] = []
+        for i in range(0, len(docs), self.batch_size):
+            batch = docs[i : i + self.batch_size]
+            now = time.perf_counter()
+            est = self.pair_seconds
+            if deadline is not None and est is not None and now + est * len(batch) > deadline:
+                break
+            scores.extend(float(s) for s in self.encoder.predict([(query, d.page_content) for d in batch]))
+            per_pair = (time.perf_counter() - now) / len(batch)
+            with self._lock:
+                prev = self.pair_seconds
+                self.pair_seconds = per_pair if prev is None else _EMA_ALPHA * per_pair + (1 - _EMA_ALPHA) * prev
+        scored = sorted(range(len(scores)), key=lambda n: scores[n], reverse=True)
+        order = [docs[n] for n in scored] + docs[len(scores) :]
+        kept: List["Document"] = []
+        used = 0
+        for d in order:
+            if len(kept) >= top_n:
+                break
+            cost = self._tokens(d.page_content) if self.max_tokens else 0
+            if kept and self.max_tokens and used + cost > self.max_tokens:
+                continue
+            kept.append(d)
+            used += cost
+        with self._lock:
+            self.queries += 1
+            self.pairs_scored += len(scores)
+            self.rerank_seconds += time.perf_counter() - t0
+            if not scores:
+                self.fallbacks += 1
+            elif len(scores) < len(docs):
+                self.partial += 1
+        return kept
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            q = self.queries
+            rq = self.retrieve_queries
+            return {
+                "model": self.model,
+                "queries": q,
+                "pairs_scored": self.pairs_scored,
+                "fallbacks": self.fallbacks,
+                "partial": self.partial,
+                "load_seconds": round(self.load_seconds, 3),
+                "est_batch_ms": round(1000 * self.pair_seconds * self.batch_size, 1) if self.pair_seconds else None,
+                # Retrieval runs once per search_many call; its time is split evenly over the call's queries
+                "retrieve_calls": self.retrieve_calls,
+                "avg_retrieve_ms_per_query": round(1000 * self.retrieve_seconds / rq, 1) if rq else 0.0,
+                "avg_rerank_ms_per_query": round(1000 * self.rerank_seconds / q, 1) if q else 0.0,
+            }
+
+
+def rerank_enabled() -> bool:
+    return os.getenv("RERANK", "0").strip().lower() in ("1", "true", "on", "yes")
+
+
+def get_reranker(model: Optional[str] = None) -> CrossEncoderReranker:
+    """Shared cross-encoder, configured by RERANK_MODEL / RERANK_DEVICE / RERANK_BATCH_SIZE /
+    RERANK_BUDGET_MS (per query, 0 = unlimited) / RERANK_MAX_TOKENS (0 = no token cap)."""
+    model = model or os.getenv("RERANK_MODEL", DEFAULT_RERANK_MODEL)
+    device = os.getenv("RERANK_DEVICE", os.getenv("EMBED_DEVICE", "cpu"))
+    key = (model, device)
+    rr = _REGISTRY.get(key)
+    if rr is not None:
+        return rr
+    with _LOCK:
+        rr = _REGISTRY.get(key)
+        if rr is None:
+            rr = CrossEncoderReranker(
+                model,
+                device,
+                batch_size=int(os.getenv("RERANK_BATCH_SIZE", "16")),
+                budget_ms=float(os.getenv("RERANK_BUDGET_MS", "300")),
+                max_tokens=int(os.getenv("RERANK_MAX_TOKENS", "0")),
+            )
+            _REGISTRY[key] = rr
+    return rr
+
+
+def rerank_stats() -> List[Dict[str, Any]]:
+    return [rr.stats() for rr in _REGISTRY.values()]
+
+
+class RerankingRetriever:
+    """Over-fetches `fetch_k` candidates from `base` and keeps the cross-encoder's top `k`.
+
+    Exposes the same search/search_many/invoke surface as HybridRetriever so agents,
+    retrieve_many() and Prefetcher work unchanged.
+    """
+
+    def __init__(self, base, reranker: CrossEncoderReranker, k: int = 5, fetch_k: int = 30) -> None:
+        self.base = base
+        self.reranker = reranker
+        self.k = k
+        self.fetch_k = fetch_k
+
+    def search_many(
+        self,
+        queries: Sequence[str],
+        lexical_queries: Optional[Sequence[Optional[str]]] = None,
+        k: Optional[int] = None,
+    ) -> List[List["Document"]]:
+        from rag.vector import retrieve_many
+
+        t0 = time.perf_counter()
+        if lexical_queries and hasattr(self.base, "search_many"):
+            rows = self.base.search_many(queries, lexical_queries, k=self.fetch_k)
+        else:
+            rows = retrieve_many(self.base, queries, k=self.fetch_k)
+        with self.reranker._lock:
+            self.reranker.retrieve_calls += 1
+            self.reranker.retrieve_queries += len(queries)
+            self.reranker.retrieve_seconds += time.perf_counter() - t0
+        return [self.reranker.rerank(q, docs, k or self.k) for q, docs in zip(queries, rows)]
+
+    def search(self, query: str, lexical_query: Optional[str] = None, k: Optional[int] = None) -> List["Document"]:
+        return self.search_many([query], [lexical_query] if lexical_query else None, k)[0]
+
+    def invoke(self, query: str, **_kwargs) -> List["Document"]:
+        return self.search(query)
+
+    def get_relevant_documents(self, query: str, **_kwargs) -> List["Document"]:
+        return self.search(query)
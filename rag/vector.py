@@ -1,17 +1,31 @@
-from typing import Optional
+from __future__ import annotations
 
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_core.documents import Document
-from pathlib import Path
+import hashlib
+import json
 import os
-import chromadb
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma as LCChroma
-from chromadb.config import Settings as ChromaSettings
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+from db.cache import SqliteCache
+from rag.embeddings import DEFAULT_EMBED_MODEL, embedding_signature, get_embedding
+from rag.lexical import BM25_NAME, BM25Index, reciprocal_rank_fusion
+from rag.loaders import iter_files, iter_load
+
+if TYPE_CHECKING:  # heavy imports deferred until an index is actually used
+    from chromadb.config import Settings as ChromaSettings
+    from langchain_chroma import Chroma
+    from langchain_core.documents import Document
+
+    from rag.quant import QuantizedStore
+
+
+def _settings(dir_: str) -> "ChromaSettings":
+    from chromadb.config import Settings as ChromaSettings
 
-def _settings(dir_: str) -> ChromaSettings:
     # Persistent on-disk storage (Chroma 0.5+)
     return ChromaSettings(
         chroma_db_impl="duckdb+parquet",
@@ -20,13 +34,159 @@ def _settings(dir_: str) -> ChromaSettings:
     )
 
 
+BASE = Path(__file__).resolve().parents[1]
+
+
+class CachedQueryEmbeddings:
+    """Embeddings wrapper that memoizes `embed_query` in an in-memory LRU backed by SQLite.
+
+    Document embedding passes straight through. The model is only loaded on the first
+    cache miss, so repeated queries never touch it.
+    """
+
+    def __init__(self, model: str, disk: Optional[SqliteCache] = None, max_items: int = 2048) -> None:
+        self.model = model
+        # Cache keys and index manifests follow the vector space, not just the model name
+        self.signature = embedding_signature(model)
+        self.disk = disk
+        self.max_items = max_items
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.embed_seconds = 0.0
+
+    @property
+    def base(self):
+        return get_embedding(self.model)
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.signature}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vec: List[float]) -> None:
+        with self._lock:
+            self._lru[key] = vec
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_items:
+                self._lru.popitem(last=False)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        with self._lock:
+            vec = self._lru.get(key)
+            if vec is not None:
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                return vec
+        if self.disk is not None:
+            raw = self.disk.get(key)
+            if raw is not None:
+                vec = array("f", raw).tolist()
+                self._remember(key, vec)
+                self.disk_hits += 1
+                return vec
+        t0 = time.perf_counter()
+        vec = list(self.base.embed_query(text))
+        self.embed_seconds += time.perf_counter() - t0
+        self.misses += 1
+        self._remember(key, vec)
+        if self.disk is not None:
+            self.disk.set(key, array("f", vec).tobytes())
+        return vec
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Batch form of embed_query: cache hits are served, misses embedded in one pass."""
+        out: List[Optional[List[float]]] = []
+        misses: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            key = self._key(text)
+            with self._lock:
+                vec = self._lru.get(key)
+                if vec is not None:
+                    self._lru.move_to_end(key)
+                    self.memory_hits += 1
+            if vec is None and self.disk is not None:
+                raw = self.disk.get(key)
+                if raw is not None:
+                    vec = array("f", raw).tolist()
+                    self._remember(key, vec)
+                    self.disk_hits += 1
+            out.append(vec)
+            if vec is None:
+                misses.setdefault(text, []).append(i)
+        if misses:
+            t0 = time.perf_counter()
+            vecs = self.base.embed_queries(list(misses))
+            self.embed_seconds += time.perf_counter() - t0
+            self.misses += len(misses)
+            for text, vec in zip(misses, vecs):
+                vec = list(vec)
+                key = self._key(text)
+                self._remember(key, vec)
+                if self.disk is not None:
+                    self.disk.set(key, array("f", vec).tobytes())
+                for i in misses[text]:
+                    out[i] = vec
+        return out  # type: ignore[return-value]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "model": self.signature,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "avg_miss_ms": round(1000 * self.embed_seconds / self.misses, 1) if self.misses else 0.0,
+            "memory_items": len(self._lru),
+        }
+
+
+_QUERY_EMB: Dict[str, CachedQueryEmbeddings] = {}
+_QUERY_EMB_LOCK = threading.Lock()
+
+
 def _embedding():
-    # HuggingFace multilingual E5 (default: large). Override with EMBED_MODEL.
-    model = os.getenv("EMBED_MODEL", "intfloat/multilingual-e5-large")
-    return HuggingFaceEmbeddings(model_name=model)
+    # Multilingual E5 (default: large). Override with EMBED_MODEL / EMBED_DEVICE / EMBED_BACKEND.
+    # Shared process-wide so all collections reuse one loaded model and one query cache.
+    model = os.getenv("EMBED_MODEL", DEFAULT_EMBED_MODEL)
+    sig = embedding_signature(model)
+    emb = _QUERY_EMB.get(sig)
+    if emb is None:
+        with _QUERY_EMB_LOCK:
+            emb = _QUERY_EMB.get(sig)
+            if emb is None:
+                disk = None
+                if os.getenv("QUERY_EMB_CACHE", "1").strip().lower() not in ("0", "false", "off", "no"):
+                    disk = SqliteCache(
+                        os.getenv("QUERY_EMB_CACHE_PATH", str(BASE / ".cache" / "query_emb.sqlite3")),
+                        max_entries=int(os.getenv("QUERY_EMB_CACHE_MAX_ENTRIES", "100000")),
+                    )
+                emb = CachedQueryEmbeddings(model, disk, int(os.getenv("QUERY_EMB_CACHE_SIZE", "2048")))
+                _QUERY_EMB[sig] = emb
+    return emb
+
 
+def query_cache_stats() -> List[Dict[str, Any]]:
+    """Hit rates of the shared query-embedding cache(s)."""
+    out = []
+    for emb in _QUERY_EMB.values():
+        st = emb.stats()
+        if emb.disk is not None:
+            st["disk"] = emb.disk.stats()
+        out.append(st)
+    return out
+
+
+def build_index(docs: list["Document"], dir_: str, hnsw: Optional[Dict[str, int]] = None) -> Optional["Chroma"]:
+    import chromadb
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_chroma import Chroma as LCChroma
 
-def build_index(docs: list[Document], dir_: str) -> Optional[Chroma]:
     if not docs:
         return None
     splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=120)
@@ -36,13 +196,593 @@ def build_index(docs: list[Document], dir_: str) -> Optional[Chroma]:
     emb = _embedding()
     collection_name = Path(dir_).name
     client = chromadb.PersistentClient(path=dir_)
-    vs = LCChroma.from_documents(chunks, emb, client=client, collection_name=collection_name)
+    vs = LCChroma.from_documents(
+        chunks,
+        emb,
+        client=client,
+        collection_name=collection_name,
+        collection_metadata=hnsw_metadata(hnsw) or None,
+    )
+    _rebuild_bm25(client.get_collection(collection_name), dir_)
     return vs
 
 
-def as_retriever(dir_: str, k: int = 5):
+def _to_documents(res: Dict[str, Any], row: int = 0) -> List[tuple]:
+    """(id, Document) pairs from a Chroma query()/get() result."""
+    from langchain_core.documents import Document
+
+    ids = res.get("ids") or []
+    docs = res.get("documents") or []
+    metas = res.get("metadatas") or []
+    if ids and isinstance(ids[0], list):  # query() results are nested per query
+        ids, docs, metas = ids[row], docs[row], (metas[row] if metas else [])
+    return [
+        (cid, Document(page_content=docs[i] or "", metadata=(metas[i] if metas and metas[i] else {})))
+        for i, cid in enumerate(ids)
+    ]
+
+
+class HybridRetriever:
+    """Dense HNSW search fused with a local BM25 index via reciprocal rank fusion.
+
+    Drop-in for the LangChain retrievers the agents use (`invoke` /
+    `get_relevant_documents`). `search(query, lexical_query=...)` lets callers send
+    keyword-heavy text to the lexical side only, without polluting the embedded query.
+    """
+
+    def __init__(
+        self,
+        collection,
+        embedding,
+        bm25: Optional[BM25Index],
+        k: int = 5,
+        fetch_k: int = 20,
+        rrf_k: int = 60,
+        where: Optional[Dict[str, Any]] = None,
+        quant: Optional["QuantizedStore"] = None,
+        rerank_n: int = 100,
+    ):
+        self.collection = collection
+        self.embedding = embedding
+        self.bm25 = bm25
+        self.where = where
+        self.quant = quant
+        self.rerank_n = rerank_n
+        self.k = k
+        self.fetch_k = fetch_k
+        self.rrf_k = rrf_k
+
+    def dense_many(self, queries: Sequence[str], k: int) -> List[List[tuple]]:
+        # One batched embedding pass and one Chroma query for all inputs
+        vecs = _embed_queries(self.embedding, queries)
+        if self.quant is not None:
+            return [self._quant_search(v, k) for v in vecs]
+        res = self.collection.query(
+            query_embeddings=vecs,
+            n_results=k,
+            where=self.where,
+            include=["documents", "metadatas"],
+        )
+        return [_to_documents(res, row) for row in range(len(queries))]
+
+    def dense(self, query: str, k: int) -> List[tuple]:
+        return self.dense_many([query], k)[0]
+
+    def _quant_search(self, vec: List[float], k: int) -> List[tuple]:
+        # Compressed first pass over all vectors, then exact float re-ranking of the top-N
+        from rag.quant import rerank_exact
+
+        cand = self.quant.search(vec, max(k, self.rerank_n))  # type: ignore[union-attr]
+        if not cand:
+            return []
+        got = self.collection.get(ids=cand, include=["embeddings", "documents", "metadatas"])
+        pairs = dict(_to_documents(got))
+        ranked = rerank_exact(vec, got["ids"], got["embeddings"], k)
+        return [(cid, pairs[cid]) for cid, _ in ranked]
+
+    def lexical(self, query: str, k: int) -> List[str]:
+        return [cid for cid, _ in self.bm25.search(query, k)] if self.bm25 is not None else []
+
+    def search_many(
+        self,
+        queries: Sequence[str],
+        lexical_queries: Optional[Sequence[Optional[str]]] = None,
+        k: Optional[int] = None,
+    ) -> List[List["Document"]]:
+        if not queries:
+            return []
+        k = k or self.k
+        lexical_queries = lexical_queries or [None] * len(queries)
+        dense_rows = self.dense_many(queries, max(k, self.fetch_k))
+        fused_rows: List[List[str]] = []
+        docs: Dict[str, "Document"] = {}
+        for query, lex_q, dense in zip(queries, lexical_queries, dense_rows):
+            docs.update(dict(dense))
+            lex_ids = self.lexical(lex_q or query, self.fetch_k)
+            if not lex_ids:
+                fused_rows.append([cid for cid, _ in dense[:k]])
+            else:
+                fused_rows.append(reciprocal_rank_fusion([[cid for cid, _ in dense], lex_ids], k=self.rrf_k)[:k])
+        missing = list(dict.fromkeys(cid for row in fused_rows for cid in row if cid not in docs))
+        if missing:
+            got = self.collection.get(ids=missing, include=["documents", "metadatas"])
+            docs.update(dict(_to_documents(got)))
+        return [[docs[cid] for cid in row if cid in docs] for row in fused_rows]
+
+    def search(self, query: str, lexical_query: Optional[str] = None, k: Optional[int] = None) -> List["Document"]:
+        return self.search_many([query], [lexical_query], k)[0]
+
+    def invoke(self, query: str, **_kwargs) -> List["Document"]:
+        return self.search(query)
+
+    def get_relevant_documents(self, query: str, **_kwargs) -> List["Document"]:
+        return self.search(query)
+
+
+def _embed_queries(embedding, queries: Sequence[str]) -> List[List[float]]:
+    if hasattr(embedding, "embed_queries"):
+        return embedding.embed_queries(list(queries))
+    return [embedding.embed_query(q) for q in queries]
+
+
+def retrieve_many(retriever, queries: Sequence[str], k: Optional[int] = None) -> List[List["Document"]]:
+    """Retrieve for several queries at once; results are aligned with `queries`.
+
+    All queries are embedded in one batched forward pass (cache hits skipped) and
+    searched with a single Chroma query. Works with HybridRetriever and LangChain
+    vector-store retrievers; anything else falls back to one call per query.
+    """
+    queries = list(queries)
+    if not queries:
+        return []
+    if hasattr(retriever, "search_many"):
+        # HybridRetriever / RerankingRetriever
+        return retriever.search_many(queries, k=k)
+    vs = getattr(retriever, "vectorstore", None)
+    collection = getattr(vs, "_collection", None)
+    if collection is not None:
+        kw = getattr(retriever, "search_kwargs", None) or {}
+        res = collection.query(
+            query_embeddings=_embed_queries(vs.embeddings, queries),
+            n_results=k or kw.get("k", 4),
+            where=kw.get("filter"),
+            include=["documents", "metadatas"],
+        )
+        return [[d for _, d in _to_documents(res, row)] for row in range(len(queries))]
+    out = []
+    for q in queries:
+        try:
+            out.append(retriever.invoke(q))
+        except Exception:
+            out.append(retriever.get_relevant_documents(q))
+    return out
+
+
+class Prefetcher:
+    """Per-chain store of documents retrieved ahead of time with retrieve_many().
+
+    `get(query)` hands out a prefetched result once, or falls back to a normal
+    single-query retrieval. Callers `discard()` what they prefetched but did not use
+    when their run ends; as a backstop the store keeps at most `max_items` entries
+    (oldest dropped first), so a long batch process cannot accumulate stale results.
+    """
+
+    def __init__(self, retriever, max_items: int = 256) -> None:
+        self.retriever = retriever
+        self.max_items = max(1, max_items)
+        self._docs: "OrderedDict[str, List[Document]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def prefetch(self, queries: Sequence[str]) -> None:
+        with self._lock:
+            todo = [q for q in dict.fromkeys(queries) if q not in self._docs]
+        if not todo:
+            return
+        rows = retrieve_many(self.retriever, todo)
+        with self._lock:
+            self._docs.update(zip(todo, rows))
+            while len(self._docs) > self.max_items:
+                self._docs.popitem(last=False)
+
+    def discard(self, queries: Sequence[str]) -> None:
+        with self._lock:
+            for q in queries:
+                self._docs.pop(q, None)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def get(self, query: str) -> List["Document"]:
+        with self._lock:
+            docs = self._docs.pop(query, None)
+        if docs is not None:
+            return docs
+        try:
+            return self.retriever.invoke(query)
+        except Exception:
+            return self.retriever.get_relevant_documents(query)
+
+
+def hnsw_metadata(hnsw: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """Chroma collection metadata for HNSW settings.
+
+    Keys: M, ef_construction, ef_search; defaults from HNSW_M / HNSW_EF_CONSTRUCTION /
+    HNSW_EF_SEARCH. Unset values keep Chroma's defaults. M and ef_construction only
+    take effect when a collection is created; ef_search can be changed later.
+    """
+    hnsw = dict(hnsw or {})
+    for key, env in (("M", "HNSW_M"), ("ef_construction", "HNSW_EF_CONSTRUCTION"), ("ef_search", "HNSW_EF_SEARCH")):
+        if hnsw.get(key) is None and os.getenv(env):
+            hnsw[key] = int(os.getenv(env))  # type: ignore[arg-type]
+    names = {"M": "hnsw:M", "ef_construction": "hnsw:construction_ef", "ef_search": "hnsw:search_ef"}
+    return {names[k]: int(v) for k, v in hnsw.items() if k in names and v is not None}
+
+
+def _open_collection(client, name: str, hnsw: Optional[Dict[str, int]] = None, create: bool = True):
+    meta = hnsw_metadata(hnsw)
+    if create:
+        collection = client.get_or_create_collection(name, metadata=meta or None)
+    else:
+        collection = client.get_collection(name)
+    ef = meta.get("hnsw:search_ef")
+    if ef is not None and (collection.metadata or {}).get("hnsw:search_ef") != ef:
+        try:
+            collection.modify(metadata={**(collection.metadata or {}), "hnsw:search_ef": ef})
+        except Exception:
+            pass  # older Chroma versions cannot change HNSW params after creation
+    return collection
+
+
+def _quant_mode(quant: Optional[str]) -> Optional[str]:
+    mode = (quant if quant is not None else os.getenv("VECTOR_QUANT", "")).strip().lower()
+    return mode if mode in ("int8", "binary") else None
+
+
+def _rebuild_quant(collection, dir_: str, kind: Optional[str], mode: str, page: int = 5000) -> int:
+    from rag.quant import QuantizedStore, quant_name
+
+    ids: List[str] = []
+    vecs: List[Any] = []
+    where = _layout(dir_, kind)["where"]
+    offset = 0
+    while True:
+        res = collection.get(where=where, include=["embeddings"], limit=page, offset=offset)
+        if not res.get("ids"):
+            break
+        ids.extend(res["ids"])
+        vecs.extend(res["embeddings"])
+        offset += len(res["ids"])
+    if not ids:
+        return 0
+    store = QuantizedStore.build(mode, ids, vecs)
+    store.save(str(Path(dir_) / quant_name(mode, kind)))
+    return len(store)
+
+
+# Unified layout: every corpus in one collection, chunks tagged with metadata kind=<name>
+UNIFIED_COLLECTION = "corpus"
+
+
+def _layout(dir_: str, kind: Optional[str]) -> Dict[str, Any]:
+    """Collection name, sidecar file names and metadata filter for a (dir, kind) pair."""
+    if kind:
+        return {
+            "collection": UNIFIED_COLLECTION,
+            "manifest": f"manifest.{kind}.json",
+            "bm25": f"bm25.{kind}.json",
+            "where": {"kind": kind},
+            "id_prefix": f"{kind}:",
+        }
+    return {
+        "collection": Path(dir_).name,
+        "manifest": MANIFEST_NAME,
+        "bm25": BM25_NAME,
+        "where": None,
+        "id_prefix": "",
+    }
+
+
+def _rebuild_bm25(collection, dir_: str, kind: Optional[str] = None) -> int:
+    lay = _layout(dir_, kind)
+    res = collection.get(where=lay["where"], include=["documents"])
+    idx = BM25Index.build(res.get("ids") or [], res.get("documents") or [])
+    idx.save(str(Path(dir_) / lay["bm25"]))
+    return len(idx)
+
+
+def as_retriever(
+    dir_: str,
+    k: int = 5,
+    mode: Optional[str] = None,
+    kind: Optional[str] = None,
+    hnsw: Optional[Dict[str, int]] = None,
+    quant: Optional[str] = None,
+    rerank: Optional[bool] = None,
+):
+    """Retriever over the collection at `dir_`.
+
+    mode: "hybrid" (BM25 + dense with RRF, the default when a bm25.json exists) or
+    "dense" (plain LangChain vector-store retriever). Override with RETRIEVER_MODE.
+    kind: search only chunks tagged kind=<kind> in the unified collection at `dir_`.
+    hnsw: {"ef_search": ...} applied to the collection (see hnsw_metadata).
+    quant: "int8" | "binary" (or VECTOR_QUANT) searches the quantized copy built by
+    sync_index and re-ranks the top QUANT_RERANK_N with float vectors.
+    rerank: over-fetch RERANK_FETCH_K (default 30) candidates and keep the top `k` by a
+    local cross-encoder (default from RERANK; see rag.rerank.get_reranker).
+    """
+    from rag.rerank import RerankingRetriever, get_reranker, rerank_enabled
+
+    if rerank if rerank is not None else rerank_enabled():
+        fetch_k = int(os.getenv("RERANK_FETCH_K", "30"))
+        base = as_retriever(dir_, k=fetch_k, mode=mode, kind=kind, hnsw=hnsw, quant=quant, rerank=False)
+        return RerankingRetriever(base, get_reranker(), k=k, fetch_k=fetch_k)
+
+    import chromadb
+    from langchain_chroma import Chroma as LCChroma
+
     emb = _embedding()
-    collection_name = Path(dir_).name
+    lay = _layout(dir_, kind)
+    client = chromadb.PersistentClient(path=dir_)
+    collection = _open_collection(client, lay["collection"], hnsw, create=False)
+    mode = mode or os.getenv("RETRIEVER_MODE", "hybrid")
+    bm25_path = Path(dir_) / lay["bm25"]
+    qstore = None
+    qmode = _quant_mode(quant)
+    if qmode:
+        from rag.quant import QuantizedStore, quant_name
+
+        qstore = QuantizedStore.load(str(Path(dir_) / quant_name(qmode, kind)))
+    if (mode == "hybrid" and bm25_path.exists()) or qstore is not None:
+        return HybridRetriever(
+            collection,
+            emb,
+            BM25Index.load(str(bm25_path)) if mode == "hybrid" and bm25_path.exists() else None,
+            k=k,
+            where=lay["where"],
+            quant=qstore,
+            rerank_n=int(os.getenv("QUANT_RERANK_N", "100")),
+        )
+    vs = LCChroma(collection_name=lay["collection"], client=client, embedding_function=emb)
+    search_kwargs: Dict[str, Any] = {"k": k}
+    if lay["where"]:
+        search_kwargs["filter"] = lay["where"]
+    return vs.as_retriever(search_kwargs=search_kwargs)
+
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _file_sha256(f: Path) -> str:
+    h = hashlib.sha256()
+    with f.open("rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _read_manifest(dir_: str, name: str = MANIFEST_NAME) -> Dict[str, Any]:
+    p = Path(dir_) / name
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def corpus_fingerprint(files: Dict[str, Dict[str, Any]], signature: str = "") -> str:
+    """Short hash of a manifest's file contents; changes whenever any source file does."""
+    h = hashlib.sha256(signature.encode("utf-8"))
+    for rel in sorted(files):
+        h.update(f"\0{rel}\0{files[rel].get('sha256', '')}".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _write_manifest(dir_: str, manifest: Dict[str, Any], name: str = MANIFEST_NAME) -> None:
+    p = Path(dir_) / name
+    tmp = p.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+    os.replace(tmp, p)
+
+
+class IngestProgress:
+    """Running counters for an ingestion pass; prints docs/s and chunks/s periodically."""
+
+    def __init__(self, name: str, files_total: int, verbose: bool = False, every: float = 5.0) -> None:
+        self.name = name
+        self.files_total = files_total
+        self.verbose = verbose
+        self.every = every
+        self.files = 0
+        self.docs = 0
+        self.chunks = 0
+        self.t0 = time.perf_counter()
+        self._last = self.t0
+
+    def file_done(self, docs: int) -> None:
+        self.files += 1
+        self.docs += docs
+        now = time.perf_counter()
+        if self.verbose and (now - self._last >= self.every or self.files == self.files_total):
+            self._last = now
+            r = self.rates()
+            print(
+                f"[ingest] {self.name}: {self.files}/{self.files_total} files, {self.docs} docs, "
+                f"{self.chunks} chunks ({r['docs_per_s']} docs/s, {r['chunks_per_s']} chunks/s)"
+            )
+
+    def rates(self) -> Dict[str, float]:
+        dt = max(time.perf_counter() - self.t0, 1e-9)
+        return {
+            "files": self.files,
+            "docs": self.docs,
+            "chunks": self.chunks,
+            "seconds": round(dt, 3),
+            "docs_per_s": round(self.docs / dt, 1),
+            "chunks_per_s": round(self.chunks / dt, 1),
+        }
+
+
+def _iter_chunks(splitter, docs: List["Document"]):
+    for d in docs:
+        yield from splitter.split_documents([d])
+
+
+def sync_index(
+    data_dir: str,
+    dir_: str,
+    workers: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    verbose: bool = False,
+    kind: Optional[str] = None,
+    hnsw: Optional[Dict[str, int]] = None,
+    quant: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Bring the collection at `dir_` in line with the files under `data_dir`.
+
+    A manifest of per-file content hashes (and the chunk ids they produced) lives
+    next to chroma.sqlite3. Only added or changed files are chunked and embedded;
+    chunks of deleted files are removed. Changing the embedding signature (EMBED_MODEL,
+    E5_PREFIX, EMBED_QUANTIZE) re-embeds everything; E5_PREFIX defaults to off so
+    existing indexes keep matching until prefixes are enabled deliberately.
+    Indexes built before the manifest existed are adopted without re-embedding when
+    their chunks can be matched by `source` path. Returns a report of what changed.
+
+    Files are parsed by `workers` processes (INGEST_WORKERS) and chunks are embedded
+    and written in batches of `batch_size` (EMBED_BATCH_SIZE, default 64) as they
+    arrive, so memory stays bounded on large corpora.
+
+    With `kind`, `dir_` is the unified index: chunks go into the shared collection
+    tagged kind=<kind>, and the manifest/BM25 sidecars are kept per kind.
+
+    `hnsw` sets HNSW parameters for newly created collections (see hnsw_metadata);
+    `quant` ("int8" | "binary", or VECTOR_QUANT) maintains a quantized vector copy.
+    """
+    import chromadb
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_chroma import Chroma as LCChroma
+
+    t0 = time.perf_counter()
+    batch_size = batch_size or int(os.getenv("EMBED_BATCH_SIZE", "64"))
+    Path(dir_).mkdir(parents=True, exist_ok=True)
+    emb = _embedding()
+    lay = _layout(dir_, kind)
+    where = lay["where"]
+    manifest = _read_manifest(dir_, lay["manifest"])
     client = chromadb.PersistentClient(path=dir_)
+    collection_name = lay["collection"]
+    collection = _open_collection(client, collection_name, hnsw)
+    legacy = not manifest and bool(collection.get(where=where, limit=1, include=[])["ids"])
+
+    old_files: Dict[str, Dict[str, Any]] = manifest.get("files") or {}
+    if legacy and emb.signature != emb.model:
+        # Pre-manifest indexes were embedded without e5 prefixes: not adoptable
+        manifest, legacy = {"embedding": emb.model}, False
+    if manifest and manifest.get("embedding") != emb.signature:
+        # Vectors from another model (or prefixing/quantization) are not comparable: start over
+        if where:
+            collection.delete(where=where)
+        else:
+            client.delete_collection(collection_name)
+            collection = _open_collection(client, collection_name, hnsw)
+        old_files = {}
+
+    report: Dict[str, Any] = {"collection": kind or collection_name, "added": [], "changed": [], "removed": [], "adopted": []}
+    files = {str(f.relative_to(data_dir)): f for f in iter_files(data_dir)}
+    new_files: Dict[str, Dict[str, Any]] = {}
+    todo: List[tuple] = []
+    for rel, f in files.items():
+        sha = _file_sha256(f)
+        prev = old_files.get(rel)
+        if prev and prev.get("sha256") == sha:
+            new_files[rel] = prev
+            continue
+        if legacy:
+            src = {"source": str(f)}
+            found = collection.get(where={"$and": [src, where]} if where else src, include=[])
+            if found.get("ids"):
+                new_files[rel] = {"sha256": sha, "ids": list(found["ids"])}
+                report["adopted"].append(rel)
+                continue
+        todo.append((rel, f, sha, prev))
+
+    for rel, prev in old_files.items():
+        if rel not in files:
+            if prev.get("ids"):
+                collection.delete(ids=prev["ids"])
+            report["removed"].append(rel)
+
+    if legacy:
+        # Whatever could not be adopted is re-embedded below; drop its old chunks
+        kept = {i for entry in new_files.values() for i in entry["ids"]}
+        stale = [i for i in collection.get(where=where, include=[])["ids"] if i not in kept]
+        for start in range(0, len(stale), 5000):
+            collection.delete(ids=stale[start : start + 5000])
+
+    for _rel, _f, _sha, prev in todo:
+        if prev and prev.get("ids"):
+            collection.delete(ids=prev["ids"])
+
     vs = LCChroma(collection_name=collection_name, client=client, embedding_function=emb)
-    return vs.as_retriever(search_kwargs={"k": k})
+    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=120)
+    progress = IngestProgress(collection_name, len(todo), verbose=verbose)
+    by_path = {str(f): (rel, sha, prev) for rel, f, sha, prev in todo}
+    batch: List[tuple] = []
+
+    def _flush() -> None:
+        if batch:
+            vs.add_documents([c for c, _ in batch], ids=[i for _, i in batch])
+            progress.chunks += len(batch)
+            batch.clear()
+
+    # Parse in worker processes, chunk lazily, embed/write in fixed-size batches
+    for f, docs, err in iter_load([f for _, f, _, _ in todo], workers):
+        rel, sha, prev = by_path[str(f)]
+        # Path and content both go into the id: identical files must not share chunks
+        id_key = hashlib.sha256(f"{rel}\0{sha}".encode("utf-8")).hexdigest()[:16]
+        ids: List[str] = []
+        # Unreadable files stay out of the index and are retried next time they change
+        for i, chunk in enumerate(_iter_chunks(splitter, docs)):
+            chunk.metadata["doc_sha256"] = sha
+            if kind:
+                chunk.metadata["kind"] = kind
+            ids.append(f"{lay['id_prefix']}{id_key}:{i}")
+            batch.append((chunk, ids[-1]))
+            if len(batch) >= batch_size:
+                _flush()
+        new_files[rel] = {"sha256": sha, "ids": ids}
+        report["changed" if prev else "added"].append(rel)
+        if err:
+            report.setdefault("errors", {})[rel] = err
+        progress.file_done(len(docs))
+    _flush()
+    chunks_embedded = progress.chunks
+
+    _write_manifest(dir_, {"version": 1, "embedding": emb.signature, "files": new_files}, lay["manifest"])
+    if todo or report["removed"] or legacy or not (Path(dir_) / lay["bm25"]).exists():
+        # Lexical index is cheap relative to embedding; rebuild it whole
+        report["bm25_docs"] = _rebuild_bm25(collection, dir_, kind)
+    qmode = _quant_mode(quant)
+    if qmode:
+        from rag.quant import QuantizedStore, quant_name
+
+        qpath = Path(dir_) / quant_name(qmode, kind)
+        # Also rebuild files that no longer load (e.g. written with pickled ids)
+        if "bm25_docs" in report or not qpath.exists() or QuantizedStore.load(str(qpath)) is None:
+            report["quant_vectors"] = _rebuild_quant(collection, dir_, kind, qmode)
+    report["unchanged"] = len(files) - len(todo) - len(report["adopted"])
+    report["chunks_embedded"] = chunks_embedded
+    report["chunks_total"] = len(collection.get(where=where, include=[])["ids"]) if where else collection.count()
+    report["seconds"] = round(time.perf_counter() - t0, 3)
+    report["throughput"] = progress.rates()
+    report["fingerprint"] = corpus_fingerprint(new_files, emb.signature)
+    return report
+
+
+def format_sync_report(report: Dict[str, Any]) -> str:
+    return (
+        f"[index] {report['collection']}: +{len(report['added'])} added, "
+        f"~{len(report['changed'])} changed, -{len(report['removed'])} removed, "
+        f"{len(report['adopted'])} adopted, {report['unchanged']} unchanged; "
+        f"embedded {report['chunks_embedded']} chunks in {report['seconds']}s "
+        f"({report['throughput']['docs_per_s']} docs/s, {report['throughput']['chunks_per_s']} chunks/s; "
+        f"{report['chunks_total']} total)"
+    )
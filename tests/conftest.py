@@ -0,0 +1,18 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+BASE = Path(__file__).resolve().parent.parent
+if str(BASE) not in sys.path:
+    sys.path.insert(0, str(BASE))
+
+
+@pytest.fixture(autouse=True)
+def _no_llm_cache():
+    # Stub models must be called every time; never read or write .cache/llm.sqlite3
+    from agents import llm
+
+    llm.set_llm_cache_enabled(False)
+    yield
+    llm.set_llm_cache_enabled(True)
@@ -0,0 +1,52 @@
+"""Stand-ins for chat models so chains can run without an API key."""
+from typing import Any, Dict, List, Optional
+
+
+class FakeChatModel:
+    """Replays canned replies in order; records the messages and response_format of each call."""
+
+    model_name = "fake-model"
+    temperature = 0
+
+    def __init__(self, replies: List[str], chunk: int = 5) -> None:
+        self.replies = list(replies)
+        self.chunk = chunk
+        self.calls: List[list] = []
+        self.formats: List[Optional[Dict[str, Any]]] = []
+
+    def bind(self, **kwargs: Any) -> "_Bound":
+        return _Bound(self, kwargs.get("response_format"))
+
+    def _reply(self, messages, fmt) -> str:
+        self.calls.append(messages)
+        self.formats.append(fmt)
+        return self.replies.pop(0)
+
+    def _stream(self, messages, fmt):
+        from langchain_core.messages import AIMessageChunk
+
+        text = self._reply(messages, fmt)
+        for i in range(0, len(text), self.chunk):
+            yield AIMessageChunk(content=text[i : i + self.chunk])
+
+    def stream(self, messages):
+        return self._stream(messages, None)
+
+    def invoke(self, messages):
+        from langchain_core.messages import AIMessage
+
+        return AIMessage(content=self._reply(messages, None))
+
+
+class _Bound:
+    def __init__(self, model: FakeChatModel, fmt: Optional[Dict[str, Any]]) -> None:
+        self.model = model
+        self.fmt = fmt
+
+    def stream(self, messages):
+        return self.model._stream(messages, self.fmt)
+
+    def invoke(self, messages):
+        from langchain_core.messages import AIMessage
+
+        return AIMessage(content=self.model._reply(messages, self.fmt))
@@ -0,0 +1,23 @@
+from bench.retrieval import _queries
+
+
+class FakeCollection:
+    """Two kinds in one collection, filtered like Chroma's `where={"kind": ...}`."""
+
+    def __init__(self):
+        self.rows = [
+            ("tech:a", "tech", "alpha beta gamma delta epsilon zeta eta theta"),
+            ("market:b", "market", "one two three four five six seven eight"),
+        ]
+
+    def get(self, where=None, include=()):
+        rows = [r for r in self.rows if not where or r[1] == where["kind"]]
+        return {"ids": [r[0] for r in rows], "documents": [r[2] for r in rows]}
+
+
+def test_queries_sample_only_the_benchmarked_kind():
+    coll = FakeCollection()
+    for _ in range(3):
+        qs = _queries(coll, samples=10, words=3, seed=0, where={"kind": "tech"})
+        assert [cid for cid, _ in qs] == ["tech:a"]
+    assert {cid for cid, _ in _queries(coll, samples=10, words=3, seed=0)} == {"tech:a", "market:b"}
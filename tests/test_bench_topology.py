@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("langgraph")
+pytest.importorskip("langchain_core")
+
+import agents.competitor  # noqa: E402
+import agents.decision  # noqa: E402
+import agents.jsonstream  # noqa: E402
+import agents.llm  # noqa: E402
+import agents.market  # noqa: E402
+import agents.scout  # noqa: E402
+import agents.tech  # noqa: E402
+from agents.schemas import reset_structured_stats, structured_stats  # noqa: E402
+from bench import topology  # noqa: E402
+from graph import app  # noqa: E402
+
+
+@pytest.fixture
+def restore_stubbed(monkeypatch):
+    # The bench patches module globals for the whole process; undo them after the test
+    monkeypatch.setattr(agents.llm, "invoke_chat", agents.llm.invoke_chat)
+    monkeypatch.setattr(agents.jsonstream, "invoke_chat", agents.jsonstream.invoke_chat)
+    for mod in (agents.scout, agents.tech, agents.market, agents.competitor, agents.decision):
+        monkeypatch.setattr(mod, "get_llm", mod.get_llm)
+    monkeypatch.setattr(app, "CTX", app.AppContext())
+
+
+def test_topology_bench_runs_both_graphs(restore_stubbed):
+    reset_structured_stats()
+    times = topology.run(latency=0.0, repeat=1)
+    assert set(times) == {"sequential", "parallel"}
+    assert all(len(t) == 1 and t[0] > 0 for t in times.values())
+    # Canned answers validate, so no run pays for repair calls
+    stats = structured_stats()
+    assert {"scout", "tech", "market", "comp", "decision"} <= set(stats)
+    assert all(s["repaired"] == 0 and s["failed"] == 0 for s in stats.values())
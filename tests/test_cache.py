@@ -0,0 +1,30 @@
+from db.cache import SqliteCache
+
+
+def test_running_totals_match_table(tmp_path):
+    cache = SqliteCache(str(tmp_path / "c.sqlite3"), max_entries=3, max_bytes=25)
+    for i in range(6):
+        cache.set(f"k{i}", b"x" * 5)
+    cache.set("k5", b"y" * 8)  # replace: size changes, count does not
+    assert (cache._count, cache._bytes) == cache._totals()
+    assert cache._count == 3
+    assert cache.get("k0") is None  # least recently used went first
+    assert cache.get("k5") == b"y" * 8
+
+
+def test_byte_bound_evicts_and_totals_survive_reopen(tmp_path):
+    path = str(tmp_path / "c.sqlite3")
+    cache = SqliteCache(path, max_bytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.set("c", b"1234")
+    assert cache._bytes <= 10 and cache.evictions == 1
+    reopened = SqliteCache(path, max_bytes=10)
+    assert (reopened._count, reopened._bytes) == (2, 8)
+
+
+def test_ttl_expiry_updates_totals(tmp_path):
+    cache = SqliteCache(str(tmp_path / "c.sqlite3"), ttl_seconds=-1)
+    cache.set("a", b"abc")
+    assert cache.get("a") is None
+    assert (cache._count, cache._bytes) == (0, 0) == cache._totals()
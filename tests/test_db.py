@@ -0,0 +1,169 @@
+import threading
+
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from db.postgres import (  # noqa: E402
+    UnitOfWork,
+    current_unit_of_work,
+    get_startup_by_name,
+    migrate,
+    unit_of_work,
+    upsert_startup,
+)
+from db.writer import WriteBehindWriter  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # File-backed so the write-behind thread sees the same database
+    eng = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    migrate(eng)
+    return eng
+
+
+def _count(engine, table):
+    with engine.connect() as conn:
+        return conn.execute(sqlalchemy.text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+
+def _upsert(target, name, tech_raw=None):
+    upsert_startup(target, domain="ai", query="q", name=name, tech_raw=tech_raw)
+
+
+def test_writes_are_coalesced_and_visible_before_flush(engine):
+    uow = UnitOfWork(engine)
+    _upsert(uow, "Acme", "raw")
+    _upsert(uow, "Acme")
+    uow.update_startup_columns("Acme", {"tech_summary": "a"})
+    uow.update_startup_columns("Acme", {"tech_summary": "b", "market_eval": "m"})
+    uow.add_startup_sources("Acme", ["x", "y"])
+    uow.add_startup_sources("Acme", ["y", "z"])
+    assert len(uow) == 1 + 1 + 3
+
+    row = get_startup_by_name(uow, "Acme")
+    assert (row["tech_raw"], row["tech_summary"], row["market_eval"]) == ("raw", "b", "m")
+    assert get_startup_by_name(engine, "Acme") is None
+
+    # One statement per table / column set
+    assert uow.flush() == 3
+    assert len(uow) == 0
+    row = get_startup_by_name(engine, "Acme")
+    assert (row["tech_raw"], row["tech_summary"], row["market_eval"]) == ("raw", "b", "m")
+    assert _count(engine, "startup_sources") == 3
+
+
+def test_pending_overlays_committed_row(engine):
+    _upsert(engine, "Acme", "raw")
+    uow = UnitOfWork(engine)
+    uow.update_startup_columns("Acme", {"market_eval": "m"})
+    row = get_startup_by_name(uow, "Acme")
+    assert (row["tech_raw"], row["market_eval"]) == ("raw", "m")
+
+
+def test_unit_of_work_discards_on_error(engine):
+    with pytest.raises(RuntimeError):
+        with unit_of_work(engine) as uow:
+            assert current_unit_of_work() is uow
+            _upsert(uow, "Acme", "raw")
+            raise RuntimeError("boom")
+    assert current_unit_of_work() is None
+    assert len(uow) == 0
+    assert get_startup_by_name(engine, "Acme") is None
+
+    with unit_of_work(engine) as uow:
+        _upsert(uow, "Acme", "raw")
+    assert get_startup_by_name(engine, "Acme")["tech_raw"] == "raw"
+
+
+def test_failed_flush_restores_batch(engine, monkeypatch):
+    uow = UnitOfWork(engine)
+    _upsert(uow, "Acme", "old")
+    monkeypatch.setattr(uow, "_commit", lambda *batch: (_ for _ in ()).throw(OSError("down")))
+    with pytest.raises(OSError):
+        uow.flush()
+    monkeypatch.undo()
+    uow.update_startup_columns("Acme", {"tech_summary": "new"})
+    assert uow.pending("Acme")["tech_raw"] == "old"
+    uow.flush()
+    row = get_startup_by_name(engine, "Acme")
+    assert (row["tech_raw"], row["tech_summary"]) == ("old", "new")
+
+
+def _failing_commit(writer, failures):
+    real = writer._commit
+    calls = []
+
+    def commit(*batch):
+        calls.append(batch)
+        if len(calls) <= failures:
+            raise OSError(f"down {len(calls)}")
+        return real(*batch)
+
+    writer._commit = commit
+    return calls
+
+
+def test_writer_retries_with_backoff(engine):
+    writer = WriteBehindWriter(engine, interval=0.01, retries=3, backoff=0.001)
+    try:
+        calls = _failing_commit(writer, failures=2)
+        _upsert(writer, "Acme", "raw")
+        assert writer.drain(timeout=5)
+        assert len(calls) == 3
+        assert writer.stats()["failures"] == 2 and writer.stats()["commits"] == 1
+        assert writer.dead == []
+        assert get_startup_by_name(engine, "Acme")["tech_raw"] == "raw"
+    finally:
+        writer.close()
+
+
+def test_writer_parks_batch_after_retries(engine):
+    writer = WriteBehindWriter(engine, interval=0.01, retries=1, backoff=0.001)
+    try:
+        calls = _failing_commit(writer, failures=10)
+        _upsert(writer, "Acme", "raw")
+        assert writer.drain(timeout=5)
+        assert len(calls) == 2
+        assert len(writer.dead) == 1
+        error, batch = writer.dead[0]
+        assert error == "OSError: down 2"
+        assert batch[0][0]["name"] == "Acme"
+        assert len(writer) == 0 and writer.pending("Acme") == {}
+        assert get_startup_by_name(engine, "Acme") is None
+    finally:
+        writer.close()
+
+
+def test_writer_drain_and_backpressure(engine):
+    writer = WriteBehindWriter(engine, interval=0.01, batch_size=100, max_pending=2)
+    gate = threading.Event()
+    real = writer._commit
+
+    def slow_commit(*batch):
+        gate.wait(5)
+        return real(*batch)
+
+    writer._commit = slow_commit
+    try:
+        done = threading.Event()
+
+        def produce():
+            for i in range(6):
+                _upsert(writer, f"s{i}")
+            done.set()
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        # The writer is stuck on its first batch, so the producer blocks at max_pending
+        assert not done.wait(0.3)
+        assert not writer.drain(timeout=0.05)
+        gate.set()
+        assert done.wait(5)
+        assert writer.drain(timeout=5)
+        assert _count(engine, "startups") == 6
+        assert writer.stats()["pending"] == 0
+    finally:
+        gate.set()
+        writer.close()
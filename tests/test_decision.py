@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+pytest.importorskip("pydantic")
+pytest.importorskip("langchain_core")
+
+from agents import decision  # noqa: E402
+from stubs import FakeChatModel  # noqa: E402
+
+
+def _chain(monkeypatch, replies):
+    llm = FakeChatModel(replies)
+    monkeypatch.setattr(decision, "get_llm", lambda model: llm)
+    return decision.decision_chain(), llm
+
+
+def _entry(name, verdict, score=70):
+    return {"name": name, "score": score, "verdict": verdict, "rationale": f"{name} ok", "missing": []}
+
+
+def test_run_many_decides_all_candidates_in_one_call(monkeypatch):
+    reply = {"decisions": [_entry("A", "recommend", 80), _entry("b", "Hold"), _entry("C", "pass", 40)]}
+    run, llm = _chain(monkeypatch, [json.dumps(reply)])
+    out = run.run_many([("A", "tech a", "mkt a"), ("B", "tech b", "mkt b"), ("C", "tech c", "mkt c")], "comp")
+    assert len(llm.calls) == 1
+    assert out["A"] == {"score": 80, "verdict": "recommend", "rationale": "A ok", "missing": []}
+    assert out["B"]["verdict"] == "hold"  # matched case-insensitively, verdict normalized
+    assert out["C"]["score"] == 40
+
+
+def test_run_many_leaves_out_uncovered_candidates(monkeypatch):
+    run, _ = _chain(monkeypatch, [json.dumps({"decisions": [_entry("A", "pass")]})])
+    out = run.run_many([("A", "", ""), ("B", "", "")], "comp")
+    assert set(out) == {"A"}
+
+
+def test_run_many_never_assigns_decisions_by_position(monkeypatch):
+    # Same count, but one name does not match: it must not take another candidate's decision
+    reply = {"decisions": [_entry("Gamma Inc", "recommend", 90), _entry("  alpha  LABS ", "pass", 30)]}
+    run, _ = _chain(monkeypatch, [json.dumps(reply)])
+    out = run.run_many([("Alpha Labs", "", ""), ("Beta", "", "")], "comp")
+    assert set(out) == {"Alpha Labs"}
+    assert out["Alpha Labs"]["verdict"] == "pass"
@@ -0,0 +1,15 @@
+from rag.embeddings import DEFAULT_EMBED_MODEL, embedding_signature
+
+
+def test_default_signature_matches_unprefixed_indexes(monkeypatch):
+    monkeypatch.delenv("E5_PREFIX", raising=False)
+    monkeypatch.delenv("EMBED_MODEL", raising=False)
+    monkeypatch.delenv("EMBED_BACKEND", raising=False)
+    # Existing manifests/legacy indexes record the bare model name
+    assert embedding_signature() == DEFAULT_EMBED_MODEL
+
+
+def test_prefixing_is_opt_in(monkeypatch):
+    monkeypatch.setenv("E5_PREFIX", "auto")
+    assert embedding_signature(DEFAULT_EMBED_MODEL) == DEFAULT_EMBED_MODEL + "|e5-prefix"
+    assert embedding_signature("BAAI/bge-m3") == "BAAI/bge-m3"
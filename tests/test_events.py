@@ -0,0 +1,82 @@
+import io
+import json
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from graph import app  # noqa: E402
+from graph.events import EventLog, instrument  # noqa: E402
+
+NODES = ["startup_search", "tech_summary", "market_eval", "competitor_analysis", "investment_decision", "report_writer"]
+
+
+REAL_REPORT = app.n_report
+
+
+def _stub_nodes(monkeypatch, report=True):
+    monkeypatch.setattr(app, "n_scout", lambda s: {"target": "Acme"})
+    monkeypatch.setattr(app, "n_tech", lambda s: {"tech": "t"})
+    monkeypatch.setattr(app, "n_market", lambda s: {"market": "m"})
+    monkeypatch.setattr(app, "n_comp", lambda s: {"comp": "c"})
+    monkeypatch.setattr(app, "n_decision", lambda s: {"decision": "recommend", "score": 80})
+    if report:
+        monkeypatch.setattr(app, "n_report", lambda s: {"report_path": "report.md"})
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+def test_graph_nodes_emit_start_and_end_events(monkeypatch, parallel):
+    _stub_nodes(monkeypatch)
+    graph = app.build_state_graph(parallel=parallel).compile()
+    buf = io.StringIO()
+    out = graph.invoke(
+        {"domain": "ai", "query": "q"},
+        config={"configurable": {"events": EventLog(buf), "run_id": "r1"}},
+    )
+    assert out["report_path"] == "report.md"
+
+    events = [json.loads(line) for line in buf.getvalue().splitlines()]
+    assert {e["run_id"] for e in events} == {"r1"}
+    for node in NODES:
+        kinds = [e["event"] for e in events if e.get("node") == node]
+        assert kinds == ["node_start", "node_end"], node
+    end = next(e for e in events if e["event"] == "node_end" and e["node"] == "report_writer")
+    assert end["status"] == "ok" and end["duration_ms"] >= 0
+
+
+def test_instrument_keeps_name_without_exposing_wrapped_signature():
+    def n_example(s):
+        """Example node."""
+        return {}
+
+    wrapped = instrument("example", n_example)
+    assert wrapped.__name__ == "n_example" and wrapped.__doc__ == "Example node."
+    assert not hasattr(wrapped, "__wrapped__")
+    # Without a sink the node runs unchanged
+    assert wrapped({}, None) == {}
+
+
+def test_cached_report_is_streamed_to_custom_mode(monkeypatch, tmp_path):
+    import agents.report
+    from agents import llm
+    from db.cache import SqliteCache
+    from stubs import FakeChatModel
+
+    _stub_nodes(monkeypatch, report=False)
+    monkeypatch.setattr(app, "CTX", app.AppContext())
+    monkeypatch.setattr(llm, "_CACHE", SqliteCache(str(tmp_path / "llm.sqlite3")))
+    llm.set_llm_cache_enabled(True)
+    brief = "# Brief\n\nAcme looks good."
+    model = FakeChatModel([brief])  # one reply: the second run must be served from the cache
+    monkeypatch.setattr(agents.report, "get_llm", lambda *a, **k: model)
+
+    graph = app.build_state_graph().compile()
+    for run in range(2):
+        state = {"domain": "ai", "query": "q", "output_dir": str(tmp_path / f"run{run}")}
+        tokens = [
+            chunk["report_token"]
+            for mode, chunk in graph.stream(state, stream_mode=["custom"])
+            if mode == "custom" and isinstance(chunk, dict) and "report_token" in chunk
+        ]
+        assert "".join(tokens) == brief
+    assert len(model.calls) == 1
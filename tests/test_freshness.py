@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from db.freshness import FreshnessPolicy
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+
+def test_row_without_stored_context_is_not_fresh():
+    policy = FreshnessPolicy()
+    stamp = policy.stamp("market_eval", "fp1", context={"sources": ["a.md"], "snippets": [{"src": "a.md", "text": "x"}]})
+    row = {"market_eval": "{}", **stamp}
+    assert policy.fresh_value(row, "market_eval", "fp1") == "{}"
+    assert policy.stored_context(row, "market_eval") == {"sources": ["a.md"], "snippets": [{"src": "a.md", "text": "x"}]}
+    # Written before sources/snippets were stored: recompute instead of reusing a context-less analysis
+    legacy = {k: v for k, v in row.items() if k != "market_eval_ctx"}
+    assert policy.fresh_value(legacy, "market_eval", "fp1") is None
+    assert policy.fresh_value({**row, "market_eval_ctx": "not json"}, "market_eval", "fp1") is None
+
+
+def test_stale_or_changed_fingerprint_is_not_fresh():
+    policy = FreshnessPolicy()
+    old = datetime.utcnow() - timedelta(hours=48)
+    row = {"market_eval": "{}", **policy.stamp("market_eval", "fp1", now=old)}
+    assert policy.fresh_value(row, "market_eval", "fp1") is None
+    row = {"market_eval": "{}", **policy.stamp("market_eval", "fp1")}
+    assert policy.fresh_value(row, "market_eval", "fp2") is None
+
+
+@pytest.fixture
+def app_db(tmp_path, monkeypatch):
+    from db.postgres import migrate, upsert_startup
+    from graph import app
+
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    migrate(engine)
+    upsert_startup(engine, domain="ai", query="q", name="Acme", tech_raw="Acme builds robots")
+    monkeypatch.setattr(app, "_db", lambda: engine)
+    monkeypatch.setattr(app, "FRESHNESS", FreshnessPolicy())
+    return app, engine
+
+
+def test_reused_analysis_keeps_sources_and_snippets(app_db):
+    app, _ = app_db
+    res = {"text": '{"context": []}', "sources": ["m.md"], "snippets": [{"src": "m.md", "text": "market"}]}
+    app._persist_analysis("market", "Acme", "fp1", res)
+    stored = app._stored_analysis("market", "Acme", "fp1")
+    assert stored["from_db"] and stored["text"] == res["text"]
+    assert stored["sources"] == ["m.md"] and stored["snippets"] == res["snippets"]
+
+    upd = app._new_update()
+    app._record(upd, "market:Acme", stored)
+    assert upd["sources"] == ["m.md"] and upd["snippets"] == res["snippets"]
+
+
+def test_tech_fallback_is_not_persisted(app_db, monkeypatch):
+    from db.postgres import get_startup_by_name
+
+    app, engine = app_db
+    monkeypatch.setattr(app.CTX, "chain", lambda agent: lambda *args: {"text": "", "sources": [], "snippets": []})
+    out = app.n_tech({"target": "Acme", "query": "q"})
+    assert "Acme builds robots" in out["tech"]
+    row = get_startup_by_name(engine, "Acme")
+    assert row["tech_summary"] is None and row["tech_summary_fp"] is None
+    assert app._stored_analysis("tech", "Acme", app._fingerprint("tech", "Acme", "q")) is None
+
+    monkeypatch.setattr(app.CTX, "chain", lambda agent: lambda *args: {"text": "real", "sources": ["t.md"], "snippets": []})
+    app.n_tech({"target": "Acme", "query": "q"})
+    stored = app._stored_analysis("tech", "Acme", app._fingerprint("tech", "Acme", "q"))
+    assert stored["text"] == "real" and stored["sources"] == ["t.md"]
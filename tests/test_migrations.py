@@ -0,0 +1,39 @@
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from db import postgres  # noqa: E402
+from db.postgres import SCHEMA_VERSION, migrate  # noqa: E402
+
+
+def _columns(engine, table):
+    return {c["name"] for c in sqlalchemy.inspect(engine).get_columns(table)}
+
+
+def test_fresh_database_reaches_latest_version(tmp_path):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    assert migrate(engine) == SCHEMA_VERSION
+    assert {"market_eval_at", "market_eval_fp"} <= _columns(engine, "startups")
+
+
+def test_v2_tolerates_columns_added_by_hand(tmp_path):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    with engine.begin() as conn:
+        for step in postgres.MIGRATIONS[0][1]:
+            conn.execute(sqlalchemy.text(step.format(pk="INTEGER PRIMARY KEY AUTOINCREMENT")))
+        conn.execute(sqlalchemy.text("ALTER TABLE startups ADD COLUMN tech_summary_at TIMESTAMP"))
+        conn.execute(sqlalchemy.text("CREATE TABLE schema_version (version INT PRIMARY KEY, applied_at TIMESTAMP NOT NULL)"))
+        conn.execute(sqlalchemy.text("INSERT INTO schema_version VALUES (1, CURRENT_TIMESTAMP)"))
+    assert migrate(engine) == SCHEMA_VERSION
+    assert {"tech_summary_at", "tech_summary_fp", "competitor_analysis_fp"} <= _columns(engine, "startups")
+
+
+def test_migration_cache_is_keyed_by_database_not_engine_id(tmp_path):
+    url = f"sqlite:///{tmp_path / 'db.sqlite3'}"
+    migrate(sqlalchemy.create_engine(url))
+    assert postgres._MIGRATED[url] == SCHEMA_VERSION
+    # In-memory databases are distinct per engine, so they are always migrated
+    first, second = sqlalchemy.create_engine("sqlite://"), sqlalchemy.create_engine("sqlite://")
+    migrate(first)
+    migrate(second)
+    assert "startups" in sqlalchemy.inspect(second).get_table_names()
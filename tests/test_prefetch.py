@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from rag.vector import Prefetcher  # noqa: E402
+
+
+class CountingRetriever:
+    def __init__(self):
+        self.batches = []
+        self.singles = []
+
+    def search_many(self, queries, k=None):
+        self.batches.append(list(queries))
+        return [[f"doc:{q}"] for q in queries]
+
+    def invoke(self, query):
+        self.singles.append(query)
+        return [f"live:{query}"]
+
+
+def test_prefetched_result_is_handed_out_once():
+    r = CountingRetriever()
+    p = Prefetcher(r)
+    p.prefetch(["a", "b", "a"])
+    assert r.batches == [["a", "b"]]
+    assert p.get("a") == ["doc:a"]
+    assert p.get("a") == ["live:a"]
+
+
+def test_discard_drops_unconsumed_entries():
+    p = Prefetcher(CountingRetriever())
+    p.prefetch(["a", "b"])
+    p.get("a")
+    p.discard(["a", "b"])
+    assert len(p) == 0
+
+
+def test_store_is_bounded():
+    p = Prefetcher(CountingRetriever(), max_items=2)
+    p.prefetch(["a", "b"])
+    p.prefetch(["c"])
+    assert len(p) == 2
+    assert p.get("a") == ["live:a"]  # oldest entry was dropped
+    assert p.get("c") == ["doc:c"]
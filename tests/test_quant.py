@@ -0,0 +1,23 @@
+import numpy as np
+
+from rag.quant import QuantizedStore
+
+
+def test_save_load_roundtrip_without_pickle(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(5, 8)).astype(np.float32)
+    ids = ["a.md:0", "b.md:0", "긴이름.md:1", "d", "e"]
+    store = QuantizedStore.build("int8", ids, vectors)
+    path = str(tmp_path / "quant.int8.npz")
+    store.save(path)
+    with np.load(path, allow_pickle=False) as data:
+        assert data["ids"].dtype.kind == "U"
+    loaded = QuantizedStore.load(path)
+    assert loaded.ids == ids
+    assert loaded.search(vectors[2], 1) == store.search(vectors[2], 1) == ["긴이름.md:1"]
+
+
+def test_pickled_ids_are_not_loaded(tmp_path):
+    path = str(tmp_path / "quant.binary.npz")
+    np.savez(path, mode=np.array("binary"), ids=np.array(["a", "b"], dtype=object), codes=np.zeros((2, 1), np.uint8))
+    assert QuantizedStore.load(path) is None
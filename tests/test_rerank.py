@@ -0,0 +1,78 @@
+import sys
+import time
+import types
+
+import pytest
+
+from rag import rerank
+
+
+class Doc:
+    def __init__(self, text):
+        self.page_content = text
+
+
+class SlowCrossEncoder:
+    """Scores by text length and sleeps `delay` seconds per predict() call."""
+
+    delay = 0.0
+
+    def __init__(self, model, device="cpu"):
+        self.calls = 0
+
+    def predict(self, pairs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return [len(text) for _, text in pairs]
+
+
+@pytest.fixture
+def make_reranker(monkeypatch):
+    monkeypatch.setitem(sys.modules, "sentence_transformers", types.SimpleNamespace(CrossEncoder=SlowCrossEncoder))
+
+    def make(delay, **kwargs):
+        monkeypatch.setattr(SlowCrossEncoder, "delay", delay)
+        return rerank.CrossEncoderReranker("fake", **kwargs)
+
+    return make
+
+
+DOCS = [Doc("a"), Doc("bbb"), Doc("cc"), Doc("dddd")]
+
+
+def test_fast_encoder_reorders_within_budget(make_reranker):
+    rr = make_reranker(0.0, batch_size=2, budget_ms=1000)
+    out = rr.rerank("q", DOCS, top_n=4)
+    assert [d.page_content for d in out] == ["dddd", "bbb", "cc", "a"]
+    assert rr.stats()["fallbacks"] == 0 and rr.stats()["partial"] == 0
+
+
+def test_slow_encoder_falls_back_to_dense_order(make_reranker):
+    rr = make_reranker(0.2, batch_size=2, budget_ms=50)
+    # Only the first batch after loading is unestimated; it calibrates the estimate
+    rr.rerank("q", DOCS, top_n=4)
+    assert rr.stats()["partial"] == 1
+    calls = rr.encoder.calls
+    for _ in range(3):
+        t0 = time.perf_counter()
+        out = rr.rerank("q", DOCS, top_n=4)
+        assert time.perf_counter() - t0 < 0.05
+        assert out == DOCS
+    assert rr.encoder.calls == calls
+    assert rr.stats()["fallbacks"] == 3
+    assert rr.stats()["est_batch_ms"] >= 200
+
+
+def test_retrieve_time_is_averaged_per_query(make_reranker):
+    rr = make_reranker(0.0)
+
+    class Base:
+        def search_many(self, queries, lexical_queries, k=None):
+            time.sleep(0.04)
+            return [DOCS for _ in queries]
+
+    retriever = rerank.RerankingRetriever(Base(), rr, k=2)
+    retriever.search_many(["a", "b", "c", "d"], ["a", "b", "c", "d"])
+    stats = rr.stats()
+    assert stats["retrieve_calls"] == 1 and stats["queries"] == 4
+    assert 5 <= stats["avg_retrieve_ms_per_query"] < 40
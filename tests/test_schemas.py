@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+pytest.importorskip("pydantic")
+pytest.importorskip("langchain_core")
+
+from langchain_core.prompts import ChatPromptTemplate  # noqa: E402
+
+from agents import schemas  # noqa: E402
+from agents.schemas import Decision, MarketEval, invoke_structured, json_schema, response_format  # noqa: E402
+from stubs import FakeChatModel  # noqa: E402
+
+PROMPT = ChatPromptTemplate.from_messages([("human", "{question}")])
+VALID = {"score": 72, "verdict": "Hold", "rationale": "solid team", "missing": []}
+
+
+@pytest.fixture(autouse=True)
+def _isolated(monkeypatch):
+    # One call per attempt, so call counts below are exact
+    monkeypatch.setenv("JSON_STREAM_RETRIES", "0")
+    monkeypatch.delenv("STRUCTURED_OUTPUT", raising=False)
+    schemas.reset_structured_stats()
+
+
+def _invoke(replies):
+    llm = FakeChatModel([json.dumps(r) if isinstance(r, dict) else r for r in replies])
+    return invoke_structured("decision", PROMPT, llm, {"question": "decide"}), llm
+
+
+def test_valid_on_first_pass():
+    (text, value, obj), llm = _invoke([VALID])
+    assert len(llm.calls) == 1
+    assert isinstance(obj, Decision) and value == {**VALID, "verdict": "hold"}
+    assert llm.formats[0]["type"] == "json_schema" and llm.formats[0]["json_schema"]["strict"] is True
+    assert schemas.structured_stats()["decision"]["valid"] == 1
+
+
+def test_invalid_then_repaired():
+    broken = {"score": 72, "verdict": "maybe", "rationale": "solid team"}
+    (text, value, obj), llm = _invoke([broken, VALID])
+    assert len(llm.calls) == 2
+    repair = "\n".join(str(m.content) for m in llm.calls[1])
+    assert "verdict" in repair and '"maybe"' in repair and "decide" not in repair
+    assert obj is not None and value["verdict"] == "hold"
+    assert json.loads(text) == VALID
+    stats = schemas.structured_stats()["decision"]
+    assert stats["repaired"] == 1 and stats["parse_failure_rate"] == 1.0
+
+
+def test_still_invalid_after_repair_returns_lenient_value():
+    broken = {"score": 72, "verdict": "maybe", "rationale": "solid team"}
+    (text, value, obj), llm = _invoke([broken, "still not json"])
+    assert len(llm.calls) == 2
+    assert obj is None
+    assert value == broken and json.loads(text) == broken
+    assert schemas.structured_stats()["decision"]["failed"] == 1
+
+
+@pytest.mark.parametrize("mode, expected", [("off", None), ("json_object", {"type": "json_object"})])
+def test_structured_output_modes(monkeypatch, mode, expected):
+    monkeypatch.setenv("STRUCTURED_OUTPUT", mode)
+    assert response_format(Decision) == expected
+    (_, value, obj), llm = _invoke([VALID])
+    assert llm.formats == [expected]
+    assert obj is not None and value["verdict"] == "hold"
+
+
+def _objects(node):
+    if isinstance(node, dict):
+        if node.get("type") == "object" or "properties" in node:
+            yield node
+        for v in node.values():
+            yield from _objects(v)
+    elif isinstance(node, list):
+        for v in node:
+            yield from _objects(v)
+
+
+@pytest.mark.parametrize("model_cls", [Decision, MarketEval])
+def test_json_schema_satisfies_strict_mode(model_cls):
+    schema = json_schema(model_cls)
+    objects = list(_objects(schema))
+    defs = schema.get("$defs") or {}
+    if model_cls is MarketEval:
+        assert set(defs) == {"MarketScores", "Score"}
+    for node in [*defs.values(), *objects]:
+        assert node["additionalProperties"] is False
+        assert sorted(node["required"]) == sorted(node["properties"])
+        assert "default" not in json.dumps(node)
+    # Decision.missing has a default in the model but must still be required in strict mode
+    if model_cls is Decision:
+        assert "missing" in schema["required"]
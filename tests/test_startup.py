@@ -0,0 +1,14 @@
+import subprocess
+import sys
+
+from conftest import BASE
+
+
+def test_importing_retrieval_modules_stays_lazy():
+    code = (
+        "import sys, rag.loaders, rag.vector; "
+        "heavy = [m for m in sys.modules if m.split('.')[0] in ('langchain_core', 'langchain_community', 'chromadb')]; "
+        "print(','.join(heavy))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=BASE, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
@@ -0,0 +1,57 @@
+import hashlib
+
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("langchain_chroma")
+
+from rag import vector  # noqa: E402
+
+
+class FakeEmbeddings:
+    """Deterministic 8-d vectors from a text hash; enough for Chroma bookkeeping."""
+
+    model = signature = "fake-embedding"
+
+    def _vec(self, text):
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [b / 255.0 for b in digest[:8]]
+
+    def embed_documents(self, texts):
+        return [self._vec(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vec(text)
+
+
+@pytest.fixture
+def fake_embedding(monkeypatch):
+    monkeypatch.setattr(vector, "_embedding", lambda: FakeEmbeddings())
+
+
+def _ids(dir_):
+    import chromadb
+
+    client = chromadb.PersistentClient(path=dir_)
+    return set(client.get_collection(vector.Path(dir_).name).get(include=[])["ids"])
+
+
+def test_identical_files_get_their_own_chunks(tmp_path, fake_embedding):
+    data, idx = tmp_path / "data", tmp_path / "idx"
+    data.mkdir()
+    body = "물류 스타트업 소개. " * 50
+    (data / "a.txt").write_text(body, encoding="utf-8")
+    (data / "b.txt").write_text(body, encoding="utf-8")
+
+    report = vector.sync_index(str(data), str(idx), workers=1)
+    assert sorted(report["added"]) == ["a.txt", "b.txt"]
+    manifest = vector._read_manifest(str(idx))
+    a_ids, b_ids = set(manifest["files"]["a.txt"]["ids"]), set(manifest["files"]["b.txt"]["ids"])
+    assert a_ids and b_ids and not a_ids & b_ids
+    assert _ids(str(idx)) == a_ids | b_ids
+
+    (data / "a.txt").unlink()
+    report = vector.sync_index(str(data), str(idx), workers=1)
+    assert report["removed"] == ["a.txt"] and report["unchanged"] == 1
+    # b.txt still owns all of its chunks
+    assert _ids(str(idx)) == b_ids